@@ -0,0 +1,212 @@
+"""
+Job Fetcher Stack - Sync Admission Control
+Per-user concurrency and request-rate limits for sync requests, with a
+fair-share queue across users for this instance's global sync capacity.
+"""
+from typing import Dict, Optional
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime, timedelta
+from fastapi import Depends, Header
+from pydantic import BaseModel
+from app.auth import get_current_user, require_admin, CurrentUser
+from app.config import get_settings
+from app.database import db_service
+from app.resilience import TokenBucket
+import asyncio
+import math
+
+
+
+class AdmissionLimits(BaseModel):
+    """Limits applied to one user's sync requests."""
+    max_concurrent: int
+    rate_per_minute: float
+    burst: int
+    exempt: bool = False
+
+
+class AdmissionRejected(Exception):
+    """Raised when a sync request is over its user's limits or the queue is full."""
+
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(reason)
+
+
+class AdmissionTicket:
+    """A granted sync slot. Release it when the fetch finishes."""
+
+    def __init__(self, controller: "AdmissionController", user_id: str, counted: bool = True):
+        self.controller = controller
+        self.user_id = user_id
+        self.counted = counted
+        self.released = False
+
+    def release(self):
+        """Return the slot; safe to call more than once."""
+        if self.released:
+            return
+        self.released = True
+        if self.counted:
+            self.controller._release(self.user_id)
+
+
+class AdmissionController:
+    """
+    Admits sync requests keyed on user_id.
+
+    A request must pass the user's token-bucket rate limit and concurrency
+    limit, then take one of the instance's global slots. When all global
+    slots are taken it waits in a per-user queue; freed slots are handed to
+    waiting users round-robin so one busy user cannot starve the others.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.overrides: Dict[str, AdmissionLimits] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._in_flight_total = 0
+        self._waiters: "OrderedDict[str, deque]" = OrderedDict()
+
+    def limits_for(self, user_id: str) -> AdmissionLimits:
+        """Effective limits for a user: an admin override, or the configured defaults."""
+        return self.overrides.get(user_id) or AdmissionLimits(
+            max_concurrent=self.settings.admission_max_concurrent_per_user,
+            rate_per_minute=self.settings.admission_rate_per_minute,
+            burst=self.settings.admission_burst
+        )
+
+    def set_override(self, user_id: str, limits: Optional[AdmissionLimits]):
+        """Set or clear (limits=None) a user's limit override."""
+        self._buckets.pop(user_id, None)
+        if limits is None:
+            self.overrides.pop(user_id, None)
+        else:
+            self.overrides[user_id] = limits
+
+    async def admit(self, user_id: str, override: bool = False) -> AdmissionTicket:
+        """
+        Admit a sync request or raise AdmissionRejected.
+        override skips all limits (admin requests).
+        """
+        limits = self.limits_for(user_id)
+        if override or limits.exempt:
+            return AdmissionTicket(self, user_id, counted=False)
+
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(
+                rate=limits.rate_per_minute / 60,
+                capacity=limits.burst
+            )
+        wait = bucket.try_acquire()
+        if wait > 0:
+            raise AdmissionRejected("Sync request rate limit exceeded", retry_after=wait)
+
+        # Runs from other instances count too; the local count covers runs not yet recorded
+        stale_cutoff = datetime.utcnow() - timedelta(minutes=self.settings.stale_run_minutes)
+        running = await db_service.count_running_fetch_runs(
+            user_id=user_id,
+            started_after=stale_cutoff
+        )
+        queued = len(self._waiters.get(user_id, ()))
+        if max(running, self._in_flight.get(user_id, 0)) + queued >= limits.max_concurrent:
+            # A request turned away for concurrency shouldn't use up the user's rate
+            bucket.refund()
+            raise AdmissionRejected(
+                f"Too many concurrent syncs (limit {limits.max_concurrent})",
+                retry_after=self.settings.admission_retry_after
+            )
+
+        if self._in_flight_total < self.settings.admission_global_concurrency and not self._waiters:
+            return self._grant(user_id)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user_id, deque()).append(waiter)
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=self.settings.admission_queue_timeout)
+        except BaseException:
+            # Cancelled while queued (client gone, Lambda timeout): leave the
+            # queue, and give back a slot granted in the meantime
+            if waiter.done() and not waiter.cancelled():
+                waiter.result().release()
+            else:
+                waiter.cancel()
+                self._drop_cancelled(user_id)
+            raise
+        if not done:
+            waiter.cancel()
+            self._drop_cancelled(user_id)
+            raise AdmissionRejected(
+                "Sync capacity is busy",
+                retry_after=self.settings.admission_retry_after
+            )
+        return waiter.result()
+
+    def snapshot(self) -> dict:
+        """Current in-flight and queued counts."""
+        return {
+            "in_flight_total": self._in_flight_total,
+            "global_concurrency": self.settings.admission_global_concurrency,
+            "in_flight": {user_id: count for user_id, count in self._in_flight.items() if count},
+            "queued": {user_id: len(waiters) for user_id, waiters in self._waiters.items()},
+            "overrides": {user_id: limits.model_dump() for user_id, limits in self.overrides.items()}
+        }
+
+    def _grant(self, user_id: str) -> AdmissionTicket:
+        self._in_flight_total += 1
+        self._in_flight[user_id] += 1
+        return AdmissionTicket(self, user_id)
+
+    def _release(self, user_id: str):
+        self._in_flight_total -= 1
+        self._in_flight[user_id] -= 1
+        if not self._in_flight[user_id]:
+            del self._in_flight[user_id]
+        self._grant_next()
+
+    def _grant_next(self):
+        """Hand free global slots to waiting users, round-robin."""
+        while self._waiters and self._in_flight_total < self.settings.admission_global_concurrency:
+            user_id, waiters = self._waiters.popitem(last=False)
+            waiter = waiters.popleft()
+            if waiters:
+                # Back of the line until every other waiting user has had a turn
+                self._waiters[user_id] = waiters
+            if not waiter.done():
+                waiter.set_result(self._grant(user_id))
+
+    def _drop_cancelled(self, user_id: str):
+        waiters = self._waiters.get(user_id)
+        if waiters is None:
+            return
+        remaining = deque(waiter for waiter in waiters if not waiter.done())
+        if remaining:
+            self._waiters[user_id] = remaining
+        else:
+            del self._waiters[user_id]
+
+
+# Singleton instance
+admission_controller = AdmissionController()
+
+
+def retry_after_header(error: AdmissionRejected) -> Dict[str, str]:
+    """Retry-After header for a rejected request, in whole seconds."""
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+
+
+async def admission_override(
+    x_admission_override: bool = Header(False),
+    current_user: CurrentUser = Depends(get_current_user)
+) -> bool:
+    """
+    Dependency: True when the request asks to bypass admission limits.
+    The X-Admission-Override header is only honoured for admins.
+    """
+    if not x_admission_override:
+        return False
+    await require_admin(current_user)
+    return True
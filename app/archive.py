@@ -0,0 +1,336 @@
+"""
+Job Fetcher Stack - Dataset Archive
+Append-only local archive of downloaded Apify dataset items, so ingest can
+be re-run offline after parsing, salary normalization or scoring changes.
+
+Each dataset is two files under DATASET_ARCHIVE_DIR:
+- <dataset_id>.ndjson.zst: independent frames of NDJSON items, one per
+  appended page, zstd-compressed
+- <dataset_id>.idx: one fixed-size entry per frame (first item offset,
+  byte offset, byte length, item count, codec)
+
+Frames are written before their index entry, so a torn write is never
+read and is overwritten by the next append. Reads memory-map the data file
+and decompress only the frames a page needs.
+
+    python -m app.archive list
+    python -m app.archive replay <dataset_id> --user-id <uuid>
+    python -m app.archive replay <dataset_id> --dry-run
+"""
+from typing import Dict, Iterator, List, Optional
+from bisect import bisect_right
+from app.config import get_settings
+import argparse
+import asyncio
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zstandard
+
+
+logger = logging.getLogger(__name__)
+
+IDENTITY = 0  # Frames from archives written before zstandard was required; read only
+ZSTD = 1
+
+# first item offset, byte offset, byte length, item count, codec
+INDEX_ENTRY = struct.Struct("<QQIIB")
+
+DATA_SUFFIX = ".ndjson.zst"
+INDEX_SUFFIX = ".idx"
+
+DATASET_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class IndexEntry:
+    """Location of one frame in a dataset's data file."""
+
+    __slots__ = ("item_offset", "byte_offset", "byte_length", "item_count", "codec")
+
+    def __init__(self, item_offset: int, byte_offset: int, byte_length: int, item_count: int, codec: int):
+        self.item_offset = item_offset
+        self.byte_offset = byte_offset
+        self.byte_length = byte_length
+        self.item_count = item_count
+        self.codec = codec
+
+    @property
+    def item_end(self) -> int:
+        return self.item_offset + self.item_count
+
+    @property
+    def byte_end(self) -> int:
+        return self.byte_offset + self.byte_length
+
+
+def _read_index(path: str) -> List[IndexEntry]:
+    """Read complete index entries; a torn trailing entry is ignored."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return []
+    usable = len(raw) - len(raw) % INDEX_ENTRY.size
+    return [IndexEntry(*fields) for fields in INDEX_ENTRY.iter_unpack(raw[:usable])]
+
+
+def _encode_frame(items: List[dict], level: int) -> tuple:
+    payload = "".join(
+        json.dumps(item, separators=(",", ":"), ensure_ascii=False) + "\n" for item in items
+    ).encode("utf-8")
+    return ZSTD, zstandard.ZstdCompressor(level=level).compress(payload)
+
+
+def _decode_frame(codec: int, frame) -> List[dict]:
+    if codec == ZSTD:
+        payload = zstandard.ZstdDecompressor().decompress(frame)
+    elif codec == IDENTITY:
+        payload = bytes(frame)
+    else:
+        raise ValueError(f"Unknown archive frame codec: {codec}")
+    return [json.loads(line) for line in payload.splitlines() if line]
+
+
+class ArchiveReader:
+    """Memory-mapped read access to one archived dataset."""
+
+    def __init__(self, data_path: str, index_path: str):
+        self.entries = _read_index(index_path)
+        self._starts = [entry.item_offset for entry in self.entries]
+        self._file = None
+        self._map = None
+        if self.entries:
+            self._file = open(data_path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), self.entries[-1].byte_end, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self.entries[-1].item_end if self.entries else 0
+
+    def _frame(self, entry: IndexEntry) -> List[dict]:
+        view = memoryview(self._map)[entry.byte_offset:entry.byte_end]
+        try:
+            return _decode_frame(entry.codec, view)
+        finally:
+            view.release()
+
+    def read(self, offset: int = 0, limit: Optional[int] = None) -> List[dict]:
+        """Items [offset, offset + limit), decoding only the frames they span."""
+        end = len(self) if limit is None else min(len(self), offset + limit)
+        items: List[dict] = []
+        position = max(0, bisect_right(self._starts, offset) - 1)
+        while position < len(self.entries) and self.entries[position].item_offset < end:
+            entry = self.entries[position]
+            frame = self._frame(entry)
+            items.extend(frame[max(0, offset - entry.item_offset):end - entry.item_offset])
+            position += 1
+        return items
+
+    def iter_frames(self) -> Iterator[List[dict]]:
+        """Every archived item, one appended page at a time."""
+        for entry in self.entries:
+            yield self._frame(entry)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+
+class DatasetArchive:
+    """
+    Archive of raw dataset items by Apify dataset ID. Without an explicit
+    directory, DATASET_ARCHIVE_DIR is read on use, so importing this module
+    needs no app settings.
+    """
+
+    def __init__(self, directory: Optional[str] = None, compression_level: int = 3):
+        self._directory = directory
+        self._compression_level = compression_level
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @property
+    def directory(self) -> Optional[str]:
+        return self._directory or get_settings().dataset_archive_dir
+
+    @property
+    def compression_level(self) -> int:
+        if self._directory:
+            return self._compression_level
+        return get_settings().dataset_archive_compression_level
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def _paths(self, dataset_id: str) -> tuple:
+        if not DATASET_ID_PATTERN.match(dataset_id):
+            raise ValueError(f"Invalid dataset ID: {dataset_id!r}")
+        base = os.path.join(self.directory, dataset_id)
+        return base + DATA_SUFFIX, base + INDEX_SUFFIX
+
+    def _lock(self, dataset_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(dataset_id, threading.Lock())
+
+    def append(self, dataset_id: str, offset: int, items: List[dict]) -> int:
+        """
+        Archive items read from the dataset at offset. Items already archived
+        are skipped, and a page past the archived end is not written (pages
+        must be contiguous). Returns the number of items written.
+        Blocking; call it through asyncio.to_thread from async code.
+        """
+        data_path, index_path = self._paths(dataset_id)
+        with self._lock(dataset_id):
+            entries = _read_index(index_path)
+            archived = entries[-1].item_end if entries else 0
+            byte_end = entries[-1].byte_end if entries else 0
+            if offset > archived:
+                logger.debug("Not archiving %s at %d: archive ends at %d", dataset_id, offset, archived)
+                return 0
+            items = items[archived - offset:]
+            if not items:
+                return 0
+
+            codec, frame = _encode_frame(items, self.compression_level)
+            os.makedirs(self.directory, exist_ok=True)
+            # Drop any torn frame or index entry left by an interrupted append
+            with open(data_path, "r+b" if os.path.exists(data_path) else "w+b") as f:
+                f.truncate(byte_end)
+                f.seek(byte_end)
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(index_path, "r+b" if os.path.exists(index_path) else "w+b") as f:
+                f.truncate(len(entries) * INDEX_ENTRY.size)
+                f.seek(0, os.SEEK_END)
+                f.write(INDEX_ENTRY.pack(archived, byte_end, len(frame), len(items), codec))
+                f.flush()
+                os.fsync(f.fileno())
+            return len(items)
+
+    def reader(self, dataset_id: str) -> ArchiveReader:
+        """Open an archived dataset for reading. Raises ValueError if it isn't archived."""
+        data_path, index_path = self._paths(dataset_id)
+        if not os.path.exists(index_path):
+            raise ValueError(f"Dataset {dataset_id} is not in the archive")
+        return ArchiveReader(data_path, index_path)
+
+    def read(self, dataset_id: str, offset: int = 0, limit: Optional[int] = None) -> tuple:
+        """Archived items [offset, offset + limit) and the archived item count."""
+        reader = self.reader(dataset_id)
+        try:
+            return reader.read(offset, limit), len(reader)
+        finally:
+            reader.close()
+
+    def datasets(self) -> List[dict]:
+        """Archived datasets with their item counts and sizes on disk."""
+        if not self.enabled or not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(INDEX_SUFFIX):
+                continue
+            dataset_id = name[:-len(INDEX_SUFFIX)]
+            data_path, index_path = self._paths(dataset_id)
+            entries = _read_index(index_path)
+            summaries.append({
+                "dataset_id": dataset_id,
+                "items": entries[-1].item_end if entries else 0,
+                "frames": len(entries),
+                "bytes": entries[-1].byte_end if entries else 0
+            })
+        return summaries
+
+
+# Singleton instance
+dataset_archive = DatasetArchive()
+
+
+# ============================================
+# Command Line
+# ============================================
+
+async def _replay(dataset_id: str, user_id: str) -> dict:
+    """Ingest an archived dataset for a user, continuing until the chunked run completes."""
+    from app.services.apify_service import apify_service
+    from app.services.job_fetcher_service import job_fetcher_service
+
+    apify_service.replay = True
+    result = await job_fetcher_service.fetch_from_existing_dataset(user_id=user_id, dataset_id=dataset_id)
+    while result["status"] == "running":
+        result = await job_fetcher_service.fetch_from_existing_dataset(
+            user_id=user_id, dataset_id=dataset_id, run_id=result["run_id"]
+        )
+    return result
+
+
+async def _dry_run(dataset_id: str) -> dict:
+    """Run the CPU side of ingest (validation, row mapping, text encoding) without a database."""
+    from datetime import datetime
+    from functools import partial
+    from app.executor import cpu_executor
+    from app.transforms import parse_items, prepare_jobs
+
+    settings = get_settings()
+    started = time.perf_counter()
+    reader = dataset_archive.reader(dataset_id)
+    items = jobs = rows = invalid = 0
+    prepare = partial(prepare_jobs, portal="linkedin", scraped_at=datetime.utcnow().isoformat())
+    try:
+        for frame in reader.iter_frames():
+            items += len(frame)
+            async for valid, errors in cpu_executor.map(
+                parse_items, frame, settings.cpu_executor_batch_size, auto_offload=True
+            ):
+                invalid += len(errors)
+                jobs += len(valid)
+                async for records, _ in cpu_executor.map(prepare, valid, settings.cpu_executor_batch_size):
+                    rows += len(records)
+    finally:
+        reader.close()
+    duration = time.perf_counter() - started
+    return {
+        "dataset_id": dataset_id,
+        "items": items,
+        "items_invalid": invalid,
+        "catalog_rows": rows,
+        "duration_s": round(duration, 3),
+        "items_per_s": round(items / duration, 1) if duration else None
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Archived Apify datasets")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List archived datasets")
+    replay = commands.add_parser("replay", help="Re-run ingest from an archived dataset")
+    replay.add_argument("dataset_id")
+    target = replay.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user-id", help="Store the jobs for this user, as sync-from-dataset does")
+    target.add_argument("--dry-run", action="store_true", help="Only parse and map the items; no database")
+    args = parser.parse_args(argv)
+
+    if not dataset_archive.enabled:
+        parser.error("DATASET_ARCHIVE_DIR is not set")
+    if args.command == "list":
+        result = dataset_archive.datasets()
+    elif args.dry_run:
+        result = asyncio.run(_dry_run(args.dataset_id))
+    else:
+        result = asyncio.run(_replay(args.dataset_id, args.user_id))
+    print(json.dumps(result, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
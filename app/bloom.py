@@ -0,0 +1,73 @@
+"""
+Job Fetcher Stack - Bloom Filter
+Compact, serializable set membership for a user's known (portal,
+external_job_id) keys. No false negatives; false positives at roughly
+the configured error rate until the filter is over capacity.
+"""
+from typing import Iterable
+import base64
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Bloom filter over strings using double hashing on one BLAKE2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01, bits: bytes = None, count: int = 0):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        size = (self.num_bits + 7) // 8
+        if bits is not None and len(bits) != size:
+            raise ValueError(f"Expected {size} bytes of filter bits, got {len(bits)}")
+        self.bits = bytearray(bits) if bits is not None else bytearray(size)
+        self.count = count
+        self.modified = False
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (first + i * second) % self.num_bits
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+        self.modified = True
+
+    def update(self, keys: Iterable[str]):
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def is_full(self) -> bool:
+        """Past capacity the false positive rate climbs; rebuild larger."""
+        return self.count >= self.capacity
+
+    def to_dict(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "item_count": self.count,
+            "bits": base64.b64encode(bytes(self.bits)).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BloomFilter":
+        return cls(
+            capacity=data["capacity"],
+            error_rate=data["error_rate"],
+            bits=base64.b64decode(data["bits"]),
+            count=data["item_count"]
+        )
+
+
+def job_key(portal: str, external_job_id: str) -> str:
+    """Filter key for a job."""
+    return f"{portal}:{external_job_id}"
@@ -0,0 +1,65 @@
+"""
+Job Fetcher Stack - Jobs List Cache
+Short-lived, per-instance cache of job list pages and their facet counts.
+A user's entries are dropped when this instance writes their jobs; writes
+on other instances show up once JOBS_CACHE_TTL_SECONDS has passed.
+"""
+from typing import Any, Dict, Hashable, Optional
+from collections import OrderedDict
+from app.config import get_settings
+from app.metrics import jobs_cache_lookups
+import time
+
+
+class TTLCache:
+    """LRU cache with per-entry expiry and O(1) invalidation of one user's entries."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # Bumped to invalidate a user; entries under older generations are never read again
+        self._generations: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _key(self, user_id: str, key: Hashable) -> tuple:
+        return user_id, self._generations.get(user_id, 0), key
+
+    def get(self, user_id: str, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry_key = self._key(user_id, key)
+        entry = self._entries.get(entry_key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[entry_key]
+            jobs_cache_lookups.inc(outcome="miss")
+            return None
+        self._entries.move_to_end(entry_key)
+        jobs_cache_lookups.inc(outcome="hit")
+        return entry[1]
+
+    def set(self, user_id: str, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+        entry_key = self._key(user_id, key)
+        self._entries[entry_key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: str):
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+        self._generations.clear()
+
+
+_settings = get_settings()
+
+# Singleton instance
+jobs_cache = TTLCache(_settings.jobs_cache_ttl_seconds, _settings.jobs_cache_max_entries)
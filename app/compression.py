@@ -0,0 +1,203 @@
+"""
+Job Fetcher Stack - Response Compression
+Negotiated gzip/brotli compression of API responses, and a payload budget
+that keeps responses under Lambda's 6 MB response limit.
+
+Compressed bodies are binary, so under Mangum they must go back to API
+Gateway base64-encoded. Mangum decides that from the content type alone
+and sends a compressed JSON body as text whenever the bytes happen to
+decode as UTF-8, which corrupts it; wrap the handler with
+base64_compressed_responses to always encode them. REST APIs also need
+BinaryMediaTypes set (see template.yaml) to decode them for the client.
+"""
+from typing import Callable, Optional
+from app.config import get_settings
+from app.metrics import http_response_bytes, http_responses_over_budget
+import asyncio
+import base64
+import gzip
+import json
+import logging
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+# Lambda's limit for a synchronous response, including the API Gateway envelope
+LAMBDA_RESPONSE_LIMIT = 6 * 1024 * 1024
+
+# Streams and already-compressed formats pass through untouched
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "application/gzip", "application/zip", "image/", "audio/", "video/")
+
+# Bodies at least this large are compressed on a worker thread, off the event loop
+THREAD_MIN_BYTES = 256 * 1024
+
+
+def _supported_encodings() -> tuple:
+    """Encodings this process can produce, preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    The content coding to use for an Accept-Encoding header, or None for
+    identity. Highest q-value wins; brotli is preferred on ties.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in _supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps output deterministic (cacheable, comparable across runs)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def wire_size(body_size: int, binary: bool) -> int:
+    """Bytes a body takes in the Lambda response: binary bodies travel base64-encoded."""
+    return 4 * ((body_size + 2) // 3) if binary else body_size
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing complete responses of at least
+    COMPRESSION_MINIMUM_SIZE bytes with the client's preferred coding.
+    Streaming responses (SSE, StreamingResponse) pass through unchanged.
+
+    Also enforces RESPONSE_PAYLOAD_BUDGET_BYTES on the response as it will
+    leave Lambda (base64-encoded when compressed): an over-budget response
+    is replaced with a 500 naming its size, instead of the opaque 502 API
+    Gateway returns when Lambda rejects it.
+    """
+
+    def __init__(self, app):
+        settings = get_settings()
+        self.app = app
+        self.enabled = settings.compression_enabled
+        self.minimum_size = settings.compression_minimum_size
+        self.gzip_level = settings.compression_gzip_level
+        self.brotli_quality = settings.compression_brotli_quality
+        self.budget_bytes = settings.response_payload_budget_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        if self.enabled:
+            for name, value in scope.get("headers", []):
+                if name == b"accept-encoding":
+                    encoding = negotiate_encoding(value.decode("latin-1"))
+                    break
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                if message.get("more_body", False):
+                    # Streaming: no complete body to compress or measure
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                else:
+                    await self._send_complete(scope, start_message, message.get("body", b""), encoding, send)
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_complete(self, scope, start_message: dict, body: bytes, encoding: Optional[str], send):
+        headers = [(name, value) for name, value in start_message.get("headers", [])]
+        header_names = {name.lower() for name, _ in headers}
+        content_type = next((value.decode("latin-1") for name, value in headers if name.lower() == b"content-type"), "")
+        compressible = (
+            b"content-encoding" not in header_names
+            and start_message["status"] not in (204, 206, 304)
+            and not content_type.startswith(EXCLUDED_CONTENT_TYPES)
+        )
+
+        coding = None
+        if compressible and len(body) >= self.minimum_size:
+            headers.append((b"vary", b"Accept-Encoding"))
+            if encoding:
+                if len(body) >= THREAD_MIN_BYTES:
+                    compressed = await asyncio.to_thread(
+                        compress, body, encoding, self.gzip_level, self.brotli_quality
+                    )
+                else:
+                    compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                if len(compressed) < len(body):
+                    body, coding = compressed, encoding
+                    headers = [(name, value) for name, value in headers if name.lower() != b"content-length"]
+                    headers.append((b"content-encoding", encoding.encode()))
+                    headers.append((b"content-length", str(len(body)).encode()))
+
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        size = wire_size(len(body), binary=coding is not None)
+        http_response_bytes.observe(size, route=route, encoding=coding or "identity")
+        if size > self.budget_bytes:
+            http_responses_over_budget.inc(route=route)
+            logger.warning("Response for %s is %d bytes, over the %d byte payload budget", route, size, self.budget_bytes)
+            body = json.dumps({
+                "detail": f"Response too large: {size} bytes exceeds the {self.budget_bytes} byte payload budget"
+            }).encode()
+            start_message = {"type": "http.response.start", "status": 500}
+            # Keep CORS and Vary so a browser can still read the error; replace only the body's headers
+            headers = [
+                (name, value) for name, value in headers
+                if name.lower() not in (b"content-type", b"content-length", b"content-encoding")
+            ]
+            headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def base64_compressed_responses(handler: Callable) -> Callable:
+    """
+    Wrap a Mangum handler so responses with a Content-Encoding are always
+    base64-encoded. Mangum sent them as text only when the bytes decoded as
+    UTF-8, so encoding that text again restores the original bytes.
+    """
+    def wrapped(event, context):
+        response = handler(event, context)
+        headers = response.get("headers") or {}
+        multi_value_headers = response.get("multiValueHeaders") or {}
+        encoded = "content-encoding" in headers or "content-encoding" in multi_value_headers
+        if encoded and not response.get("isBase64Encoded") and response.get("body"):
+            response["body"] = base64.b64encode(response["body"].encode()).decode()
+            response["isBase64Encoded"] = True
+        return response
+
+    return wrapped
@@ -3,6 +3,7 @@ Job Fetcher Stack - Configuration
 """
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -13,14 +14,126 @@ class Settings(BaseSettings):
     supabase_key: str
     supabase_service_key: str
     
+    # Database backend: postgrest (supabase-py), or asyncpg for the hot
+    # read paths over a direct connection pool (needs `asyncpg`)
+    database_backend: str = "postgrest"
+    database_url: Optional[str] = None  # Postgres DSN for the asyncpg backend
+    database_pool_min_size: int = 1
+    database_pool_max_size: int = 10
+    database_statement_cache_size: int = 100  # Prepared statements per connection; 0 behind a transaction pooler
+    
+    # Jobs list cache (list pages and facet counts, per instance)
+    jobs_cache_ttl_seconds: float = 15.0  # 0 disables
+    jobs_cache_max_entries: int = 2000
+    
     # Apify
     apify_api_token: str
     apify_actor_id: str = "bebity~linkedin-jobs-scraper"
+    apify_base_url: str = "https://api.apify.com/v2"  # Override to point at a mock (benchmarks)
     
     # JWT
     jwt_secret: str
     jwt_algorithm: str = "HS256"
     
+    # Fetch runs
+    stale_run_minutes: int = 60  # Runs still marked running after this long are treated as abandoned
+    
+    # Fetch run progress stream (SSE)
+    sse_poll_interval: float = 5.0  # DB poll interval when the run is on another instance
+    sse_keepalive_seconds: float = 15.0
+    
+    # Scheduler (recurring saved-search syncs)
+    scheduler_tick_seconds: int = 300
+    scheduler_max_concurrency: int = 3  # Apify actor runs in flight across the platform
+    scheduler_max_runs_per_tick: int = 20  # Also capped by free concurrency slots: one wave of runs per tick
+    scheduler_rows_budget_per_tick: int = 1000  # Total Apify rows requested per tick
+    scheduler_spread_seconds: int = 60  # Random start delay spread within a tick
+    scheduler_jitter_fraction: float = 0.1  # +/- fraction of the interval added to next_sync_at
+    
+    # Upstream resilience (rate limits, retries, circuit breaker)
+    apify_rate_per_second: float = 5.0
+    apify_burst: float = 10.0
+    supabase_rate_per_second: float = 50.0
+    supabase_burst: float = 100.0
+    retry_max_attempts: int = 4
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 10.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+    
+    # Sync admission control (per user, per instance)
+    admission_max_concurrent_per_user: int = 2
+    admission_rate_per_minute: float = 6.0
+    admission_burst: int = 3
+    admission_global_concurrency: int = 10  # Syncs in flight on this instance, shared fairly across users
+    admission_queue_timeout: float = 5.0  # Seconds a request may wait for a global slot
+    admission_retry_after: int = 30
+    
+    # Sharded syncs (large scrapes split into parallel actor runs)
+    shard_rows_per_run: int = 100  # Rows requested from each shard's actor run
+    shard_max_shards: int = 20
+    shard_max_concurrency: int = 4  # Default shard actor runs in flight per sharded sync
+    
+    # Batch syncs (many searches merged into shared actor runs)
+    batch_max_rows_per_run: int = 100  # Row budget of one merged actor run
+    batch_max_concurrency: int = 4  # Merged actor runs in flight per batch sync
+    
+    # Dataset ingest (sync-from-dataset)
+    dataset_chunk_size: int = 500  # Dataset items read and stored per checkpoint
+    dataset_ingest_budget_seconds: float = 240.0  # Per invocation; stays under the 300s Lambda timeout
+    dataset_run_lease_seconds: int = 300  # Renewed every chunk; a crashed invocation's run frees up after this
+    
+    # Dataset archive (raw dataset items kept locally for offline replay)
+    dataset_archive_dir: Optional[str] = None  # Unset: downloaded datasets are not archived
+    dataset_archive_compression_level: int = 3
+    dataset_replay: bool = False  # Dataset ingest reads from the archive instead of Apify; live syncs still download
+    
+    # CPU-heavy ingest transforms (validation, row mapping, text encoding)
+    cpu_executor: str = "auto"  # auto | process | thread | inline
+    cpu_executor_workers: Optional[int] = None  # Default: os.cpu_count()
+    cpu_executor_min_items: int = 200  # process/thread: smaller workloads run inline; IPC would cost more than it saves
+    cpu_executor_auto_min_items: int = 5000  # auto: only validation of pages this large is offloaded
+    cpu_executor_batch_size: int = 100  # Items per task sent to a worker
+    
+    # New-job detection (per-user Bloom filter of known job keys)
+    known_jobs_filter_error_rate: float = 0.01  # False positives just cost a batched lookup
+    known_jobs_filter_min_capacity: int = 10000  # Rebuilt at twice the user's job count when full
+    
+    # Job Text Storage
+    description_compression: bool = True  # zstd-compress stored descriptions; every instance needs `zstandard` to read them
+    description_compression_level: int = 3
+    
+    # Job Expiry & Archival
+    expiry_max_age_days: int = 45  # Expire open jobs posted longer ago than this
+    expiry_missing_days: int = 14  # Expire open jobs absent from the user's scrapes this long
+    archive_after_days: int = 30  # Archive expired/skipped jobs untouched this long
+    expiry_batch_size: int = 1000
+    expiry_max_batches: int = 50  # Per run, for each of expiry and archival
+    
+    # Apply queue (queued jobs leased to auto-apply workers)
+    apply_queue_lease_seconds: int = 300  # Default lease; an unacked job is claimable again after it
+    apply_queue_max_lease_seconds: int = 3600
+    
+    # Response compression and payload budget
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # Smaller bodies are sent uncompressed
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4  # Used when `brotli` is installed and the client accepts br
+    response_payload_budget_bytes: int = 5_500_000  # Under Lambda's 6 MB limit, leaving room for headers and envelope
+    
+    # Metrics
+    metrics_emf_enabled: bool = False  # Write CloudWatch EMF records to stdout (Lambda)
+    metrics_namespace: str = "JobFetcherStack"
+    slow_request_threshold_ms: float = 1000.0  # Log requests slower than this with their query params
+    
+    # Profiling (sampled stack profiles of requests and fetch runs)
+    profiling_enabled: bool = False  # Profile every profilable request; admins can also send X-Profile: true
+    profile_interval_ms: float = 5.0
+    profile_output_dir: str = "/tmp/profiles"  # /tmp is the only writable path on Lambda
+    profile_s3_bucket: Optional[str] = None  # When set, profiles go to S3 instead of local disk
+    profile_s3_prefix: str = "profiles/"
+    profile_s3_endpoint_url: Optional[str] = None  # For S3-compatible storage (MinIO, R2, ...)
+    
     # Development Mode
     dev_mode: bool = False
     
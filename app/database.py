@@ -2,15 +2,44 @@
 Job Fetcher Stack - Database Service
 """
 from supabase import create_client, Client
+from postgrest.types import ReturnMethod
 from app.config import get_settings
 from app.models import (
     FetchRunStatus, JobStatus, FetchedJobResponse, 
     FetchRunResponse, ApifyJobResult
 )
-from typing import Optional, List, Tuple
+from app.bloom import BloomFilter, job_key
+from app.cache import jobs_cache
+from app.metrics import record_db_call
+from app.resilience import supabase_guard
+from app.text_codec import decode_text
+from app.transforms import external_job_id_for
+from typing import Dict, Optional, List, Tuple
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import OrderedDict
+import asyncio
 import math
+import time
+
+
+# Columns returned by job lists; description/benefits text is only loaded for a single job
+JOB_LIST_COLUMNS = (
+    "id, portal, external_job_id, title, company, company_url, location, salary_text, "
+    "job_url, apply_url, apply_type, contract_type, experience_level, work_type, sector, "
+    "applications_count, posted_at, posted_time_text, fetched_at, match_score, status, "
+    "created_at, updated_at"
+)
+
+# Dimensions get_job_facets can count, and the most values returned per dimension
+FACET_DIMENSIONS = ("portal", "status", "work_type", "experience_level", "location", "company")
+FACET_VALUE_LIMIT = 50
+
+# Hashes known to be in job_descriptions, to skip redundant upserts
+KNOWN_TEXT_HASHES_LIMIT = 10000
+
+# Rows per request when rebuilding a known-jobs filter (PostgREST's default max-rows)
+KNOWN_FILTER_PAGE_SIZE = 1000
 
 
 class DatabaseService:
@@ -23,6 +52,18 @@ class DatabaseService:
             settings.supabase_url,
             settings.supabase_service_key
         )
+        self._known_text_hashes: "OrderedDict[str, None]" = OrderedDict()
+    
+    async def _execute(self, query, idempotent: bool = True):
+        """
+        Execute a PostgREST query through the Supabase rate limiter,
+        retry policy and circuit breaker.
+        """
+        start = time.perf_counter()
+        try:
+            return await supabase_guard.call(query.execute, idempotent=idempotent)
+        finally:
+            record_db_call(time.perf_counter() - start)
     
     # ============================================
     # Job Fetch Runs
@@ -32,26 +73,63 @@ class DatabaseService:
         self, 
         user_id: str, 
         portal: str,
-        input_params: dict
+        input_params: dict,
+        saved_search_id: Optional[str] = None,
+        checkpoint: Optional[dict] = None,
+        parent_run_id: Optional[str] = None,
+        shard: Optional[dict] = None
     ) -> dict:
-        """Create a new fetch run record."""
-        result = self.client.table("job_fetch_runs").insert({
+        """Create a new fetch run record (a shard's child run when parent_run_id is set)."""
+        run_record = {
             "user_id": user_id,
             "portal": portal,
             "status": FetchRunStatus.RUNNING.value,
             "input_params": input_params
-        }).execute()
+        }
+        if saved_search_id:
+            run_record["saved_search_id"] = saved_search_id
+        if checkpoint:
+            run_record["checkpoint"] = checkpoint
+        if parent_run_id:
+            run_record["parent_run_id"] = parent_run_id
+            run_record["shard"] = shard
+        
+        result = await self._execute(self.client.table("job_fetch_runs").insert(run_record), idempotent=False)
         return result.data[0] if result.data else None
     
+    async def create_fetch_runs(self, user_id: str, portal: str, runs: List[dict]) -> List[dict]:
+        """
+        Create several fetch run records in one insert. Each of runs has
+        input_params and optionally saved_search_id. Returns them in order.
+        """
+        run_records = [
+            {
+                "user_id": user_id,
+                "portal": portal,
+                "status": FetchRunStatus.RUNNING.value,
+                "input_params": run["input_params"],
+                "saved_search_id": run.get("saved_search_id")
+            }
+            for run in runs
+        ]
+        result = await self._execute(self.client.table("job_fetch_runs").insert(run_records), idempotent=False)
+        return result.data or []
+    
     async def update_fetch_run(
         self,
         run_id: str,
         status: FetchRunStatus,
         jobs_found: int = 0,
         new_jobs_added: int = 0,
-        errors_json: dict = None
+        errors_json: dict = None,
+        stage_timings: dict = None,
+        user_id: Optional[str] = None,
+        checkpoint: dict = None
     ) -> dict:
-        """Update a fetch run with results."""
+        """
+        Update a fetch run with results.
+        Pass user_id so the update only touches that user's partition.
+        """
         update_data = {
             "status": status.value,
             "jobs_found": jobs_found,
@@ -60,25 +138,88 @@ class DatabaseService:
         }
         if errors_json:
             update_data["errors_json"] = errors_json
-            
-        result = self.client.table("job_fetch_runs").update(
-            update_data
-        ).eq("id", run_id).execute()
+        if stage_timings:
+            update_data["stage_timings"] = stage_timings
+        if checkpoint:
+            update_data["checkpoint"] = checkpoint
+        
+        query = self.client.table("job_fetch_runs").update(update_data).eq("id", run_id)
+        if user_id:
+            query = query.eq("user_id", user_id)
+        result = await self._execute(query)
         return result.data[0] if result.data else None
     
+    async def acquire_fetch_run_lease(
+        self,
+        run_id: str,
+        user_id: str,
+        lease_id: str,
+        offset: int,
+        lease_seconds: int
+    ) -> bool:
+        """
+        Take or renew the lease on a dataset run for lease_seconds. Only
+        applies if the run is free, its lease has expired or is lease_id
+        already, and its checkpoint is still at offset, so a caller holding
+        the lease knows no one else has moved the run. Returns whether it applied.
+        """
+        now = datetime.utcnow()
+        result = await self._execute(self.client.table("job_fetch_runs").update({
+            "lease_id": lease_id,
+            "lease_expires_at": (now + timedelta(seconds=lease_seconds)).isoformat()
+        }).eq("id", run_id).eq("user_id", user_id).eq("checkpoint->>offset", str(offset)).or_(
+            f"lease_id.is.null,lease_id.eq.{lease_id},lease_expires_at.lt.{now.isoformat()}"
+        ))
+        return bool(result.data)
+    
+    async def release_fetch_run_lease(self, run_id: str, user_id: str, lease_id: str):
+        """Give up a dataset run's lease, if still held, so the next resume needn't wait for it to expire."""
+        await self._execute(self.client.table("job_fetch_runs").update({
+            "lease_id": None,
+            "lease_expires_at": None
+        }).eq("id", run_id).eq("user_id", user_id).eq("lease_id", lease_id))
+    
+    async def save_fetch_run_checkpoint(
+        self,
+        run_id: str,
+        user_id: str,
+        checkpoint: dict,
+        lease_id: str
+    ) -> bool:
+        """
+        Record ingest progress on a running fetch run. Only applies while
+        the caller still holds lease_id. Returns whether it applied.
+        """
+        result = await self._execute(self.client.table("job_fetch_runs").update({
+            "status": FetchRunStatus.RUNNING.value,
+            "checkpoint": checkpoint,
+            "jobs_found": checkpoint["jobs_found"],
+            "new_jobs_added": checkpoint["new_jobs_added"]
+        }).eq("id", run_id).eq("user_id", user_id).eq("lease_id", lease_id))
+        return bool(result.data)
+    
     async def get_fetch_runs(
         self,
         user_id: str,
         portal: Optional[str] = None,
         status: Optional[str] = None,
         page: int = 1,
-        page_size: int = 20
+        page_size: int = 20,
+        parent_run_id: Optional[str] = None
     ) -> Tuple[List[dict], int]:
-        """Get paginated fetch runs for a user."""
+        """
+        Get paginated fetch runs for a user: top-level runs, or the shard
+        runs of parent_run_id when given.
+        """
         query = self.client.table("job_fetch_runs").select(
             "*", count="exact"
         ).eq("user_id", user_id)
         
+        if parent_run_id:
+            query = query.eq("parent_run_id", parent_run_id)
+        else:
+            query = query.is_("parent_run_id", "null")
+        
         if portal:
             query = query.eq("portal", portal)
         if status:
@@ -88,81 +229,209 @@ class DatabaseService:
         offset = (page - 1) * page_size
         query = query.order("started_at", desc=True).range(offset, offset + page_size - 1)
         
-        result = query.execute()
+        result = await self._execute(query)
         return result.data, result.count or 0
     
+    async def get_fetch_run(self, user_id: str, run_id: str) -> Optional[dict]:
+        """Get a single fetch run by ID."""
+        result = await self._execute(self.client.table("job_fetch_runs").select("*").eq(
+            "id", run_id
+        ).eq("user_id", user_id))
+        return result.data[0] if result.data else None
+    
+    # ============================================
+    # Saved Searches
+    # ============================================
+    
+    async def create_saved_search(self, user_id: str, search_data: dict) -> dict:
+        """Create a saved search for a user."""
+        result = await self._execute(self.client.table("saved_searches").insert({
+            "user_id": user_id,
+            **search_data
+        }), idempotent=False)
+        return result.data[0] if result.data else None
+    
+    async def get_saved_searches(
+        self,
+        user_id: str,
+        page: int = 1,
+        page_size: int = 20
+    ) -> Tuple[List[dict], int]:
+        """Get paginated saved searches for a user."""
+        offset = (page - 1) * page_size
+        result = await self._execute(self.client.table("saved_searches").select(
+            "*", count="exact"
+        ).eq("user_id", user_id).order(
+            "created_at", desc=True
+        ).range(offset, offset + page_size - 1))
+        return result.data, result.count or 0
+    
+    async def get_saved_search(self, user_id: str, search_id: str) -> Optional[dict]:
+        """Get a single saved search by ID."""
+        result = await self._execute(self.client.table("saved_searches").select("*").eq(
+            "id", search_id
+        ).eq("user_id", user_id))
+        return result.data[0] if result.data else None
+    
+    async def get_saved_searches_by_id(self, user_id: str, search_ids: List[str]) -> List[dict]:
+        """Get a user's saved searches by ID in one query; unknown IDs are left out."""
+        result = await self._execute(self.client.table("saved_searches").select("*").eq(
+            "user_id", user_id
+        ).in_("id", search_ids))
+        return result.data
+    
+    async def delete_saved_search(self, user_id: str, search_id: str) -> Optional[dict]:
+        """Delete a saved search."""
+        result = await self._execute(self.client.table("saved_searches").delete().eq(
+            "id", search_id
+        ).eq("user_id", user_id))
+        return result.data[0] if result.data else None
+    
+    async def update_saved_search_watermark(
+        self,
+        search_id: str,
+        run_id: str,
+        high_water_posted_at: Optional[str],
+        high_water_job_ids: List[str]
+    ) -> Optional[dict]:
+        """Advance a saved search's high-water mark after a successful sync."""
+        result = await self._execute(self.client.table("saved_searches").update({
+            "high_water_posted_at": high_water_posted_at,
+            "high_water_job_ids": high_water_job_ids,
+            "last_synced_at": datetime.utcnow().isoformat(),
+            "last_run_id": run_id
+        }).eq("id", search_id))
+        return result.data[0] if result.data else None
+    
+    async def get_due_saved_searches(self, limit: int = 50) -> List[dict]:
+        """Get active saved searches whose next sync time has passed, oldest first."""
+        now = datetime.utcnow().isoformat()
+        result = await self._execute(self.client.table("saved_searches").select("*").eq(
+            "is_active", True
+        ).or_(
+            f"next_sync_at.is.null,next_sync_at.lte.{now}"
+        ).order("next_sync_at", desc=False, nullsfirst=True).limit(limit))
+        return result.data
+    
+    async def claim_saved_search(
+        self,
+        search_id: str,
+        previous_next_sync_at: Optional[str],
+        next_sync_at: str
+    ) -> bool:
+        """
+        Move a due search's next_sync_at forward, only if no other scheduler
+        has done so already. Returns True if this caller claimed it.
+        """
+        query = self.client.table("saved_searches").update({
+            "next_sync_at": next_sync_at
+        }).eq("id", search_id)
+        
+        if previous_next_sync_at:
+            query = query.eq("next_sync_at", previous_next_sync_at)
+        else:
+            query = query.is_("next_sync_at", "null")
+        
+        result = await self._execute(query)
+        return bool(result.data)
+    
+    async def count_running_fetch_runs(
+        self,
+        user_id: Optional[str] = None,
+        started_after: Optional[datetime] = None
+    ) -> int:
+        """
+        Count fetch runs currently in the running state, optionally for one user.
+        started_after excludes runs abandoned in the running state by a crashed worker.
+        """
+        query = self.client.table("job_fetch_runs").select(
+            "id", count="exact"
+        ).eq("status", FetchRunStatus.RUNNING.value)
+        
+        if user_id:
+            query = query.eq("user_id", user_id)
+        if started_after:
+            query = query.gte("started_at", started_after.isoformat())
+        
+        result = await self._execute(query.limit(1))
+        return result.count or 0
+    
     # ============================================
     # Fetched Jobs
     # ============================================
     
-    async def upsert_job(
+    async def upsert_jobs(
         self,
         user_id: str,
         fetch_run_id: str,
-        job_data: ApifyJobResult,
-        portal: str = "linkedin"
-    ) -> Tuple[dict, bool]:
+        prepared: Tuple[Dict[str, dict], Dict[str, dict]],
+        portal: str = "linkedin",
+        known: Optional[BloomFilter] = None
+    ) -> int:
         """
-        Insert or update a job. Returns (job_record, is_new).
-        Uses external_job_id + user_id + portal as unique key.
+        Store a batch of scraped jobs and link them to the user. Returns how
+        many links are new. prepared is app.transforms.prepare_jobs output:
+        (catalog rows by external_job_id, job_descriptions rows by hash).
+        
+        Postings are upserted into the shared jobs catalog in one call. known,
+        the user's filter of (portal, external_job_id) keys, splits them into
+        definitely new links, which are inserted directly, and possible matches,
+        which are checked with one batched lookup; new keys are added to it.
+        The insert ignores duplicates, so a stale filter only costs an extra update.
         """
-        # Extract job ID from LinkedIn URL
-        external_job_id = self._extract_linkedin_job_id(job_data.jobUrl)
+        now = datetime.utcnow().isoformat()
+        records, text_rows = prepared
+        if not records:
+            return 0
         
-        # Parse salary
-        lpa_min, lpa_max = self._parse_salary(job_data.salary)
+        await self._store_texts(text_rows)
+        catalog = await self._execute(self.client.table("jobs").upsert(
+            list(records.values()), on_conflict="portal,external_job_id"
+        ))
+        job_ids = {row["external_job_id"]: row["id"] for row in catalog.data}
         
-        # Parse published date
-        posted_at = None
-        if job_data.publishedAt:
-            try:
-                posted_at = job_data.publishedAt
-            except:
-                pass
+        # Only keys the filter may have seen need an existence check
+        possible = [
+            job_id for external_job_id, job_id in job_ids.items()
+            if known is None or job_key(portal, external_job_id) in known
+        ]
+        existing = set()
+        if possible:
+            result = await self._execute(self.client.table("user_jobs").select("job_id").eq(
+                "user_id", user_id
+            ).in_("job_id", possible))
+            existing = {row["job_id"] for row in result.data}
         
-        job_record = {
-            "user_id": user_id,
-            "fetch_run_id": fetch_run_id,
-            "portal": portal,
-            "external_job_id": external_job_id,
-            "title": job_data.title,
-            "company": job_data.companyName,
-            "company_id": job_data.companyId,
-            "company_url": job_data.companyUrl,
-            "location": job_data.location,
-            "lpa_min": lpa_min,
-            "lpa_max": lpa_max,
-            "salary_text": job_data.salary,
-            "job_url": job_data.jobUrl,
-            "apply_url": job_data.applyUrl,
-            "apply_type": job_data.applyType,
-            "description": job_data.description,
-            "contract_type": job_data.contractType,
-            "experience_level": job_data.experienceLevel,
-            "work_type": job_data.workType,
-            "sector": job_data.sector,
-            "benefits": job_data.benefits,
-            "applications_count": job_data.applicationsCount,
-            "posted_at": posted_at,
-            "posted_time_text": job_data.postedTime,
-        }
+        new_ids = [job_id for job_id in job_ids.values() if job_id not in existing]
+        inserted = set()
+        if new_ids:
+            result = await self._execute(self.client.table("user_jobs").upsert([
+                {
+                    "user_id": user_id,
+                    "job_id": job_id,
+                    "portal": portal,
+                    "fetch_run_id": fetch_run_id,
+                    "last_seen_at": now
+                }
+                for job_id in new_ids
+            ], on_conflict="user_id,job_id", ignore_duplicates=True))
+            inserted = {row["job_id"] for row in result.data}
         
-        # Check if job already exists
-        existing = self.client.table("fetched_jobs").select("id").eq(
-            "user_id", user_id
-        ).eq("portal", portal).eq("external_job_id", external_job_id).execute()
+        # Existing links: refresh run and last-seen (but don't change status)
+        seen_ids = [job_id for job_id in job_ids.values() if job_id not in inserted]
+        if seen_ids:
+            await self._execute(self.client.table("user_jobs").update({
+                "fetch_run_id": fetch_run_id,
+                "last_seen_at": now
+            }, returning=ReturnMethod.minimal).eq("user_id", user_id).in_("job_id", seen_ids))
         
-        if existing.data:
-            # Update existing (but don't change status)
-            job_record.pop("user_id")  # Don't update user_id
-            result = self.client.table("fetched_jobs").update(
-                job_record
-            ).eq("id", existing.data[0]["id"]).execute()
-            return result.data[0] if result.data else None, False
-        else:
-            # Insert new
-            result = self.client.table("fetched_jobs").insert(job_record).execute()
-            return result.data[0] if result.data else None, True
+        if known is not None:
+            known.update(
+                job_key(portal, external_job_id) for external_job_id, job_id in job_ids.items()
+                if job_id in inserted
+            )
+        jobs_cache.invalidate_user(user_id)
+        return len(inserted)
     
     async def get_jobs(
         self,
@@ -176,17 +445,23 @@ class DatabaseService:
         page: int = 1,
         page_size: int = 20,
         sort: str = "fetched_at",
-        sort_desc: bool = True
+        sort_desc: bool = True,
+        work_type: Optional[List[str]] = None,
+        experience_level: Optional[List[str]] = None
     ) -> Tuple[List[dict], int]:
-        """Get paginated jobs for a user."""
+        """Get paginated jobs for a user (without description text)."""
         query = self.client.table("fetched_jobs").select(
-            "*", count="exact"
+            JOB_LIST_COLUMNS, count="exact"
         ).eq("user_id", user_id)
         
         if portal:
             query = query.in_("portal", portal)
         if status:
             query = query.in_("status", status)
+        if work_type:
+            query = query.in_("work_type", work_type)
+        if experience_level:
+            query = query.in_("experience_level", experience_level)
         if location:
             query = query.ilike("location", f"%{location}%")
         if min_lpa:
@@ -204,15 +479,106 @@ class DatabaseService:
         offset = (page - 1) * page_size
         query = query.range(offset, offset + page_size - 1)
         
-        result = query.execute()
+        result = await self._execute(query)
         return result.data, result.count or 0
     
+    async def get_job_facets(
+        self,
+        user_id: str,
+        dimensions: List[str],
+        portal: Optional[List[str]] = None,
+        status: Optional[List[str]] = None,
+        location: Optional[str] = None,
+        min_lpa: Optional[float] = None,
+        company: Optional[str] = None,
+        q: Optional[str] = None,
+        work_type: Optional[List[str]] = None,
+        experience_level: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Job counts per value of each of dimensions (see FACET_DIMENSIONS)
+        under the get_jobs filters, from one aggregate (the job_facets SQL
+        function). Each dimension ignores its own filter, so unselected
+        values keep their counts. Most common values first, up to
+        FACET_VALUE_LIMIT per dimension.
+        """
+        result = await self._execute(self.client.rpc("job_facets", {
+            "p_user_id": user_id,
+            "p_dimensions": list(dimensions),
+            "p_portal": portal or None,
+            "p_status": status or None,
+            "p_work_type": work_type or None,
+            "p_experience_level": experience_level or None,
+            "p_location": location or None,
+            "p_company": company or None,
+            "p_min_lpa": min_lpa or None,
+            "p_q": q or None,
+            "p_limit": FACET_VALUE_LIMIT
+        }))
+        return self._facets(dimensions, result.data or [])
+    
+    def _facets(self, dimensions: List[str], rows: List[dict]) -> Dict[str, Dict[str, int]]:
+        """job_facets rows as {dimension: {value: count}}, with every requested dimension present."""
+        facets: Dict[str, Dict[str, int]] = {dimension: {} for dimension in dimensions}
+        for row in rows:
+            facets[row["dimension"]][row["value"]] = row["job_count"]
+        return facets
+    
+    async def list_jobs(
+        self,
+        user_id: str,
+        facets: Optional[List[str]] = None,
+        page: int = 1,
+        page_size: int = 20,
+        sort: str = "fetched_at",
+        sort_desc: bool = True,
+        **filters
+    ) -> Tuple[List[dict], int, Optional[Dict[str, Dict[str, int]]]]:
+        """
+        A jobs page, its total and (if facets are requested) facet counts for
+        the same filters, fetched concurrently and kept in jobs_cache. filters
+        are the get_jobs filters.
+        """
+        cache_key = (
+            "list",
+            tuple(sorted(
+                (name, tuple(value) if isinstance(value, list) else value)
+                for name, value in filters.items() if value
+            )),
+            tuple(facets or ()), page, page_size, sort, sort_desc
+        )
+        cached = jobs_cache.get(user_id, cache_key)
+        if cached is not None:
+            return cached
+        
+        page_query = self.get_jobs(
+            user_id, page=page, page_size=page_size, sort=sort, sort_desc=sort_desc, **filters
+        )
+        if facets:
+            (jobs, total), counts = await asyncio.gather(
+                page_query, self.get_job_facets(user_id, facets, **filters)
+            )
+        else:
+            (jobs, total), counts = await page_query, None
+        
+        jobs_cache.set(user_id, cache_key, (jobs, total, counts))
+        return jobs, total, counts
+    
     async def get_job_by_id(self, user_id: str, job_id: str) -> Optional[dict]:
-        """Get a single job by ID."""
-        result = self.client.table("fetched_jobs").select("*").eq(
+        """Get a single job by ID, with its description and benefits text."""
+        result = await self._execute(self.client.table("fetched_jobs").select("*").eq(
             "id", job_id
-        ).eq("user_id", user_id).execute()
-        return result.data[0] if result.data else None
+        ).eq("user_id", user_id))
+        if not result.data:
+            return None
+        
+        job = result.data[0]
+        texts = await self._load_texts([job.get("description_hash"), job.get("benefits_hash")])
+        if job.get("description_hash"):
+            job["description"] = texts.get(job["description_hash"])
+        if job.get("benefits_hash"):
+            job["benefits"] = texts.get(job["benefits_hash"])
+        return job
     
     async def update_job_status(
         self, 
@@ -221,51 +587,243 @@ class DatabaseService:
         status: JobStatus
     ) -> Optional[dict]:
         """Update job status."""
-        result = self.client.table("fetched_jobs").update({
+        result = await self._execute(self.client.table("user_jobs").update({
             "status": status.value
-        }).eq("id", job_id).eq("user_id", user_id).execute()
+        }).eq("id", job_id).eq("user_id", user_id))
+        jobs_cache.invalidate_user(user_id)
         return result.data[0] if result.data else None
     
+    async def get_job_stats(self, user_id: str) -> dict:
+        """
+        Job counters from the trigger-maintained stats tables: totals by status
+        and portal plus jobs added today (UTC). Cost does not grow with the backlog.
+        """
+        stats = await self._execute(self.client.table("user_job_stats").select(
+            "portal, status, job_count"
+        ).eq("user_id", user_id))
+        today = await self._execute(self.client.table("user_job_daily_stats").select(
+            "jobs_added"
+        ).eq("user_id", user_id).eq("day", datetime.utcnow().date().isoformat()))
+        return self._job_stats(stats.data, today.data[0]["jobs_added"] if today.data else 0)
+    
+    def _job_stats(self, stats_rows: List[dict], new_today: int) -> dict:
+        """Job stats response from user_job_stats rows and today's added count."""
+        by_status: dict = {}
+        by_portal: dict = {}
+        for row in stats_rows:
+            count = row["job_count"]
+            if count:
+                by_status[row["status"]] = by_status.get(row["status"], 0) + count
+                by_portal[row["portal"]] = by_portal.get(row["portal"], 0) + count
+        
+        return {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_portal": by_portal,
+            "new_today": new_today
+        }
+    
     # ============================================
-    # Helper Methods
+    # Job Text (content-addressed)
     # ============================================
     
-    def _extract_linkedin_job_id(self, job_url: str) -> str:
-        """Extract job ID from LinkedIn URL."""
-        # URL format: https://www.linkedin.com/jobs/view/{job_id}?...
-        try:
-            if "/jobs/view/" in job_url:
-                # Get the part after /view/
-                parts = job_url.split("/jobs/view/")[1]
-                # Remove query params and trailing parts
-                job_id = parts.split("?")[0].split("-")[-1]
-                return job_id
-        except:
-            pass
-        return job_url  # Fallback to full URL
-    
-    def _parse_salary(self, salary_text: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
-        """Parse salary text into min/max values (in LPA for India, or yearly for US)."""
-        if not salary_text:
-            return None, None
+    async def _store_texts(self, text_rows: Dict[str, dict]):
+        """Store job_descriptions rows (keyed by hash) not already known to be stored, in one call."""
+        pending = []
+        for text_hash, row in text_rows.items():
+            if text_hash in self._known_text_hashes:
+                self._known_text_hashes.move_to_end(text_hash)
+            else:
+                pending.append(row)
+        if not pending:
+            return
         
-        try:
-            # Handle US format: $69,000.00/yr - $96,500.00/yr
-            if "$" in salary_text:
-                import re
-                numbers = re.findall(r'\$([\d,]+(?:\.\d+)?)', salary_text)
-                if len(numbers) >= 2:
-                    min_val = float(numbers[0].replace(",", "")) / 100000  # Convert to Lakhs
-                    max_val = float(numbers[1].replace(",", "")) / 100000
-                    return min_val, max_val
-                elif len(numbers) == 1:
-                    val = float(numbers[0].replace(",", "")) / 100000
-                    return val, val
-        except:
-            pass
+        await self._execute(self.client.table("job_descriptions").upsert(
+            pending, on_conflict="hash", ignore_duplicates=True, returning=ReturnMethod.minimal
+        ))
+        for row in pending:
+            self._known_text_hashes[row["hash"]] = None
+        while len(self._known_text_hashes) > KNOWN_TEXT_HASHES_LIMIT:
+            self._known_text_hashes.popitem(last=False)
+    
+    async def _load_texts(self, hashes: List[Optional[str]]) -> dict:
+        """Decoded texts for the given hashes, keyed by hash."""
+        hashes = list({text_hash for text_hash in hashes if text_hash})
+        if not hashes:
+            return {}
+        result = await self._execute(self.client.table("job_descriptions").select(
+            "hash, encoding, body"
+        ).in_("hash", hashes))
+        return {row["hash"]: decode_text(row["encoding"], row["body"]) for row in result.data}
+    
+    # ============================================
+    # Known-Jobs Filter
+    # ============================================
+    
+    async def load_known_jobs_filter(self, user_id: str) -> BloomFilter:
+        """
+        The user's filter of known (portal, external_job_id) keys. Rebuilt from
+        their job links when missing or over capacity.
+        """
+        settings = get_settings()
+        result = await self._execute(self.client.table("user_job_filters").select(
+            "capacity, error_rate, item_count, bits"
+        ).eq("user_id", user_id))
+        if result.data:
+            known = BloomFilter.from_dict(result.data[0])
+            if not known.is_full and known.error_rate == settings.known_jobs_filter_error_rate:
+                return known
+        
+        keys = []
+        offset = 0
+        while True:
+            page = await self._execute(self.client.table("fetched_jobs").select(
+                "portal, external_job_id"
+            ).eq("user_id", user_id).order("id").range(offset, offset + KNOWN_FILTER_PAGE_SIZE - 1))
+            keys.extend(job_key(row["portal"], row["external_job_id"]) for row in page.data)
+            if len(page.data) < KNOWN_FILTER_PAGE_SIZE:
+                break
+            offset += KNOWN_FILTER_PAGE_SIZE
+        
+        known = BloomFilter(
+            capacity=max(settings.known_jobs_filter_min_capacity, 2 * len(keys)),
+            error_rate=settings.known_jobs_filter_error_rate
+        )
+        known.update(keys)
+        return known
+    
+    async def save_known_jobs_filter(self, user_id: str, known: BloomFilter):
+        """Persist the user's filter for the next run."""
+        await self._execute(self.client.table("user_job_filters").upsert({
+            "user_id": user_id,
+            **known.to_dict(),
+            "updated_at": datetime.utcnow().isoformat()
+        }, on_conflict="user_id", returning=ReturnMethod.minimal))
+    
+    # ============================================
+    # Expiry & Archival
+    # ============================================
+    
+    async def touch_jobs_seen(self, user_id: str, portal: str, external_job_ids: List[str]):
+        """Record that jobs appeared in a scrape without re-storing them."""
+        catalog = await self._execute(self.client.table("jobs").select("id").eq(
+            "portal", portal
+        ).in_("external_job_id", external_job_ids))
+        if not catalog.data:
+            return
+        await self._execute(self.client.table("user_jobs").update({
+            "last_seen_at": datetime.utcnow().isoformat()
+        }).eq("user_id", user_id).in_("job_id", [row["id"] for row in catalog.data]))
+    
+    async def expire_stale_jobs(self, max_age_days: int, missing_days: int, batch_size: int) -> int:
+        """Mark one batch of stale open jobs expired. Returns how many were expired."""
+        result = await self._execute(self.client.rpc("expire_stale_jobs", {
+            "p_max_age_days": max_age_days,
+            "p_missing_days": missing_days,
+            "p_batch_size": batch_size
+        }))
+        if result.data:
+            jobs_cache.clear()
+        return result.data or 0
+    
+    async def archive_jobs(self, older_than_days: int, batch_size: int) -> int:
+        """Move one batch of old expired/skipped jobs to fetched_jobs_archive. Returns how many moved."""
+        result = await self._execute(self.client.rpc("archive_jobs", {
+            "p_older_than_days": older_than_days,
+            "p_batch_size": batch_size
+        }))
+        if result.data:
+            jobs_cache.clear()
+        return result.data or 0
+    
+    async def prune_job_catalog(self, older_than_days: int, batch_size: int) -> int:
+        """Delete one batch of catalog jobs no user links to any more. Returns how many."""
+        result = await self._execute(self.client.rpc("prune_job_catalog", {
+            "p_older_than_days": older_than_days,
+            "p_batch_size": batch_size
+        }))
+        return result.data or 0
+    
+    # ============================================
+    # Apply Queue
+    # ============================================
+    
+    async def claim_apply_jobs(
+        self,
+        worker_id: str,
+        limit: int,
+        lease_seconds: int,
+        user_id: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Lease up to limit queued jobs, best match first, to worker_id. Jobs
+        another claim holds or is locking are skipped, so concurrent workers
+        never get the same job. Each returned job carries the lease_id its
+        ack or nack must present.
+        """
+        result = await self._execute(self.client.rpc("claim_apply_jobs", {
+            "p_worker_id": worker_id,
+            "p_limit": limit,
+            "p_lease_seconds": lease_seconds,
+            "p_user_id": user_id
+        }), idempotent=False)
+        return result.data or []
+    
+    async def release_apply_job(
+        self,
+        user_id: str,
+        job_id: str,
+        lease_id: str,
+        status: JobStatus,
+        retry_at: Optional[datetime] = None,
+        error: Optional[str] = None
+    ) -> Optional[dict]:
+        """
+        End a lease: move the job to status and clear the lease. retry_at
+        keeps a requeued job unclaimable until then. Returns None if the
+        lease is no longer held (it expired and was claimed again, or the
+        job left the queue).
+        """
+        update_data = {
+            "status": status.value,
+            "apply_lease_id": None,
+            "apply_claimed_by": None,
+            "apply_lease_expires_at": retry_at.isoformat() if retry_at else None
+        }
+        if error is not None:
+            update_data["apply_last_error"] = error
         
-        return None, None
+        result = await self._execute(self.client.table("user_jobs").update(update_data).eq(
+            "id", job_id
+        ).eq("user_id", user_id).eq("apply_lease_id", lease_id).eq(
+            "status", JobStatus.QUEUED.value
+        ))
+        if result.data:
+            jobs_cache.invalidate_user(user_id)
+        return result.data[0] if result.data else None
+    
+    # ============================================
+    # Helper Methods
+    # ============================================
+    
+    def get_external_job_id(self, job_data: ApifyJobResult) -> str:
+        """Get the portal's job ID for a scraped job (the dedupe key in the jobs catalog)."""
+        return external_job_id_for(job_data)
+    
+    async def close(self):
+        """Release connections held by the backend (nothing to release over HTTP)."""
+
+
+def _create_db_service() -> DatabaseService:
+    """The DatabaseService for DATABASE_BACKEND."""
+    backend = get_settings().database_backend
+    if backend == "asyncpg":
+        from app.database_pg import AsyncpgDatabaseService
+        return AsyncpgDatabaseService()
+    if backend != "postgrest":
+        raise ValueError(f"Unknown DATABASE_BACKEND: {backend}")
+    return DatabaseService()
 
 
 # Singleton instance
-db_service = DatabaseService()
+db_service = _create_db_service()
@@ -0,0 +1,250 @@
+"""
+Job Fetcher Stack - asyncpg Database Backend
+DatabaseService with the hot read paths (job list, job detail, status
+update, stats) served over a direct asyncpg connection pool instead of
+PostgREST, selected with DATABASE_BACKEND=asyncpg. Everything else is
+inherited and still goes through supabase-py.
+
+Each query shape has fixed SQL text, so asyncpg's per-connection statement
+cache prepares it once and later calls skip parsing and planning. Behind a
+transaction-mode pooler (PgBouncer, Supavisor on port 6543) prepared
+statements don't survive between transactions: connect to the database or
+the session pooler, or set DATABASE_STATEMENT_CACHE_SIZE=0.
+
+Rows come back with the JSON-style values PostgREST returns (UUIDs and
+timestamps as strings), so callers can't tell the backends apart.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+from app.config import get_settings
+from app.cache import jobs_cache
+from app.database import DatabaseService, FACET_VALUE_LIMIT, JOB_LIST_COLUMNS
+from app.metrics import record_db_call
+from app.models import JobStatus
+from app.resilience import supabase_guard
+from app.text_codec import decode_text
+import asyncio
+import time
+
+try:
+    import asyncpg
+except ImportError:  # Optional: only needed for DATABASE_BACKEND=asyncpg
+    asyncpg = None
+
+
+# Columns get_jobs may sort by (the route restricts sort to these too)
+SORT_COLUMNS = {"fetched_at", "match_score", "posted_at", "title", "company"}
+
+
+def _json_value(value: Any) -> Any:
+    """A column value as PostgREST would return it in JSON."""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _row(record) -> dict:
+    return {key: _json_value(value) for key, value in record.items()}
+
+
+class AsyncpgDatabaseService(DatabaseService):
+    """DatabaseService with its hot read paths on an asyncpg pool."""
+
+    def __init__(self, pool=None):
+        """pool: use this pool (anything with asyncpg's fetch and close) instead of one for DATABASE_URL."""
+        if pool is None:
+            if asyncpg is None:
+                raise RuntimeError("asyncpg is required for DATABASE_BACKEND=asyncpg")
+            if not get_settings().database_url:
+                raise RuntimeError("DATABASE_URL is required for DATABASE_BACKEND=asyncpg")
+        super().__init__()
+        self._pool = pool
+        self._pool_lock = asyncio.Lock()
+
+    async def _get_pool(self):
+        """Create the pool on first use, on the running event loop."""
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    settings = get_settings()
+                    self._pool = await asyncpg.create_pool(
+                        settings.database_url,
+                        min_size=settings.database_pool_min_size,
+                        max_size=settings.database_pool_max_size,
+                        statement_cache_size=settings.database_statement_cache_size,
+                        server_settings={"application_name": "job-fetcher"}
+                    )
+        return self._pool
+
+    async def _fetch(self, sql: str, *args, idempotent: bool = True) -> List[dict]:
+        """
+        Run a statement on a pooled connection through the same rate limiter,
+        retry policy and circuit breaker as PostgREST calls (it is the same
+        database). Returns the rows as dicts.
+        """
+        pool = await self._get_pool()
+        start = time.perf_counter()
+        try:
+            records = await supabase_guard.call(lambda: pool.fetch(sql, *args), idempotent=idempotent)
+        finally:
+            record_db_call(time.perf_counter() - start)
+        return [_row(record) for record in records]
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    # ============================================
+    # Jobs
+    # ============================================
+
+    async def get_jobs(
+        self,
+        user_id: str,
+        portal: Optional[List[str]] = None,
+        status: Optional[List[str]] = None,
+        location: Optional[str] = None,
+        min_lpa: Optional[float] = None,
+        company: Optional[str] = None,
+        q: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 20,
+        sort: str = "fetched_at",
+        sort_desc: bool = True,
+        work_type: Optional[List[str]] = None,
+        experience_level: Optional[List[str]] = None
+    ) -> Tuple[List[dict], int]:
+        """
+        Get paginated jobs for a user (without description text).
+        The page and the total count come back in one statement; only the
+        filters in use are in the SQL, so each combination is its own
+        prepared statement.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort column: {sort}")
+
+        args: List[Any] = [user_id]
+
+        def param(value: Any) -> str:
+            args.append(value)
+            return f"${len(args)}"
+
+        conditions = ["user_id = $1"]
+        if portal:
+            conditions.append(f"portal = ANY({param(list(portal))}::text[])")
+        if status:
+            conditions.append(f"status = ANY({param(list(status))}::text[])")
+        if work_type:
+            conditions.append(f"work_type = ANY({param(list(work_type))}::text[])")
+        if experience_level:
+            conditions.append(f"experience_level = ANY({param(list(experience_level))}::text[])")
+        if location:
+            conditions.append(f"location ILIKE {param(f'%{location}%')}")
+        if min_lpa:
+            conditions.append(f"lpa_min >= {param(Decimal(str(min_lpa)))}")
+        if company:
+            conditions.append(f"company ILIKE {param(f'%{company}%')}")
+        if q:
+            pattern = param(f"%{q}%")
+            conditions.append(f"(title ILIKE {pattern} OR company ILIKE {pattern})")
+
+        offset = (page - 1) * page_size
+        sql = (
+            f"SELECT {JOB_LIST_COLUMNS}, count(*) OVER () AS total_count "
+            f"FROM public.fetched_jobs WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {sort} {'DESC' if sort_desc else 'ASC'} "
+            f"LIMIT {param(page_size)} OFFSET {param(offset)}"
+        )
+        rows = await self._fetch(sql, *args)
+        if rows:
+            total = rows[0]["total_count"]
+            for row in rows:
+                del row["total_count"]
+            return rows, total
+        if offset == 0:
+            return rows, 0
+
+        # Past the last page: the window count has no row to ride on
+        count_sql = f"SELECT count(*) AS total_count FROM public.fetched_jobs WHERE {' AND '.join(conditions)}"
+        counted = await self._fetch(count_sql, *args[:-2])
+        return rows, counted[0]["total_count"]
+
+    async def get_job_facets(
+        self,
+        user_id: str,
+        dimensions: List[str],
+        portal: Optional[List[str]] = None,
+        status: Optional[List[str]] = None,
+        location: Optional[str] = None,
+        min_lpa: Optional[float] = None,
+        company: Optional[str] = None,
+        q: Optional[str] = None,
+        work_type: Optional[List[str]] = None,
+        experience_level: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """Facet counts from the job_facets SQL function, as one prepared statement."""
+        rows = await self._fetch(
+            "SELECT dimension, value, job_count FROM public.job_facets("
+            "$1, $2::text[], $3::text[], $4::text[], $5::text[], $6::text[], $7, $8, $9, $10, $11)",
+            user_id, list(dimensions), portal or None, status or None, work_type or None,
+            experience_level or None, location or None, company or None,
+            Decimal(str(min_lpa)) if min_lpa else None, q or None, FACET_VALUE_LIMIT
+        )
+        return self._facets(dimensions, rows)
+
+    async def get_job_by_id(self, user_id: str, job_id: str) -> Optional[dict]:
+        """Get a single job by ID, with its description and benefits text, in one statement."""
+        rows = await self._fetch(
+            "SELECT f.*, "
+            "d.encoding AS description_encoding, d.body AS description_body, "
+            "b.encoding AS benefits_encoding, b.body AS benefits_body "
+            "FROM public.fetched_jobs f "
+            "LEFT JOIN public.job_descriptions d ON d.hash = f.description_hash "
+            "LEFT JOIN public.job_descriptions b ON b.hash = f.benefits_hash "
+            "WHERE f.id = $1 AND f.user_id = $2",
+            job_id, user_id
+        )
+        if not rows:
+            return None
+
+        job = rows[0]
+        for field in ("description", "benefits"):
+            encoding = job.pop(f"{field}_encoding")
+            body = job.pop(f"{field}_body")
+            if job.get(f"{field}_hash"):
+                job[field] = decode_text(encoding, body) if encoding else None
+        return job
+
+    async def update_job_status(
+        self,
+        user_id: str,
+        job_id: str,
+        status: JobStatus
+    ) -> Optional[dict]:
+        """Update job status."""
+        rows = await self._fetch(
+            "UPDATE public.user_jobs SET status = $1 WHERE id = $2 AND user_id = $3 RETURNING *",
+            status.value, job_id, user_id
+        )
+        jobs_cache.invalidate_user(user_id)
+        return rows[0] if rows else None
+
+    async def get_job_stats(self, user_id: str) -> dict:
+        """Job counters from the trigger-maintained stats tables, in one statement."""
+        rows = await self._fetch(
+            "SELECT 'status' AS kind, portal, status, job_count, NULL::bigint AS jobs_added "
+            "FROM public.user_job_stats WHERE user_id = $1 "
+            "UNION ALL "
+            "SELECT 'today', NULL, NULL, NULL, jobs_added "
+            "FROM public.user_job_daily_stats WHERE user_id = $1 AND day = $2",
+            user_id, datetime.utcnow().date()
+        )
+        today = next((row["jobs_added"] for row in rows if row["kind"] == "today"), 0)
+        return self._job_stats([row for row in rows if row["kind"] == "status"], today)
@@ -0,0 +1,142 @@
+"""
+Job Fetcher Stack - CPU Executor
+Runs CPU-heavy batch transforms (app.transforms) off the event loop thread,
+in a process pool, or in a thread pool on free-threaded Python builds, so
+a large ingest doesn't stall other requests on the same worker.
+
+CPU_EXECUTOR selects the mode:
+- auto (default): inline, except item validation of very large pages
+  (CPU_EXECUTOR_AUTO_MIN_ITEMS), which goes to a process pool on multi-core
+  hosts or threads on free-threaded builds. Always inline on Lambda (no
+  /dev/shm for multiprocessing) or a single core. Widen this only once a
+  multi-core run of benchmarks.cpu_scaling shows a throughput win.
+- process / thread: always use that pool
+- inline: run on the event loop thread, as before
+"""
+from typing import AsyncIterator, Callable, List, Optional, TypeVar
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from app.config import get_settings
+import asyncio
+import logging
+import os
+import sys
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+INLINE = "inline"
+PROCESS = "process"
+THREAD = "thread"
+
+
+def _free_threaded() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+class CpuExecutor:
+    """
+    Batch transform executor. fn must be a picklable module-level function
+    (or functools.partial of one) in process mode.
+    """
+
+    def __init__(self, mode: Optional[str] = None, workers: Optional[int] = None):
+        settings = get_settings()
+        self.workers = workers or settings.cpu_executor_workers or os.cpu_count() or 1
+        self.auto = (mode or settings.cpu_executor) == "auto"
+        self.mode = self._resolve_mode(mode or settings.cpu_executor)
+        self.min_items = settings.cpu_executor_min_items
+        self.auto_min_items = settings.cpu_executor_auto_min_items
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _resolve_mode(self, mode: str) -> str:
+        if mode != "auto":
+            return mode
+        if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+            return INLINE
+        if _free_threaded():
+            return THREAD
+        return PROCESS if self.workers > 1 else INLINE
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == PROCESS:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cpu-executor")
+                logger.info("Started %s pool with %d workers", self.mode, self.workers)
+            return self._pool
+
+    def _inline(self, items: List[T], auto_offload: bool) -> bool:
+        if self.mode == INLINE:
+            return True
+        if self.auto:
+            return not auto_offload or len(items) < self.auto_min_items
+        return len(items) < self.min_items
+
+    async def map(
+        self,
+        fn: Callable[[List[T]], R],
+        items: List[T],
+        batch_size: int,
+        auto_offload: bool = False
+    ) -> AsyncIterator[R]:
+        """
+        Apply fn to consecutive batches of items and yield the results in
+        order as they become ready. At most two batches per worker are in
+        flight, so a slow consumer holds back submission.
+        
+        In auto mode only calls with auto_offload (item validation) of at
+        least CPU_EXECUTOR_AUTO_MIN_ITEMS items leave the event loop.
+        """
+        batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+        if self._inline(items, auto_offload):
+            for batch in batches:
+                yield fn(batch)
+            return
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        pending: deque = deque()
+        remaining = iter(batches)
+        try:
+            for batch in remaining:
+                pending.append(loop.run_in_executor(pool, fn, batch))
+                if len(pending) >= 2 * self.workers:
+                    break
+            while pending:
+                result = await pending.popleft()
+                for batch in remaining:
+                    pending.append(loop.run_in_executor(pool, fn, batch))
+                    break
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def run(
+        self,
+        fn: Callable[[List[T]], R],
+        items: List[T],
+        batch_size: int,
+        auto_offload: bool = False
+    ) -> List[R]:
+        """map() collected into a list of per-batch results."""
+        return [result async for result in self.map(fn, items, batch_size, auto_offload)]
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# Singleton instance
+cpu_executor = CpuExecutor()
@@ -1,12 +1,17 @@
 """
 Job Fetcher Stack - FastAPI Application
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from mangum import Mangum
+import math
 
 from app.routes import router
 from app.config import get_settings
+from app.compression import CompressionMiddleware, base64_compressed_responses
+from app.middleware import RequestTimingMiddleware
+from app.resilience import CircuitOpenError
 
 # Create FastAPI app
 app = FastAPI(
@@ -26,10 +31,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli response compression and the Lambda payload budget
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency and DB-call attribution (outermost, so it times everything)
+app.add_middleware(RequestTimingMiddleware)
+
 # Include routes
 app.include_router(router)
 
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    """Reject fast with 503 while an upstream's circuit is open."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -40,5 +61,5 @@ async def root():
     }
 
 
-# AWS Lambda handler
-handler = Mangum(app, lifespan="off")
+# AWS Lambda handler (compressed bodies always go back base64-encoded)
+handler = base64_compressed_responses(Mangum(app, lifespan="off"))
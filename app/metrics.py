@@ -0,0 +1,268 @@
+"""
+Job Fetcher Stack - Metrics
+In-process counters, histograms and per-run stage timings, exported as
+Prometheus/OpenMetrics text or CloudWatch Embedded Metric Format (EMF).
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.config import get_settings
+import json
+import sys
+import time
+
+
+# Default latency buckets in seconds (upper bounds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}_total{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        series = self.values.get(key)
+        if series is None:
+            # Per-bucket counts, then +Inf count, then sum
+            series = self.values[key] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', str(bound)))} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds all metrics for this process and renders them for export."""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        if name not in self.metrics:
+            self.metrics[name] = Counter(name, help_text)
+        return self.metrics[name]
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self.metrics:
+            self.metrics[name] = Histogram(name, help_text, buckets)
+        return self.metrics[name]
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        """Add a callback returning extra exposition lines (e.g. gauges) at render time."""
+        self.collectors.append(collector)
+
+    def render_prometheus(self) -> str:
+        """Prometheus/OpenMetrics text exposition of every metric."""
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class StageTimings:
+    """
+    Wall-clock time per pipeline stage for one fetch run.
+    Each stage is also observed in the fetch_stage_seconds histogram.
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.started_at = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block as `name`; repeated stages accumulate."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        fetch_stage_seconds.observe(seconds, pipeline=self.pipeline, stage=name)
+
+    def count(self, name: str, amount: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def copy(self, pipeline: Optional[str] = None) -> "StageTimings":
+        """Independent copy of the timings so far; copied stages are not observed again."""
+        timings = StageTimings(pipeline or self.pipeline)
+        timings.stages = dict(self.stages)
+        timings.counts = dict(self.counts)
+        timings.started_at = self.started_at
+        return timings
+    
+    def to_dict(self) -> dict:
+        """Breakdown stored on the job_fetch_runs row, in milliseconds."""
+        return {
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 1),
+            "stages_ms": {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()},
+            "counts": dict(self.counts)
+        }
+
+    def emit(self, status: str):
+        """Record the run in the registry and, if enabled, as a CloudWatch EMF line."""
+        total = time.perf_counter() - self.started_at
+        fetch_runs.inc(pipeline=self.pipeline, status=status)
+        fetch_run_seconds.observe(total, pipeline=self.pipeline, status=status)
+        if get_settings().metrics_emf_enabled:
+            emit_emf(
+                dimensions={"Pipeline": self.pipeline, "Status": status},
+                values={
+                    "RunDuration": (total * 1000, "Milliseconds"),
+                    **{
+                        f"Stage_{name}": (seconds * 1000, "Milliseconds")
+                        for name, seconds in self.stages.items()
+                    },
+                    **{name: (value, "Count") for name, value in self.counts.items()}
+                }
+            )
+
+
+class RequestStats:
+    """Database calls made while serving one HTTP request."""
+
+    __slots__ = ("db_calls", "db_seconds", "closed")
+
+    def __init__(self):
+        self.db_calls = 0
+        self.db_seconds = 0.0
+        self.closed = False
+
+
+# Set by the request timing middleware for the duration of a request
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def record_db_call(seconds: float):
+    """Attribute a database call to the current request, if any."""
+    stats = current_request_stats.get()
+    # Background tasks inherit the context; ignore their calls once the response is sent
+    if stats is not None and not stats.closed:
+        stats.db_calls += 1
+        stats.db_seconds += seconds
+
+
+@contextmanager
+def time_stage(timings: Optional[StageTimings], name: str) -> Iterator[None]:
+    """timings.stage(name), or a no-op when the caller is not collecting timings."""
+    if timings is None:
+        yield
+        return
+    with timings.stage(name):
+        yield
+
+
+def emit_emf(dimensions: Dict[str, str], values: Dict[str, Tuple[float, str]]):
+    """Write one CloudWatch Embedded Metric Format record to stdout."""
+    settings = get_settings()
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": settings.metrics_namespace,
+                "Dimensions": [list(dimensions.keys())],
+                "Metrics": [{"Name": name, "Unit": unit} for name, (_, unit) in values.items()]
+            }]
+        },
+        **dimensions,
+        **{name: value for name, (value, _) in values.items()}
+    }
+    sys.stdout.write(json.dumps(record) + "\n")
+    sys.stdout.flush()
+
+
+# Singleton registry and the fetch pipeline's metrics
+registry = MetricsRegistry()
+
+fetch_runs = registry.counter("fetch_runs", "Fetch runs finished, by pipeline and status")
+fetch_run_seconds = registry.histogram("fetch_run_seconds", "Fetch run wall-clock duration")
+fetch_stage_seconds = registry.histogram("fetch_stage_seconds", "Time spent per fetch pipeline stage")
+fetch_jobs_processed = registry.counter("fetch_jobs_processed", "Jobs processed by fetch runs, by outcome")
+apify_requests = registry.counter("apify_requests", "Apify API requests, by endpoint and status")
+apify_request_seconds = registry.histogram("apify_request_seconds", "Apify API request latency")
+apify_polls = registry.counter("apify_polls", "Actor run status polls")
+apify_items_invalid = registry.counter("apify_items_invalid", "Dataset items that failed ApifyJobResult validation")
+http_request_seconds = registry.histogram("http_request_seconds", "HTTP request latency, by route, method and status")
+http_request_db_seconds = registry.histogram("http_request_db_seconds", "Database time per HTTP request, by route")
+jobs_cache_lookups = registry.counter("jobs_cache_lookups", "Jobs list cache lookups, by outcome")
+apply_queue_leases = registry.counter("apply_queue_leases", "Apply queue leases, by outcome (claimed, acked, nacked, lost)")
+http_request_db_calls = registry.histogram(
+    "http_request_db_calls",
+    "Database calls per HTTP request, by route",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+http_response_bytes = registry.histogram(
+    "http_response_bytes",
+    "Response size as sent from the app (base64 size when compressed), by route and encoding",
+    buckets=(1024, 10240, 102400, 524288, 1048576, 2097152, 4194304, 6291456)
+)
+http_responses_over_budget = registry.counter(
+    "http_responses_over_budget",
+    "Responses replaced with a 500 for exceeding the payload budget, by route"
+)
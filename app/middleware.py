@@ -0,0 +1,71 @@
+"""
+Job Fetcher Stack - Request Timing Middleware
+Records per-route latency and the database calls made while serving each
+request, and logs slow requests with their query parameters.
+"""
+from urllib.parse import parse_qs
+from app.config import get_settings
+from app.metrics import (
+    RequestStats, current_request_stats,
+    http_request_seconds, http_request_db_seconds, http_request_db_calls
+)
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task/queue overhead).
+
+    Routes are labelled by their path template (e.g. /v1/jobs/{job_id}) so
+    metrics stay low-cardinality; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.slow_threshold = get_settings().slow_request_threshold_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.closed = True
+            current_request_stats.reset(token)
+            self._record(scope, status_code, elapsed, stats)
+
+    def _record(self, scope, status_code: int, elapsed: float, stats: RequestStats):
+        route = scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        method = scope["method"]
+
+        http_request_seconds.observe(elapsed, route=path, method=method, status=status_code)
+        http_request_db_seconds.observe(stats.db_seconds, route=path)
+        http_request_db_calls.observe(stats.db_calls, route=path)
+
+        if elapsed >= self.slow_threshold:
+            query = scope.get("query_string", b"").decode("latin-1")
+            logger.warning(
+                "Slow request %s %s -> %d in %.0fms (db: %d calls, %.0fms) params=%s",
+                method, path, status_code, elapsed * 1000,
+                stats.db_calls, stats.db_seconds * 1000,
+                parse_qs(query, keep_blank_values=True)
+            )
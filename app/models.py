@@ -2,7 +2,7 @@
 Job Fetcher Stack - Pydantic Models
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime, date
 from enum import Enum
 from uuid import UUID
@@ -27,12 +27,29 @@ class FetchRunStatus(str, Enum):
     FAILED = "failed"
 
 
+class FetchRunEventType(str, Enum):
+    RUN_STARTED = "run_started"
+    ACTOR_STARTED = "actor_started"
+    ACTOR_POLLING = "actor_polling"
+    ITEMS_DOWNLOADED = "items_downloaded"
+    ROWS_WRITTEN = "rows_written"
+    SHARD_FINISHED = "shard_finished"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class Portal(str, Enum):
     LINKEDIN = "linkedin"
     NAUKRI = "naukri"
     INDEED = "indeed"
 
 
+class ShardStrategy(str, Enum):
+    AUTO = "auto"
+    LOCATION = "location"
+    COMPANY_ID = "company_id"
+
+
 # ============================================
 # Request Models
 # ============================================
@@ -48,11 +65,78 @@ class SyncJobsRequest(BaseModel):
     rows: int = Field(default=50, ge=1, le=100)
 
 
+class ShardedSyncRequest(BaseModel):
+    """Request body for POST /v1/job-fetcher/sync/sharded"""
+    title: Optional[str] = None
+    location: Optional[str] = None
+    locations: Optional[List[str]] = None  # One shard per location
+    company_names: Optional[List[str]] = Field(default=None, alias="companyName")
+    company_ids: Optional[List[str]] = Field(default=None, alias="companyId")
+    published_at: Optional[str] = Field(default=None, alias="publishedAt")
+    total_rows: int = Field(default=500, ge=1, le=2000)
+    shard_by: ShardStrategy = ShardStrategy.AUTO
+    max_concurrency: Optional[int] = Field(default=None, ge=1, le=10)
+
+
+class BatchSyncSearch(BaseModel):
+    """One search in a batch sync: a saved search, or filters as in SyncJobsRequest"""
+    saved_search_id: Optional[UUID] = None  # When set, the filters below are ignored
+    title: Optional[str] = None
+    location: Optional[str] = None
+    company_names: Optional[List[str]] = Field(default=None, alias="companyName")
+    company_ids: Optional[List[str]] = Field(default=None, alias="companyId")
+    published_at: Optional[str] = Field(default=None, alias="publishedAt")
+    rows: int = Field(default=50, ge=1, le=100)
+
+
+class BatchSyncRequest(BaseModel):
+    """Request body for POST /v1/job-fetcher/sync/batch"""
+    searches: List[BatchSyncSearch] = Field(min_length=1, max_length=50)
+    full: bool = False  # Saved searches: fetch the whole window, not just past the high-water mark
+
+
+class SavedSearchRequest(BaseModel):
+    """Request body for POST /v1/saved-searches"""
+    name: Optional[str] = None
+    portal: Portal = Portal.LINKEDIN
+    title: Optional[str] = None
+    location: Optional[str] = None
+    company_names: Optional[List[str]] = Field(default=None, alias="companyName")
+    company_ids: Optional[List[str]] = Field(default=None, alias="companyId")
+    published_at: Optional[str] = Field(default=None, alias="publishedAt")
+    rows: int = Field(default=50, ge=1, le=100)
+    is_active: bool = True
+    sync_interval_minutes: int = Field(default=360, ge=15)
+
+
 class UpdateJobStatusRequest(BaseModel):
     """Request body for PUT /v1/jobs/:id/status"""
     status: JobStatus
 
 
+class ApplyQueueClaimRequest(BaseModel):
+    """Request body for POST /v1/admin/apply-queue/claim"""
+    worker_id: str = Field(min_length=1, max_length=200)
+    limit: int = Field(default=10, ge=1, le=100)
+    lease_seconds: Optional[int] = Field(default=None, ge=1)  # Defaults to APPLY_QUEUE_LEASE_SECONDS
+    user_id: Optional[UUID] = None  # Only claim this user's queued jobs
+
+
+class ApplyQueueAckRequest(BaseModel):
+    """Request body for POST /v1/admin/apply-queue/:id/ack"""
+    user_id: UUID
+    lease_id: UUID
+
+
+class ApplyQueueNackRequest(BaseModel):
+    """Request body for POST /v1/admin/apply-queue/:id/nack"""
+    user_id: UUID
+    lease_id: UUID
+    error: Optional[str] = Field(default=None, max_length=2000)
+    retry_after_seconds: int = Field(default=0, ge=0, le=86400)  # Keep the job unclaimable this long
+    requeue: bool = True  # False gives up on the job: it is marked skipped
+
+
 # ============================================
 # Response Models
 # ============================================
@@ -62,6 +146,23 @@ class SyncJobsResponse(BaseModel):
     run_id: UUID
     status: str = "started"
     message: str = "Job fetch started"
+    planned_rows: Optional[int] = None  # Sharded syncs: rows the shard plan can return
+
+
+class BatchSyncRun(BaseModel):
+    """Fetch run created for one search of a batch sync"""
+    run_id: UUID
+    saved_search_id: Optional[UUID] = None
+    group: int  # Searches in the same group share one actor run
+
+
+class BatchSyncResponse(BaseModel):
+    """Response for POST /v1/job-fetcher/sync/batch"""
+    batch_id: UUID
+    runs: List[BatchSyncRun]  # In request order
+    actor_runs: int
+    status: str = "started"
+    message: str = "Batch job fetch started"
 
 
 class FetchedJobResponse(BaseModel):
@@ -77,7 +178,7 @@ class FetchedJobResponse(BaseModel):
     job_url: str
     apply_url: Optional[str]
     apply_type: Optional[str]
-    description: Optional[str]
+    description: Optional[str] = None  # Only returned by the single-job endpoint
     contract_type: Optional[str]
     experience_level: Optional[str]
     work_type: Optional[str]
@@ -102,6 +203,15 @@ class FetchedJobListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    facets: Optional[Dict[str, Dict[str, int]]] = None  # Only when requested
+
+
+class JobStatsResponse(BaseModel):
+    """Dashboard counters for a user's jobs"""
+    total: int
+    by_status: Dict[str, int]
+    by_portal: Dict[str, int]
+    new_today: int
 
 
 class FetchRunResponse(BaseModel):
@@ -114,6 +224,10 @@ class FetchRunResponse(BaseModel):
     jobs_found: int
     new_jobs_added: int
     errors_json: Optional[dict]
+    stage_timings: Optional[dict] = None
+    checkpoint: Optional[dict] = None
+    parent_run_id: Optional[UUID] = None
+    shard: Optional[dict] = None
 
     class Config:
         from_attributes = True
@@ -128,6 +242,47 @@ class FetchRunListResponse(BaseModel):
     total_pages: int
 
 
+class FetchRunProgressEvent(BaseModel):
+    """Single progress event streamed from GET /v1/job-fetcher/runs/:id/events"""
+    seq: int
+    run_id: str
+    event: FetchRunEventType
+    timestamp: datetime
+    data: dict = Field(default_factory=dict)
+
+
+class SavedSearchResponse(BaseModel):
+    """Single saved search response"""
+    id: UUID
+    name: Optional[str]
+    portal: str
+    title: Optional[str]
+    location: Optional[str]
+    company_names: Optional[List[str]]
+    company_ids: Optional[List[str]]
+    published_at: Optional[str]
+    rows: int
+    is_active: bool
+    sync_interval_minutes: int
+    high_water_posted_at: Optional[date]
+    last_synced_at: Optional[datetime]
+    next_sync_at: Optional[datetime]
+    last_run_id: Optional[UUID]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SavedSearchListResponse(BaseModel):
+    """Paginated list of saved searches"""
+    searches: List[SavedSearchResponse]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+
+
 class JobStatusUpdateResponse(BaseModel):
     """Response for status update"""
     id: UUID
@@ -135,6 +290,28 @@ class JobStatusUpdateResponse(BaseModel):
     message: str = "Status updated"
 
 
+class ApplyQueueJob(BaseModel):
+    """A queued job leased to an apply worker"""
+    id: UUID
+    user_id: UUID
+    job_id: UUID
+    portal: str
+    title: str
+    company: str
+    job_url: str
+    apply_url: Optional[str]
+    apply_type: Optional[str]
+    match_score: Optional[int]
+    lease_id: UUID  # Present it to ack or nack the job
+    lease_expires_at: datetime
+    attempts: int  # Claims so far, including this one
+
+
+class ApplyQueueClaimResponse(BaseModel):
+    """Response for POST /v1/admin/apply-queue/claim"""
+    jobs: List[ApplyQueueJob]  # Best match first; empty when nothing is claimable
+
+
 # ============================================
 # Apify Models (matching their API response)
 # ============================================
@@ -0,0 +1,201 @@
+"""
+Job Fetcher Stack - Sampling Profiler
+Opt-in stack sampling of a single request or fetch run, saved as
+collapsed stacks and speedscope JSON to local disk or S3-compatible storage.
+
+Enable for everything with PROFILING_ENABLED=true, or per request with an
+`X-Profile: true` header from an admin.
+"""
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import Depends, Header, Request
+from app.auth import get_current_user, require_admin, CurrentUser
+from app.config import get_settings
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+
+logger = logging.getLogger(__name__)
+
+Frame = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a
+    background thread. Sampling the event loop thread captures whatever
+    coroutine is running at the time, including other concurrent requests.
+    """
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None, max_depth: int = 128):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack: List[Frame] = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[tuple(stack)] += 1
+
+    def to_collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format: `root;child;leaf count` per line."""
+        lines = []
+        for stack, count in self.samples.most_common():
+            names = ";".join(_frame_label(frame) for frame in stack)
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """speedscope 'sampled' profile (https://www.speedscope.app/file-format-schema.json)."""
+        frame_index: Dict[Frame, int] = {}
+        frames = []
+        samples = []
+        weights = []
+        for stack, count in self.samples.items():
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indexes.append(frame_index[frame])
+            samples.append(indexes)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "job-fetcher-stack",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self.duration, 6),
+                "samples": samples,
+                "weights": weights
+            }]
+        }
+
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def save_profile(name: str, profiler: SamplingProfiler) -> List[str]:
+    """
+    Write the profile as <name>.collapsed.txt and <name>.speedscope.json to
+    PROFILE_S3_BUCKET when set, else PROFILE_OUTPUT_DIR. Returns the locations.
+    """
+    settings = get_settings()
+    stem = "{}-{}-{}".format(
+        datetime.utcnow().strftime("%Y%m%dT%H%M%S"),
+        re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_"),
+        uuid.uuid4().hex[:8]
+    )
+    files = {
+        f"{stem}.collapsed.txt": profiler.to_collapsed().encode(),
+        f"{stem}.speedscope.json": json.dumps(profiler.to_speedscope(name)).encode()
+    }
+
+    if settings.profile_s3_bucket:
+        import boto3  # Available in the Lambda runtime; only needed for S3 output
+
+        s3 = boto3.client("s3", endpoint_url=settings.profile_s3_endpoint_url)
+        locations = []
+        for filename, body in files.items():
+            key = settings.profile_s3_prefix + filename
+            s3.put_object(Bucket=settings.profile_s3_bucket, Key=key, Body=body)
+            locations.append(f"s3://{settings.profile_s3_bucket}/{key}")
+        return locations
+
+    os.makedirs(settings.profile_output_dir, exist_ok=True)
+    locations = []
+    for filename, body in files.items():
+        path = os.path.join(settings.profile_output_dir, filename)
+        with open(path, "wb") as f:
+            f.write(body)
+        locations.append(path)
+    return locations
+
+
+@asynccontextmanager
+async def profiled(name: str, enabled: bool = True):
+    """Sample the event loop thread for the duration of the block and save the profile."""
+    if not enabled:
+        yield
+        return
+
+    profiler = SamplingProfiler(get_settings().profile_interval_ms / 1000)
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        try:
+            locations = await asyncio.to_thread(save_profile, name, profiler)
+            logger.info(
+                "Profile %s: %d samples over %.2fs saved to %s",
+                name, sum(profiler.samples.values()), profiler.duration, ", ".join(locations)
+            )
+        except Exception:
+            logger.exception("Failed to save profile %s", name)
+
+
+async def run_profiled(name: str, coro: Awaitable[Any], enabled: bool = True) -> Any:
+    """Await coro under profiled(name)."""
+    async with profiled(name, enabled):
+        return await coro
+
+
+async def profiling_requested(
+    x_profile: bool = Header(False),
+    current_user: CurrentUser = Depends(get_current_user)
+) -> bool:
+    """
+    Dependency: True when this request (or the fetch run it starts) should be
+    profiled. The X-Profile header is only honoured for admins.
+    """
+    if x_profile:
+        await require_admin(current_user)
+        return True
+    return get_settings().profiling_enabled
+
+
+async def profile_request(request: Request, enabled: bool = Depends(profiling_requested)):
+    """Dependency: profile the rest of the request when profiling is requested."""
+    async with profiled(f"{request.method} {request.url.path}", enabled):
+        yield
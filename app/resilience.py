@@ -0,0 +1,299 @@
+"""
+Job Fetcher Stack - Upstream Resilience
+Token-bucket rate limiting, decorrelated-jitter retries and circuit breaking
+for calls to Apify and Supabase (PostgREST).
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+from app.config import get_settings
+from app.metrics import registry
+from postgrest.exceptions import APIError
+import asyncio
+import httpx
+import inspect
+import logging
+import random
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses that signal upstream overload or a transient failure
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Postgres SQLSTATE classes/codes worth retrying: connection exceptions,
+# serialization failures, deadlocks, insufficient resources, admin shutdown
+RETRYABLE_SQLSTATE_PREFIXES = ("08", "40001", "40P01", "53", "57P")
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream's circuit is open."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        self.upstream = upstream
+        self.retry_after = retry_after
+        super().__init__(f"{upstream} circuit is open; retry in {retry_after:.1f}s")
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    async def acquire(self) -> float:
+        """
+        Take one token, waiting if the bucket is empty. Returns seconds waited.
+        Tokens are reserved up front (the balance may go negative), so
+        concurrent callers queue in arrival order without a lock.
+        """
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        delay = -self.tokens / self.rate
+        await asyncio.sleep(delay)
+        return delay
+
+    def try_acquire(self) -> float:
+        """Take a token without waiting. Returns 0 on success, else seconds until one is available."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        """Give back a token taken for a request that was turned away."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures and rejects
+    calls for `reset_timeout` seconds, then lets a single probe call through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self, upstream: str):
+        """Raise CircuitOpenError if the call must not go through."""
+        if self.state == self.OPEN:
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(upstream, remaining)
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError(upstream, self.reset_timeout)
+            self._probe_in_flight = True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def abandon_call(self):
+        """A call ended without an outcome (cancelled): let the next call probe instead."""
+        self._probe_in_flight = False
+
+
+class UpstreamGuard:
+    """Rate limiter, retry policy and circuit breaker for one upstream service."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        failure_threshold: int,
+        reset_timeout: float
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.metrics: Dict[str, float] = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "rejected_open": 0,
+            "throttle_wait_seconds": 0.0
+        }
+
+    async def call(
+        self,
+        fn: Callable[[], Union[Awaitable[Any], Any]],
+        idempotent: bool = True
+    ) -> Any:
+        """
+        Call fn (sync or async, no arguments) under the rate limiter and breaker,
+        retrying transient failures with decorrelated-jitter backoff.
+        Non-idempotent calls are only retried when the upstream cannot have
+        acted on them (429 or a failed connection).
+        """
+        delay = self.base_delay
+        attempt = 1
+        while True:
+            try:
+                self.breaker.before_call(self.name)
+            except CircuitOpenError:
+                self.metrics["rejected_open"] += 1
+                raise
+
+            self.metrics["calls"] += 1
+            try:
+                self.metrics["throttle_wait_seconds"] += await self.bucket.acquire()
+                result = fn()
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                if not self._is_transient(e):
+                    # The upstream answered; a client error is not an outage
+                    self.breaker.record_success()
+                    raise
+
+                self.breaker.record_failure()
+                self.metrics["failures"] += 1
+                if attempt >= self.max_attempts or not (idempotent or self._was_not_processed(e)):
+                    raise
+
+                # Decorrelated jitter: sleep = min(cap, uniform(base, previous * 3))
+                delay = min(self.max_delay, random.uniform(self.base_delay, delay * 3))
+                delay = max(delay, self._retry_after(e) or 0.0)
+                logger.warning(
+                    "%s call failed (%s), retry %d/%d in %.2fs",
+                    self.name, e, attempt, self.max_attempts - 1, delay
+                )
+                self.metrics["retries"] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (CancelledError is not an Exception): no verdict on the upstream
+                self.breaker.abandon_call()
+                raise
+
+            self.breaker.record_success()
+            self.metrics["successes"] += 1
+            return result
+
+    def snapshot(self) -> dict:
+        """Current breaker state and counters."""
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "tokens": round(self.bucket.tokens, 2),
+            **self.metrics
+        }
+
+    def _is_transient(self, error: Exception) -> bool:
+        if isinstance(error, httpx.TransportError):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRYABLE_STATUS_CODES
+        if isinstance(error, APIError):
+            code = str(error.code or "")
+            return (
+                code.isdigit() and int(code) in RETRYABLE_STATUS_CODES
+                or code.startswith(RETRYABLE_SQLSTATE_PREFIXES)
+            )
+        # Direct Postgres connections (asyncpg errors carry the SQLSTATE)
+        sqlstate = getattr(error, "sqlstate", None)
+        if sqlstate:
+            return sqlstate.startswith(RETRYABLE_SQLSTATE_PREFIXES)
+        return isinstance(error, (ConnectionError, asyncio.TimeoutError))
+
+    def _was_not_processed(self, error: Exception) -> bool:
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, ConnectionRefusedError)):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code == 429
+        if isinstance(error, APIError):
+            return str(error.code) == "429"
+        return False
+
+    def _retry_after(self, error: Exception) -> Optional[float]:
+        if isinstance(error, httpx.HTTPStatusError):
+            value = error.response.headers.get("Retry-After")
+            if value and value.isdigit():
+                return min(float(value), self.max_delay)
+        return None
+
+
+def _build_guard(name: str, rate: float, burst: float) -> UpstreamGuard:
+    settings = get_settings()
+    return UpstreamGuard(
+        name=name,
+        rate=rate,
+        burst=burst,
+        max_attempts=settings.retry_max_attempts,
+        base_delay=settings.retry_base_delay,
+        max_delay=settings.retry_max_delay,
+        failure_threshold=settings.circuit_failure_threshold,
+        reset_timeout=settings.circuit_reset_seconds
+    )
+
+
+_settings = get_settings()
+apify_guard = _build_guard("apify", _settings.apify_rate_per_second, _settings.apify_burst)
+supabase_guard = _build_guard("supabase", _settings.supabase_rate_per_second, _settings.supabase_burst)
+
+
+def resilience_snapshot() -> dict:
+    """Metrics for every guarded upstream."""
+    return {guard.name: guard.snapshot() for guard in (apify_guard, supabase_guard)}
+
+
+def _render_resilience_metrics() -> list:
+    """Exposition lines for the guards' counters and breaker state."""
+    lines = [
+        "# HELP upstream_calls Upstream calls by guard outcome",
+        "# TYPE upstream_calls counter"
+    ]
+    for guard in (apify_guard, supabase_guard):
+        for outcome in ("calls", "successes", "failures", "retries", "rejected_open"):
+            lines.append(f'upstream_calls_total{{upstream="{guard.name}",outcome="{outcome}"}} {guard.metrics[outcome]}')
+    lines += [
+        "# HELP upstream_circuit_open Whether the upstream's circuit breaker is open (1) or not (0)",
+        "# TYPE upstream_circuit_open gauge"
+    ]
+    for guard in (apify_guard, supabase_guard):
+        is_open = 1 if guard.breaker.state == CircuitBreaker.OPEN else 0
+        lines.append(f'upstream_circuit_open{{upstream="{guard.name}"}} {is_open}')
+    return lines
+
+
+registry.register_collector(_render_resilience_metrics)
@@ -1,19 +1,37 @@
 """
 Job Fetcher Stack - API Routes
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from typing import Optional, List
 from uuid import UUID
+from datetime import datetime, timedelta
+import asyncio
+import json
 import math
 
-from app.auth import get_current_user, CurrentUser
-from app.database import db_service
+from app.admission import (
+    admission_controller, admission_override, retry_after_header,
+    AdmissionLimits, AdmissionRejected, AdmissionTicket
+)
+from app.auth import get_current_user, require_admin, CurrentUser
+from app.config import get_settings
+from app.database import db_service, FACET_DIMENSIONS
+from app.metrics import apply_queue_leases, registry
+from app.profiling import profile_request, profiling_requested, run_profiled
+from app.resilience import CircuitOpenError, resilience_snapshot
 from app.services.job_fetcher_service import job_fetcher_service
+from app.services.progress_service import progress_service
 from app.models import (
-    SyncJobsRequest, SyncJobsResponse, UpdateJobStatusRequest,
-    FetchedJobResponse, FetchedJobListResponse,
-    FetchRunResponse, FetchRunListResponse,
-    JobStatusUpdateResponse, JobStatus, Portal
+    SyncJobsRequest, SyncJobsResponse, ShardedSyncRequest, UpdateJobStatusRequest,
+    BatchSyncRequest, BatchSyncResponse, BatchSyncRun,
+    FetchedJobResponse, FetchedJobListResponse, JobStatsResponse,
+    FetchRunResponse, FetchRunListResponse, FetchRunProgressEvent,
+    JobStatusUpdateResponse, JobStatus, Portal,
+    FetchRunStatus, FetchRunEventType,
+    SavedSearchRequest, SavedSearchResponse, SavedSearchListResponse,
+    ApplyQueueClaimRequest, ApplyQueueClaimResponse, ApplyQueueJob,
+    ApplyQueueAckRequest, ApplyQueueNackRequest
 )
 
 router = APIRouter(prefix="/v1", tags=["Job Fetcher"])
@@ -26,12 +44,15 @@ router = APIRouter(prefix="/v1", tags=["Job Fetcher"])
 @router.post("/job-fetcher/sync", response_model=SyncJobsResponse)
 async def sync_jobs(
     request: SyncJobsRequest,
+    override: bool = Depends(admission_override),
+    profile: bool = Depends(profiling_requested),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Start a job fetching operation.
     Triggers the Apify LinkedIn scraper and stores results in the database.
     """
+    ticket = await _admit_sync(current_user.user_id, override)
     try:
         # Use LinkedIn as default portal for now
         portal = "linkedin"
@@ -44,7 +65,9 @@ async def sync_jobs(
             company_names=request.company_names,
             company_ids=request.company_ids,
             published_at=request.published_at,
-            rows=request.rows
+            rows=request.rows,
+            on_finish=ticket.release,
+            profile=profile
         )
         
         return SyncJobsResponse(
@@ -53,29 +76,171 @@ async def sync_jobs(
             message=f"Job fetch started for {portal}. Check /v1/job-fetcher/runs for status."
         )
         
+    except CircuitOpenError as e:
+        ticket.release()
+        raise _upstream_unavailable(e)
+    except Exception as e:
+        ticket.release()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/job-fetcher/sync/sharded", response_model=SyncJobsResponse)
+async def sync_jobs_sharded(
+    request: ShardedSyncRequest,
+    override: bool = Depends(admission_override),
+    profile: bool = Depends(profiling_requested),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Start a job fetch larger than one scraper run allows.
+    The request is split into shard runs that execute in parallel and are
+    merged into one parent run.
+    """
+    ticket = await _admit_sync(current_user.user_id, override)
+    try:
+        portal = "linkedin"
+        
+        run_record = await job_fetcher_service.start_sharded_fetch(
+            user_id=current_user.user_id,
+            title=request.title,
+            location=request.location,
+            locations=request.locations,
+            company_names=request.company_names,
+            company_ids=request.company_ids,
+            published_at=request.published_at,
+            total_rows=request.total_rows,
+            shard_by=request.shard_by,
+            max_concurrency=request.max_concurrency,
+            portal=portal,
+            on_finish=ticket.release,
+            profile=profile
+        )
+        
+        planned_rows = run_record["input_params"]["planned_rows"]
+        message = f"Sharded job fetch started for {portal}. Check /v1/job-fetcher/runs/{run_record['id']}/shards for shard status."
+        if planned_rows < request.total_rows:
+            message += (
+                f" Only {planned_rows} of {request.total_rows} rows can be fetched without overlap;"
+                " add locations or companyId values for more."
+            )
+        return SyncJobsResponse(
+            run_id=run_record["id"],
+            status="started",
+            message=message,
+            planned_rows=planned_rows
+        )
+        
+    except CircuitOpenError as e:
+        ticket.release()
+        raise _upstream_unavailable(e)
+    except Exception as e:
+        ticket.release()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/job-fetcher/sync/batch", response_model=BatchSyncResponse)
+async def sync_jobs_batch(
+    request: BatchSyncRequest,
+    override: bool = Depends(admission_override),
+    profile: bool = Depends(profiling_requested),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Start a job fetch for many searches at once.
+    Each search gets its own fetch run, but compatible searches share one
+    actor run, and the results are attributed back to each search.
+    Saved searches sync incrementally unless full=true.
+    """
+    saved_ids = list({str(search.saved_search_id) for search in request.searches if search.saved_search_id})
+    saved = {}
+    if saved_ids:
+        saved = {
+            search["id"]: search
+            for search in await db_service.get_saved_searches_by_id(current_user.user_id, saved_ids)
+        }
+        missing = [search_id for search_id in saved_ids if search_id not in saved]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Saved search not found: {', '.join(missing)}")
+    
+    searches = [
+        {"saved_search": saved[str(search.saved_search_id)]} if search.saved_search_id
+        else search.model_dump(exclude={"saved_search_id"})
+        for search in request.searches
+    ]
+    
+    ticket = await _admit_sync(current_user.user_id, override)
+    try:
+        batch_id, runs = await job_fetcher_service.start_batch_fetch(
+            user_id=current_user.user_id,
+            searches=searches,
+            portal="linkedin",
+            full=request.full,
+            on_finish=ticket.release,
+            profile=profile
+        )
+        
+        batch_runs = [
+            BatchSyncRun(
+                run_id=run["id"],
+                saved_search_id=run.get("saved_search_id"),
+                group=run["input_params"]["batch"]["group"]
+            )
+            for run in runs
+        ]
+        actor_runs = len({run.group for run in batch_runs})
+        return BatchSyncResponse(
+            batch_id=batch_id,
+            runs=batch_runs,
+            actor_runs=actor_runs,
+            status="started",
+            message=f"Batch job fetch started: {len(batch_runs)} searches in {actor_runs} actor runs."
+        )
+        
+    except CircuitOpenError as e:
+        ticket.release()
+        raise _upstream_unavailable(e)
     except Exception as e:
+        ticket.release()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/job-fetcher/sync-from-dataset")
 async def sync_from_dataset(
     dataset_id: str,
+    run_id: Optional[UUID] = None,
+    override: bool = Depends(admission_override),
+    profile: bool = Depends(profiling_requested),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Fetch jobs from an existing Apify dataset.
     Useful for testing without triggering a new scrape.
+    
+    Large datasets are ingested in checkpointed chunks. If the response has
+    status "running", call again with its run_id to continue.
     """
+    ticket = await _admit_sync(current_user.user_id, override)
     try:
-        result = await job_fetcher_service.fetch_from_existing_dataset(
-            user_id=current_user.user_id,
-            dataset_id=dataset_id,
-            portal="linkedin"
+        result = await run_profiled(
+            f"dataset-{dataset_id}",
+            job_fetcher_service.fetch_from_existing_dataset(
+                user_id=current_user.user_id,
+                dataset_id=dataset_id,
+                portal="linkedin",
+                run_id=str(run_id) if run_id else None
+            ),
+            enabled=profile
         )
         return result
         
+    except CircuitOpenError as e:
+        raise _upstream_unavailable(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        ticket.release()
 
 
 @router.get("/job-fetcher/runs", response_model=FetchRunListResponse)
@@ -88,6 +253,7 @@ async def get_fetch_runs(
 ):
     """
     Get paginated list of job fetch runs for the current user.
+    Shard runs of a sharded fetch are listed under their parent's /shards.
     """
     runs, total = await db_service.get_fetch_runs(
         user_id=current_user.user_id,
@@ -108,40 +274,292 @@ async def get_fetch_runs(
     )
 
 
+@router.get("/job-fetcher/runs/{run_id}/shards", response_model=FetchRunListResponse)
+async def get_fetch_run_shards(
+    run_id: UUID,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Get the shard runs of a sharded fetch run.
+    """
+    runs, total = await db_service.get_fetch_runs(
+        user_id=current_user.user_id,
+        parent_run_id=str(run_id),
+        page=page,
+        page_size=page_size
+    )
+    
+    total_pages = math.ceil(total / page_size) if total > 0 else 1
+    
+    return FetchRunListResponse(
+        runs=[FetchRunResponse(**run) for run in runs],
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=total_pages
+    )
+
+
+@router.get("/job-fetcher/runs/{run_id}/events")
+async def stream_fetch_run_events(
+    run_id: UUID,
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Stream progress events for a fetch run as Server-Sent Events.
+    The stream closes after the run's completed or failed event.
+    """
+    run = await db_service.get_fetch_run(
+        user_id=current_user.user_id,
+        run_id=str(run_id)
+    )
+    if not run:
+        raise HTTPException(status_code=404, detail="Fetch run not found")
+    
+    after_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    
+    return StreamingResponse(
+        _fetch_run_event_stream(request, current_user.user_id, run, after_seq),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _fetch_run_event_stream(
+    request: Request,
+    user_id: str,
+    run: dict,
+    after_seq: int
+):
+    """Yield SSE frames for a run from the in-process bus, or from the DB row as a fallback."""
+    settings = get_settings()
+    run_id = str(run["id"])
+    
+    if progress_service.is_tracked(run_id):
+        events = progress_service.subscribe(run_id, after_seq=after_seq)
+        pending = None
+        try:
+            while True:
+                # Wait without cancelling the subscription so keepalives don't drop events
+                if pending is None:
+                    pending = asyncio.ensure_future(events.__anext__())
+                done, _ = await asyncio.wait({pending}, timeout=settings.sse_keepalive_seconds)
+                if not done:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                try:
+                    progress_event = pending.result()
+                except StopAsyncIteration:
+                    return
+                pending = None
+                yield _format_sse(progress_event)
+        finally:
+            if pending is not None:
+                pending.cancel()
+                try:
+                    await pending
+                except (asyncio.CancelledError, StopAsyncIteration):
+                    pass
+            await events.aclose()
+    
+    # The run is not executing on this instance: fall back to watching its row
+    seq = after_seq
+    while True:
+        if run["status"] != FetchRunStatus.RUNNING.value:
+            seq += 1
+            is_failed = run["status"] == FetchRunStatus.FAILED.value
+            yield _format_sse(FetchRunProgressEvent(
+                seq=seq,
+                run_id=run_id,
+                event=FetchRunEventType.FAILED if is_failed else FetchRunEventType.COMPLETED,
+                timestamp=datetime.utcnow(),
+                data={
+                    "jobs_found": run.get("jobs_found", 0),
+                    "new_jobs_added": run.get("new_jobs_added", 0),
+                    "errors_json": run.get("errors_json")
+                }
+            ))
+            return
+        
+        await asyncio.sleep(settings.sse_poll_interval)
+        if await request.is_disconnected():
+            return
+        yield ": keepalive\n\n"
+        run = await db_service.get_fetch_run(user_id=user_id, run_id=run_id) or run
+
+
+def _format_sse(progress_event: FetchRunProgressEvent) -> str:
+    """Serialize a progress event as an SSE frame."""
+    payload = json.dumps(progress_event.model_dump(mode="json"))
+    return f"id: {progress_event.seq}\nevent: {progress_event.event.value}\ndata: {payload}\n\n"
+
+
+# ============================================
+# Saved Searches Endpoints
+# ============================================
+
+@router.post("/saved-searches", response_model=SavedSearchResponse)
+async def create_saved_search(
+    request: SavedSearchRequest,
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Save a search for recurring, incremental syncs.
+    """
+    search = await db_service.create_saved_search(
+        user_id=current_user.user_id,
+        search_data=request.model_dump(mode="json")
+    )
+    if not search:
+        raise HTTPException(status_code=500, detail="Failed to create saved search")
+    
+    return SavedSearchResponse(**search)
+
+
+@router.get("/saved-searches", response_model=SavedSearchListResponse)
+async def get_saved_searches(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Get paginated list of saved searches for the current user.
+    """
+    searches, total = await db_service.get_saved_searches(
+        user_id=current_user.user_id,
+        page=page,
+        page_size=page_size
+    )
+    
+    total_pages = math.ceil(total / page_size) if total > 0 else 1
+    
+    return SavedSearchListResponse(
+        searches=[SavedSearchResponse(**search) for search in searches],
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=total_pages
+    )
+
+
+@router.delete("/saved-searches/{search_id}")
+async def delete_saved_search(
+    search_id: UUID,
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Delete a saved search.
+    """
+    search = await db_service.delete_saved_search(
+        user_id=current_user.user_id,
+        search_id=str(search_id)
+    )
+    if not search:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    
+    return {"id": search["id"], "message": "Saved search deleted"}
+
+
+@router.post("/saved-searches/{search_id}/sync", response_model=SyncJobsResponse)
+async def sync_saved_search(
+    search_id: UUID,
+    full: bool = False,
+    override: bool = Depends(admission_override),
+    profile: bool = Depends(profiling_requested),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Sync a saved search incrementally.
+    Only postings newer than the search's high-water mark are requested and stored;
+    pass full=true to fetch the whole window again.
+    """
+    search = await db_service.get_saved_search(
+        user_id=current_user.user_id,
+        search_id=str(search_id)
+    )
+    if not search:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    
+    ticket = await _admit_sync(current_user.user_id, override)
+    try:
+        run_record = await job_fetcher_service.sync_saved_search(
+            user_id=current_user.user_id,
+            saved_search=search,
+            full=full,
+            on_finish=ticket.release,
+            profile=profile
+        )
+        
+        return SyncJobsResponse(
+            run_id=run_record["id"],
+            status="started",
+            message=f"Incremental sync started. Check /v1/job-fetcher/runs/{run_record['id']}/events for progress."
+        )
+        
+    except CircuitOpenError as e:
+        ticket.release()
+        raise _upstream_unavailable(e)
+    except Exception as e:
+        ticket.release()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ============================================
 # Jobs Endpoints
 # ============================================
 
-@router.get("/jobs", response_model=FetchedJobListResponse)
+@router.get("/jobs", response_model=FetchedJobListResponse, dependencies=[Depends(profile_request)])
 async def get_jobs(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     portal: Optional[List[str]] = Query(None),
     status: Optional[List[str]] = Query(None),
+    work_type: Optional[List[str]] = Query(None),
+    experience_level: Optional[List[str]] = Query(None),
     q: Optional[str] = None,
     location: Optional[str] = None,
     min_lpa: Optional[float] = None,
     company: Optional[str] = None,
     sort: str = Query("fetched_at", regex="^(fetched_at|match_score|posted_at|title|company)$"),
     sort_desc: bool = True,
+    facets: Optional[str] = Query(None, description="Comma-separated dimensions to count, e.g. status,portal"),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get paginated list of fetched jobs for the current user.
-    Supports filtering by portal, status, location, company, and search query.
+    Supports filtering by portal, status, work type, experience level,
+    location, company, and search query. facets adds per-value counts for
+    the same filters, each dimension ignoring its own filter.
     """
-    jobs, total = await db_service.get_jobs(
+    dimensions = [name.strip() for name in facets.split(",") if name.strip()] if facets else []
+    unknown = [name for name in dimensions if name not in FACET_DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown facets {unknown}; must be among: {list(FACET_DIMENSIONS)}"
+        )
+    
+    jobs, total, counts = await db_service.list_jobs(
         user_id=current_user.user_id,
+        facets=list(dict.fromkeys(dimensions)),
+        page=page,
+        page_size=page_size,
+        sort=sort,
+        sort_desc=sort_desc,
         portal=portal,
         status=status,
+        work_type=work_type,
+        experience_level=experience_level,
         location=location,
         min_lpa=min_lpa,
         company=company,
-        q=q,
-        page=page,
-        page_size=page_size,
-        sort=sort,
-        sort_desc=sort_desc
+        q=q
     )
     
     total_pages = math.ceil(total / page_size) if total > 0 else 1
@@ -151,10 +569,23 @@ async def get_jobs(
         total=total,
         page=page,
         page_size=page_size,
-        total_pages=total_pages
+        total_pages=total_pages,
+        facets=counts
     )
 
 
+@router.get("/jobs/stats", response_model=JobStatsResponse)
+async def get_job_stats(
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Get dashboard counters: jobs by status and portal, and jobs added today.
+    Read from per-user stats kept current by database triggers.
+    """
+    stats = await db_service.get_job_stats(current_user.user_id)
+    return JobStatsResponse(**stats)
+
+
 @router.get("/jobs/{job_id}", response_model=FetchedJobResponse)
 async def get_job(
     job_id: UUID,
@@ -207,6 +638,192 @@ async def update_job_status(
     )
 
 
+# ============================================
+# Admin Endpoints
+# ============================================
+
+@router.get("/admin/resilience")
+async def get_resilience_metrics(
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    Rate limiter, retry and circuit breaker metrics per upstream (Apify, Supabase).
+    """
+    return resilience_snapshot()
+
+
+@router.get("/admin/admission")
+async def get_admission_state(
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    In-flight and queued sync counts and per-user limit overrides on this instance.
+    """
+    return admission_controller.snapshot()
+
+
+@router.put("/admin/admission/users/{user_id}")
+async def set_admission_override(
+    user_id: UUID,
+    limits: AdmissionLimits,
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    Override a user's sync admission limits on this instance.
+    Set exempt=true to lift them entirely.
+    """
+    admission_controller.set_override(str(user_id), limits)
+    return {"user_id": str(user_id), "limits": limits}
+
+
+@router.delete("/admin/admission/users/{user_id}")
+async def clear_admission_override(
+    user_id: UUID,
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    Restore a user's default sync admission limits.
+    """
+    admission_controller.set_override(str(user_id), None)
+    return {"user_id": str(user_id), "limits": admission_controller.limits_for(str(user_id))}
+
+
+@router.get("/admin/metrics", response_class=PlainTextResponse)
+async def get_metrics(current_user: CurrentUser = Depends(require_admin)):
+    """
+    Fetch run, stage, Apify and upstream-guard metrics for this instance,
+    in Prometheus/OpenMetrics text format.
+    """
+    return PlainTextResponse(
+        registry.render_prometheus(),
+        media_type="application/openmetrics-text; version=1.0.0; charset=utf-8"
+    )
+
+
+async def _admit_sync(user_id: str, override: bool) -> AdmissionTicket:
+    """Admit a sync request, turning a rejection into 429 with Retry-After."""
+    try:
+        return await admission_controller.admit(user_id, override=override)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=e.reason, headers=retry_after_header(e))
+
+
+def _upstream_unavailable(error: CircuitOpenError) -> HTTPException:
+    """503 with Retry-After for calls rejected by an open circuit."""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
+
+
+# ============================================
+# Apply Queue (auto-apply workers)
+# ============================================
+
+@router.post("/admin/apply-queue/claim", response_model=ApplyQueueClaimResponse)
+async def claim_apply_jobs(
+    request: ApplyQueueClaimRequest,
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    Lease the next queued jobs, best match first, to a worker. Concurrent
+    claims never return the same job. A job whose lease runs out without an
+    ack or nack becomes claimable again.
+    """
+    settings = get_settings()
+    lease_seconds = request.lease_seconds or settings.apply_queue_lease_seconds
+    if lease_seconds > settings.apply_queue_max_lease_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"lease_seconds must be at most {settings.apply_queue_max_lease_seconds}"
+        )
+    
+    try:
+        jobs = await db_service.claim_apply_jobs(
+            worker_id=request.worker_id,
+            limit=request.limit,
+            lease_seconds=lease_seconds,
+            user_id=str(request.user_id) if request.user_id else None
+        )
+    except CircuitOpenError as e:
+        raise _upstream_unavailable(e)
+    
+    apply_queue_leases.inc(len(jobs), outcome="claimed")
+    return ApplyQueueClaimResponse(jobs=[ApplyQueueJob(**job) for job in jobs])
+
+
+@router.post("/admin/apply-queue/{job_id}/ack", response_model=JobStatusUpdateResponse)
+async def ack_apply_job(
+    job_id: UUID,
+    request: ApplyQueueAckRequest,
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    Record a leased job as applied. 409 if the lease is no longer held.
+    """
+    job = await _release_apply_job(job_id, request.user_id, request.lease_id, JobStatus.APPLIED)
+    apply_queue_leases.inc(outcome="acked")
+    return JobStatusUpdateResponse(id=job["id"], status=JobStatus.APPLIED, message="Job applied")
+
+
+@router.post("/admin/apply-queue/{job_id}/nack", response_model=JobStatusUpdateResponse)
+async def nack_apply_job(
+    job_id: UUID,
+    request: ApplyQueueNackRequest,
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """
+    Give a leased job back: requeued (claimable again after
+    retry_after_seconds), or skipped with requeue=false. 409 if the lease
+    is no longer held.
+    """
+    status = JobStatus.QUEUED if request.requeue else JobStatus.SKIPPED
+    retry_at = None
+    if request.requeue and request.retry_after_seconds:
+        retry_at = datetime.utcnow() + timedelta(seconds=request.retry_after_seconds)
+    
+    job = await _release_apply_job(
+        job_id, request.user_id, request.lease_id, status, retry_at=retry_at, error=request.error
+    )
+    apply_queue_leases.inc(outcome="nacked")
+    return JobStatusUpdateResponse(
+        id=job["id"],
+        status=status,
+        message="Job requeued" if request.requeue else "Job skipped"
+    )
+
+
+async def _release_apply_job(
+    job_id: UUID,
+    user_id: UUID,
+    lease_id: UUID,
+    status: JobStatus,
+    retry_at: Optional[datetime] = None,
+    error: Optional[str] = None
+) -> dict:
+    """End a lease, turning a lost lease into 409."""
+    try:
+        job = await db_service.release_apply_job(
+            user_id=str(user_id),
+            job_id=str(job_id),
+            lease_id=str(lease_id),
+            status=status,
+            retry_at=retry_at,
+            error=error
+        )
+    except CircuitOpenError as e:
+        raise _upstream_unavailable(e)
+    
+    if not job:
+        apply_queue_leases.inc(outcome="lost")
+        raise HTTPException(
+            status_code=409,
+            detail="Lease not held: it expired and the job was claimed again, or the job left the queue"
+        )
+    return job
+
+
 # ============================================
 # Health Check
 # ============================================
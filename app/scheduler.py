@@ -0,0 +1,141 @@
+"""
+Job Fetcher Stack - Sync Scheduler
+Plans and runs recurring saved-search syncs.
+
+Run as a scheduled Lambda (app.scheduler.handler) or as a long-lived
+process (python -m app.scheduler).
+"""
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from app.config import get_settings
+from app.database import db_service
+from app.services.job_fetcher_service import job_fetcher_service
+import asyncio
+import logging
+import random
+
+
+logger = logging.getLogger(__name__)
+
+
+class SyncScheduler:
+    """Claims due saved searches and runs their syncs within global limits."""
+
+    def __init__(self):
+        self.settings = get_settings()
+
+    async def plan(self, now: Optional[datetime] = None, max_runs: Optional[int] = None) -> List[dict]:
+        """
+        Claim the saved searches to sync this tick.
+        Stops at max_runs (at most the per-tick run budget) and the row
+        budget; searches synced recently (e.g. manually) are rescheduled
+        without running.
+        """
+        now = now or datetime.now(timezone.utc)
+        max_runs = min(max_runs or self.settings.scheduler_max_runs_per_tick, self.settings.scheduler_max_runs_per_tick)
+        due = await db_service.get_due_saved_searches(limit=max_runs * 2)
+
+        planned = []
+        rows_budget = self.settings.scheduler_rows_budget_per_tick
+        for search in due:
+            if len(planned) >= max_runs:
+                break
+
+            interval = timedelta(minutes=search.get("sync_interval_minutes") or 360)
+            last_synced_at = self._parse_timestamp(search.get("last_synced_at"))
+            is_fresh = last_synced_at is not None and now - last_synced_at < interval
+
+            rows = search.get("rows") or 50
+            if not is_fresh and rows > rows_budget:
+                # Leave it due so the next tick picks it up first
+                continue
+
+            base = last_synced_at if is_fresh else now
+            claimed = await db_service.claim_saved_search(
+                search_id=search["id"],
+                previous_next_sync_at=search.get("next_sync_at"),
+                next_sync_at=(base + self._jittered(interval)).isoformat()
+            )
+            if not claimed or is_fresh:
+                continue
+
+            rows_budget -= rows
+            planned.append(search)
+
+        return planned
+
+    async def run_tick(self) -> dict:
+        """Plan and run one tick of scheduled syncs. Returns a summary."""
+        stale_cutoff = datetime.utcnow() - timedelta(minutes=self.settings.stale_run_minutes)
+        running = await db_service.count_running_fetch_runs(started_after=stale_cutoff)
+        slots = self.settings.scheduler_max_concurrency - running
+        if slots <= 0:
+            logger.info("Scheduler tick skipped: %d fetch runs already in flight", running)
+            return {"planned": 0, "succeeded": 0, "failed": 0, "running": running}
+
+        # Claim only what runs at once: an actor run takes minutes, so a second
+        # wave would not finish within the Lambda timeout, and searches claimed
+        # but never run would wait a full interval. The rest stay due.
+        planned = await self.plan(max_runs=slots)
+
+        async def run_one(search: dict) -> bool:
+            # Spread starts across the tick instead of firing them together
+            await asyncio.sleep(random.uniform(0, self.settings.scheduler_spread_seconds))
+            try:
+                await job_fetcher_service.sync_saved_search(
+                    user_id=search["user_id"],
+                    saved_search=search,
+                    background=False,
+                    profile=self.settings.profiling_enabled
+                )
+                return True
+            except Exception as e:
+                logger.warning("Scheduled sync failed for saved search %s: %s", search["id"], e)
+                return False
+
+        results = await asyncio.gather(*(run_one(search) for search in planned))
+        summary = {
+            "planned": len(planned),
+            "succeeded": sum(results),
+            "failed": len(results) - sum(results),
+            "running": running
+        }
+        logger.info("Scheduler tick finished: %s", summary)
+        return summary
+
+    async def run_forever(self):
+        """Run ticks back to back, for a long-lived scheduler process."""
+        while True:
+            try:
+                await self.run_tick()
+            except Exception as e:
+                logger.exception("Scheduler tick failed: %s", e)
+            await asyncio.sleep(self._jittered(
+                timedelta(seconds=self.settings.scheduler_tick_seconds)
+            ).total_seconds())
+
+    def _jittered(self, interval: timedelta) -> timedelta:
+        """Apply +/- scheduler_jitter_fraction of random jitter to an interval."""
+        fraction = self.settings.scheduler_jitter_fraction
+        return interval * random.uniform(1 - fraction, 1 + fraction)
+
+    def _parse_timestamp(self, value: Optional[str]) -> Optional[datetime]:
+        """Parse a PostgREST timestamp, assuming UTC when no offset is present."""
+        if not value:
+            return None
+        parsed = datetime.fromisoformat(value)
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+# Singleton instance
+sync_scheduler = SyncScheduler()
+
+
+def handler(event, context):
+    """AWS Lambda entry point for the scheduled sync rule."""
+    return asyncio.run(sync_scheduler.run_tick())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(sync_scheduler.run_forever())
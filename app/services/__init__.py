@@ -1,5 +1,7 @@
 """Services package."""
 from app.services.apify_service import apify_service
+from app.services.expiry_service import expiry_service
 from app.services.job_fetcher_service import job_fetcher_service
+from app.services.progress_service import progress_service
 
-__all__ = ["apify_service", "job_fetcher_service"]
+__all__ = ["apify_service", "expiry_service", "job_fetcher_service", "progress_service"]
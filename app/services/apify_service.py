@@ -2,21 +2,69 @@
 Job Fetcher Stack - Apify LinkedIn Service
 """
 import httpx
-from typing import List, Optional
+from typing import List, Optional, Callable, Tuple
 from app.config import get_settings
-from app.models import ApifyJobResult
+from app.models import ApifyJobResult, FetchRunEventType
+from app.metrics import (
+    StageTimings, time_stage, apify_requests, apify_request_seconds,
+    apify_polls, apify_items_invalid
+)
+from app.archive import dataset_archive
+from app.executor import cpu_executor
+from app.resilience import apify_guard
+from app.transforms import parse_items
 import asyncio
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
 
 
 class ApifyService:
     """Service for interacting with Apify LinkedIn Jobs Scraper."""
     
-    BASE_URL = "https://api.apify.com/v2"
-    
     def __init__(self):
         self.settings = get_settings()
+        self.base_url = self.settings.apify_base_url.rstrip("/")
         self.token = self.settings.apify_api_token
         self.actor_id = self.settings.apify_actor_id
+        self.replay = self.settings.dataset_replay
+    
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        timeout: float,
+        endpoint: str,
+        idempotent: bool = True,
+        params: Optional[dict] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request to the Apify API through the Apify rate limiter,
+        retry policy and circuit breaker.
+        endpoint is a low-cardinality name used as the metrics label.
+        """
+        async def send() -> httpx.Response:
+            start = time.perf_counter()
+            status = "error"
+            try:
+                async with httpx.AsyncClient(timeout=timeout) as client:
+                    response = await client.request(
+                        method,
+                        f"{self.base_url}{path}",
+                        params={"token": self.token, **(params or {})},
+                        **kwargs
+                    )
+                status = str(response.status_code)
+                response.raise_for_status()
+                return response
+            finally:
+                apify_requests.inc(endpoint=endpoint, status=status)
+                apify_request_seconds.observe(time.perf_counter() - start, endpoint=endpoint)
+        
+        return await apify_guard.call(send, idempotent=idempotent)
     
     async def run_linkedin_scraper(
         self,
@@ -51,40 +99,44 @@ class ApifyService:
         if published_at:
             input_data["publishedAt"] = published_at
         
-        # Start the actor
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{self.BASE_URL}/acts/{self.actor_id}/runs",
-                params={"token": self.token},
-                json=input_data
-            )
-            response.raise_for_status()
-            return response.json()
+        # Start the actor (not retried once Apify may have accepted it)
+        response = await self._request(
+            "POST",
+            f"/acts/{self.actor_id}/runs",
+            timeout=60.0,
+            endpoint="actor_run_start",
+            idempotent=False,
+            json=input_data
+        )
+        return response.json()
     
     async def get_run_status(self, run_id: str) -> dict:
         """Get the status of an actor run."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{self.BASE_URL}/actor-runs/{run_id}",
-                params={"token": self.token}
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._request(
+            "GET", f"/actor-runs/{run_id}", timeout=30.0, endpoint="actor_run_status"
+        )
+        return response.json()
     
     async def wait_for_run_completion(
         self, 
         run_id: str, 
         poll_interval: int = 5,
-        max_wait: int = 300
+        max_wait: int = 300,
+        on_poll: Optional[Callable[[str, int], None]] = None
     ) -> dict:
         """
         Poll until the run is complete.
         Returns the final run status.
+        on_poll, if given, is called with (actor status, elapsed seconds) after each poll.
         """
         elapsed = 0
         while elapsed < max_wait:
             status = await self.get_run_status(run_id)
             run_status = status.get("data", {}).get("status")
+            apify_polls.inc(status=run_status or "unknown")
+            
+            if on_poll:
+                on_poll(run_status, elapsed)
             
             if run_status in ["SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"]:
                 return status
@@ -94,7 +146,11 @@ class ApifyService:
         
         raise TimeoutError(f"Run {run_id} did not complete within {max_wait} seconds")
     
-    async def get_run_results(self, run_id: str) -> List[ApifyJobResult]:
+    async def get_run_results(
+        self,
+        run_id: str,
+        timings: Optional[StageTimings] = None
+    ) -> List[ApifyJobResult]:
         """
         Get the results from a completed run.
         Returns list of parsed job results.
@@ -106,27 +162,7 @@ class ApifyService:
         if not dataset_id:
             raise ValueError(f"No dataset found for run {run_id}")
         
-        # Fetch results from the dataset
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(
-                f"{self.BASE_URL}/datasets/{dataset_id}/items",
-                params={"token": self.token}
-            )
-            response.raise_for_status()
-            raw_results = response.json()
-        
-        # Parse into our model
-        jobs = []
-        for item in raw_results:
-            try:
-                job = ApifyJobResult(**item)
-                jobs.append(job)
-            except Exception as e:
-                # Log but don't fail on individual parse errors
-                print(f"Failed to parse job: {e}")
-                continue
-        
-        return jobs
+        return await self.get_dataset_results_direct(dataset_id, timings=timings)
     
     async def fetch_jobs_sync(
         self,
@@ -135,53 +171,146 @@ class ApifyService:
         company_names: Optional[List[str]] = None,
         company_ids: Optional[List[str]] = None,
         published_at: Optional[str] = None,
-        rows: int = 50
+        rows: int = 50,
+        on_progress: Optional[Callable[..., None]] = None,
+        timings: Optional[StageTimings] = None
     ) -> List[ApifyJobResult]:
         """
         Run the scraper and wait for results.
         This is the main method to use for synchronous fetching.
+        on_progress, if given, is called as on_progress(event_type, **data)
+        when the actor starts, on each status poll and once items are downloaded.
+        timings, if given, records the actor_start, actor_wait, dataset_download
+        and validation stages.
         """
         # Start the run
-        run_info = await self.run_linkedin_scraper(
-            title=title,
-            location=location,
-            company_names=company_names,
-            company_ids=company_ids,
-            published_at=published_at,
-            rows=rows
-        )
+        with time_stage(timings, "actor_start"):
+            run_info = await self.run_linkedin_scraper(
+                title=title,
+                location=location,
+                company_names=company_names,
+                company_ids=company_ids,
+                published_at=published_at,
+                rows=rows
+            )
         
         run_id = run_info.get("data", {}).get("id")
         if not run_id:
             raise ValueError("Failed to start Apify actor run")
         
+        if on_progress:
+            on_progress(FetchRunEventType.ACTOR_STARTED, actor_run_id=run_id)
+        
         # Wait for completion
-        await self.wait_for_run_completion(run_id)
+        on_poll = None
+        if on_progress:
+            on_poll = lambda actor_status, elapsed: on_progress(
+                FetchRunEventType.ACTOR_POLLING,
+                actor_run_id=run_id,
+                actor_status=actor_status,
+                elapsed_seconds=elapsed
+            )
+        with time_stage(timings, "actor_wait"):
+            await self.wait_for_run_completion(run_id, on_poll=on_poll)
         
         # Get results
-        return await self.get_run_results(run_id)
+        jobs = await self.get_run_results(run_id, timings=timings)
+        
+        if on_progress:
+            on_progress(FetchRunEventType.ITEMS_DOWNLOADED, items=len(jobs))
+        
+        return jobs
     
-    async def get_dataset_results_direct(self, dataset_id: str) -> List[ApifyJobResult]:
+    async def get_dataset_results_direct(
+        self,
+        dataset_id: str,
+        timings: Optional[StageTimings] = None
+    ) -> List[ApifyJobResult]:
         """
         Get results directly from a known dataset ID.
         Useful for testing with existing datasets.
+        Always downloads: a live run's fresh dataset can't be in the archive,
+        so DATASET_REPLAY only applies to get_dataset_page (dataset ingest).
         """
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(
-                f"{self.BASE_URL}/datasets/{dataset_id}/items",
-                params={"token": self.token}
+        with time_stage(timings, "dataset_download"):
+            response = await self._request(
+                "GET", f"/datasets/{dataset_id}/items", timeout=60.0, endpoint="dataset_items"
             )
-            response.raise_for_status()
             raw_results = response.json()
+        await self._archive(dataset_id, 0, raw_results)
+        
+        with time_stage(timings, "validation"):
+            jobs = await self._parse_items(raw_results)
         
+        if timings:
+            timings.count("items_downloaded", len(raw_results))
+            timings.count("items_invalid", len(raw_results) - len(jobs))
+        
+        return jobs
+    
+    async def get_dataset_page(
+        self,
+        dataset_id: str,
+        offset: int,
+        limit: int,
+        timings: Optional[StageTimings] = None
+    ) -> Tuple[List[ApifyJobResult], int, Optional[int]]:
+        """
+        Get one page of a dataset's items, the items at dataset offsets
+        offset to offset + limit. Empty items aren't skipped (no clean=true),
+        so offsets stay the dataset's own and a short page only comes at the end.
+        Returns (valid jobs, raw items read, total items in the dataset if reported).
+        In replay mode the total is the number of archived items.
+        """
+        if self.replay:
+            with time_stage(timings, "archive_read"):
+                raw_results, total = await asyncio.to_thread(dataset_archive.read, dataset_id, offset, limit)
+        else:
+            with time_stage(timings, "dataset_download"):
+                response = await self._request(
+                    "GET",
+                    f"/datasets/{dataset_id}/items",
+                    timeout=60.0,
+                    endpoint="dataset_items",
+                    params={"offset": offset, "limit": limit}
+                )
+                raw_results = response.json()
+            total = response.headers.get("X-Apify-Pagination-Total")
+            total = int(total) if total is not None else None
+            await self._archive(dataset_id, offset, raw_results)
+        
+        with time_stage(timings, "validation"):
+            jobs = await self._parse_items(raw_results)
+        
+        if timings:
+            timings.count("items_downloaded", len(raw_results))
+            timings.count("items_invalid", len(raw_results) - len(jobs))
+        
+        return jobs, len(raw_results), total
+    
+    async def _archive(self, dataset_id: str, offset: int, raw_results: List[dict]):
+        """Append downloaded items to the dataset archive, if enabled. Never fails the download."""
+        if not dataset_archive.enabled or not raw_results:
+            return
+        try:
+            await asyncio.to_thread(dataset_archive.append, dataset_id, offset, raw_results)
+        except Exception:
+            logger.warning("Failed to archive dataset %s at offset %d", dataset_id, offset, exc_info=True)
+    
+    async def _parse_items(self, raw_results: List[dict]) -> List[ApifyJobResult]:
+        """
+        Validate dataset items into ApifyJobResult, skipping invalid ones.
+        Very large pages are validated on the CPU executor, off the event loop.
+        """
         jobs = []
-        for item in raw_results:
-            try:
-                job = ApifyJobResult(**item)
-                jobs.append(job)
-            except Exception as e:
-                print(f"Failed to parse job: {e}")
-                continue
+        async for valid, errors in cpu_executor.map(
+            parse_items, raw_results, self.settings.cpu_executor_batch_size, auto_offload=True
+        ):
+            jobs.extend(valid)
+            for error in errors:
+                # Log but don't fail on individual parse errors
+                apify_items_invalid.inc()
+                logger.warning("Failed to parse job: %s", error)
         
         return jobs
 
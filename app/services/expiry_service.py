@@ -0,0 +1,70 @@
+"""
+Job Fetcher Stack - Job Expiry Service
+Marks stale jobs expired and moves old expired/skipped jobs to the archive
+table, in batches, so user_jobs only carries live rows. Catalog postings
+no user links to any more are pruned afterwards.
+
+Run as a scheduled Lambda (app.services.expiry_service.handler) or once
+from the command line (python -m app.services.expiry_service).
+"""
+from typing import Awaitable, Callable
+from app.config import get_settings
+from app.database import db_service
+import asyncio
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryService:
+    """Batched expiry and archival of fetched jobs."""
+
+    def __init__(self):
+        self.settings = get_settings()
+
+    async def run(self) -> dict:
+        """Expire stale jobs, archive old ones, then prune orphaned catalog jobs. Returns counts."""
+        expired = await self._in_batches(lambda: db_service.expire_stale_jobs(
+            max_age_days=self.settings.expiry_max_age_days,
+            missing_days=self.settings.expiry_missing_days,
+            batch_size=self.settings.expiry_batch_size
+        ))
+        archived = await self._in_batches(lambda: db_service.archive_jobs(
+            older_than_days=self.settings.archive_after_days,
+            batch_size=self.settings.expiry_batch_size
+        ))
+        pruned = await self._in_batches(lambda: db_service.prune_job_catalog(
+            older_than_days=self.settings.archive_after_days,
+            batch_size=self.settings.expiry_batch_size
+        ))
+        summary = {"expired": expired, "archived": archived, "pruned": pruned}
+        logger.info("Job expiry finished: %s", summary)
+        return summary
+
+    async def _in_batches(self, run_batch: Callable[[], Awaitable[int]]) -> int:
+        """
+        Repeat a batch until it comes back short or the per-run cap is hit.
+        Short transactions keep row locks brief on the hot table.
+        """
+        total = 0
+        for _ in range(self.settings.expiry_max_batches):
+            count = await run_batch()
+            total += count
+            if count < self.settings.expiry_batch_size:
+                break
+        return total
+
+
+# Singleton instance
+expiry_service = ExpiryService()
+
+
+def handler(event, context):
+    """AWS Lambda entry point for the scheduled expiry rule."""
+    return asyncio.run(expiry_service.run())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(expiry_service.run()))
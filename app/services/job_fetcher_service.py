@@ -2,12 +2,46 @@
 Job Fetcher Stack - Job Fetcher Service
 Orchestrates the job fetching process.
 """
-from typing import Optional, List
-from uuid import UUID
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
 from app.services.apify_service import apify_service
+from app.services.progress_service import progress_service
+from app.config import get_settings
 from app.database import db_service
-from app.models import FetchRunStatus, ApifyJobResult
+from app.executor import cpu_executor
+from app.bloom import BloomFilter
+from app.metrics import StageTimings, time_stage, fetch_jobs_processed
+from app.profiling import run_profiled
+from app.models import FetchRunStatus, FetchRunEventType, ApifyJobResult, ShardStrategy
+from app.transforms import prepare_jobs
+from functools import partial
+from datetime import date, datetime
 import asyncio
+import logging
+import math
+import re
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+# Jobs written per batched upsert; a rows_written progress event follows each batch
+STORE_BATCH_SIZE = 50
+
+# LinkedIn publishedAt filters, narrowest first: (days covered, actor code)
+PUBLISHED_AT_WINDOWS = [(1, "r86400"), (7, "r604800"), (30, "r2592000")]
+
+# How many recently seen external job IDs a saved search remembers
+HIGH_WATER_ID_LIMIT = 200
+
+# Search filters carried from a batch sync search to its fetch run
+BATCH_FILTER_KEYS = ("title", "location", "company_names", "company_ids", "published_at")
+
+
+def _fold(value: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of a search filter or company name."""
+    return (value or "").strip().casefold()
 
 
 class JobFetcherService:
@@ -22,11 +56,21 @@ class JobFetcherService:
         company_names: Optional[List[str]] = None,
         company_ids: Optional[List[str]] = None,
         published_at: Optional[str] = None,
-        rows: int = 50
+        rows: int = 50,
+        saved_search: Optional[dict] = None,
+        incremental: bool = True,
+        background: bool = True,
+        on_finish: Optional[Callable[[], None]] = None,
+        profile: bool = False
     ) -> dict:
         """
         Start a job fetching operation.
         Creates a fetch run record and starts the Apify scraper.
+        When saved_search is given, its high-water mark is advanced after the run
+        and, if incremental, only postings past the mark are stored.
+        With background=False the fetch is awaited before returning.
+        on_finish is called once the fetch has completed or failed.
+        With profile set, the fetch is stack-sampled and the profile saved.
         """
         # Create fetch run record
         input_params = {
@@ -37,35 +81,101 @@ class JobFetcherService:
             "published_at": published_at,
             "rows": rows
         }
+        if saved_search and incremental:
+            # Incremental runs skip older postings, so they are not evidence a job went away
+            input_params["incremental"] = True
         
         run_record = await db_service.create_fetch_run(
             user_id=user_id,
             portal=portal,
-            input_params=input_params
+            input_params=input_params,
+            saved_search_id=saved_search["id"] if saved_search else None
         )
         
         if not run_record:
             raise Exception("Failed to create fetch run record")
         
         run_id = run_record["id"]
+        progress_service.publish(run_id, FetchRunEventType.RUN_STARTED, portal=portal, rows=rows)
+        
+        fetch = self._execute_fetch(
+            run_id=run_id,
+            user_id=user_id,
+            title=title,
+            location=location,
+            company_names=company_names,
+            company_ids=company_ids,
+            published_at=published_at,
+            rows=rows,
+            saved_search=saved_search,
+            incremental=incremental
+        )
+        if profile:
+            fetch = run_profiled(f"fetch-run-{run_id}", fetch)
+        
+        return await self._launch(fetch, run_record, background, on_finish)
+    
+    async def _launch(
+        self,
+        fetch: Awaitable[None],
+        run_record: Any,
+        background: bool,
+        on_finish: Optional[Callable[[], None]]
+    ) -> Any:
+        """
+        Await the fetch, or start it as a background task; on_finish runs
+        either way. Returns run_record.
+        """
+        if not background:
+            try:
+                await fetch
+            finally:
+                if on_finish:
+                    on_finish()
+            return run_record
         
         # Start background task for fetching
         # In Lambda, we'll need to handle this differently (Step Functions, SQS, etc.)
-        asyncio.create_task(
-            self._execute_fetch(
-                run_id=run_id,
-                user_id=user_id,
-                title=title,
-                location=location,
-                company_names=company_names,
-                company_ids=company_ids,
-                published_at=published_at,
-                rows=rows
-            )
-        )
+        task = asyncio.create_task(fetch)
+        if on_finish:
+            task.add_done_callback(lambda _: on_finish())
         
         return run_record
     
+    async def sync_saved_search(
+        self,
+        user_id: str,
+        saved_search: dict,
+        full: bool = False,
+        background: bool = True,
+        on_finish: Optional[Callable[[], None]] = None,
+        profile: bool = False
+    ) -> dict:
+        """
+        Start an incremental sync for a saved search.
+        Narrows publishedAt to the window since the search's high-water mark
+        unless full is set.
+        """
+        published_at = saved_search.get("published_at")
+        if not full:
+            published_at = self._incremental_published_at(saved_search)
+        
+        return await self.start_fetch(
+            user_id=user_id,
+            portal=saved_search.get("portal") or "linkedin",
+            title=saved_search.get("title"),
+            location=saved_search.get("location"),
+            company_names=saved_search.get("company_names"),
+            company_ids=saved_search.get("company_ids"),
+            published_at=published_at,
+            rows=saved_search.get("rows") or 50,
+            saved_search=saved_search,
+            incremental=not full,
+            background=background,
+            on_finish=on_finish,
+            profile=profile
+        )
+    
     async def _execute_fetch(
         self,
         run_id: str,
@@ -75,12 +185,15 @@ class JobFetcherService:
         company_names: Optional[List[str]] = None,
         company_ids: Optional[List[str]] = None,
         published_at: Optional[str] = None,
-        rows: int = 50
+        rows: int = 50,
+        saved_search: Optional[dict] = None,
+        incremental: bool = True
     ):
         """
         Execute the actual job fetching in the background.
         This runs the Apify scraper and stores results in the database.
         """
+        timings = StageTimings("sync")
         try:
             # Fetch jobs from Apify
             jobs = await apify_service.fetch_jobs_sync(
@@ -89,100 +202,888 @@ class JobFetcherService:
                 company_names=company_names,
                 company_ids=company_ids,
                 published_at=published_at,
-                rows=rows
+                rows=rows,
+                on_progress=partial(progress_service.publish, run_id),
+                timings=timings
             )
+            await self._complete_fetch(run_id, user_id, jobs, saved_search, incremental, timings)
             
-            # Store jobs in database
-            new_jobs_count = 0
-            for job in jobs:
-                _, is_new = await db_service.upsert_job(
+        except Exception as e:
+            await self._fail_fetch(run_id, user_id, e, timings)
+            raise
+    
+    async def _complete_fetch(
+        self,
+        run_id: str,
+        user_id: str,
+        jobs: List[ApifyJobResult],
+        saved_search: Optional[dict],
+        incremental: bool,
+        timings: StageTimings,
+        known: Optional[BloomFilter] = None,
+        stored: Optional[Dict[frozenset, int]] = None
+    ):
+        """
+        Store a run's scraped jobs, advance its saved search and mark it completed.
+        stored maps the job sets already written by other runs of a batch to
+        their new-job counts; a run storing the same jobs reuses the count
+        instead of writing them again.
+        """
+        # Skip postings already covered by the saved search's high-water mark
+        jobs_to_store = jobs
+        if saved_search and incremental:
+            with timings.stage("incremental_filter"):
+                jobs_to_store = self._filter_incremental(jobs, saved_search)
+                stored_ids = {db_service.get_external_job_id(job) for job in jobs_to_store}
+                known_ids = list({db_service.get_external_job_id(job) for job in jobs} - stored_ids)
+            if known_ids:
+                # Still listed, just not re-stored: keep them from expiring as missing
+                await db_service.touch_jobs_seen(user_id, "linkedin", known_ids)
+        
+        # Store jobs in database
+        stored_key = None
+        if stored is not None and jobs_to_store:
+            stored_key = frozenset(db_service.get_external_job_id(job) for job in jobs_to_store)
+        if stored_key is not None and stored_key in stored:
+            new_jobs_count = stored[stored_key]
+        else:
+            new_jobs_count = await self._store_jobs(
+                user_id=user_id,
+                run_id=run_id,
+                jobs=jobs_to_store,
+                portal="linkedin",
+                timings=timings,
+                known=known
+            )
+            if stored_key is not None:
+                stored[stored_key] = new_jobs_count
+        
+        if saved_search:
+            with timings.stage("watermark"):
+                await self._advance_watermark(saved_search, run_id, jobs)
+        
+        # Update fetch run as completed
+        await db_service.update_fetch_run(
+            run_id=run_id,
+            user_id=user_id,
+            status=FetchRunStatus.COMPLETED,
+            jobs_found=len(jobs),
+            new_jobs_added=new_jobs_count,
+            stage_timings=timings.to_dict()
+        )
+        timings.emit(FetchRunStatus.COMPLETED.value)
+        progress_service.publish(
+            run_id,
+            FetchRunEventType.COMPLETED,
+            jobs_found=len(jobs),
+            new_jobs_added=new_jobs_count
+        )
+    
+    async def _fail_fetch(self, run_id: str, user_id: str, error: Exception, timings: StageTimings):
+        """Mark a run failed with the error and the timings so far."""
+        logger.exception("Fetch run %s failed", run_id)
+        await db_service.update_fetch_run(
+            run_id=run_id,
+            user_id=user_id,
+            status=FetchRunStatus.FAILED,
+            errors_json={"error": str(error)},
+            stage_timings=timings.to_dict()
+        )
+        timings.emit(FetchRunStatus.FAILED.value)
+        progress_service.publish(run_id, FetchRunEventType.FAILED, error=str(error))
+    
+    async def _store_jobs(
+        self,
+        user_id: str,
+        run_id: str,
+        jobs: List[ApifyJobResult],
+        portal: str = "linkedin",
+        timings: Optional[StageTimings] = None,
+        known: Optional[BloomFilter] = None
+    ) -> int:
+        """
+        Upsert fetched jobs for a run in batches and publish rows_written progress.
+        known is the user's known-jobs filter; it is loaded here unless the
+        caller keeps one across calls. Returns the number of newly added jobs.
+        """
+        new_jobs_count = 0
+        if not jobs:
+            return new_jobs_count
+        with time_stage(timings, "db_write"):
+            owns_filter = known is None
+            if owns_filter:
+                known = await db_service.load_known_jobs_filter(user_id)
+            # Rows are mapped on the CPU executor while earlier batches are written
+            prepare = partial(prepare_jobs, portal=portal, scraped_at=datetime.utcnow().isoformat())
+            rows_written = 0
+            async for prepared in cpu_executor.map(prepare, jobs, STORE_BATCH_SIZE):
+                new_jobs_count += await db_service.upsert_jobs(
                     user_id=user_id,
                     fetch_run_id=run_id,
-                    job_data=job,
-                    portal="linkedin"
+                    prepared=prepared,
+                    portal=portal,
+                    known=known
+                )
+                rows_written = min(rows_written + STORE_BATCH_SIZE, len(jobs))
+                progress_service.publish(
+                    run_id,
+                    FetchRunEventType.ROWS_WRITTEN,
+                    rows_written=rows_written,
+                    total=len(jobs),
+                    new_jobs=new_jobs_count
+                )
+            if owns_filter and known.modified:
+                await db_service.save_known_jobs_filter(user_id, known)
+        
+        fetch_jobs_processed.inc(new_jobs_count, outcome="inserted")
+        fetch_jobs_processed.inc(len(jobs) - new_jobs_count, outcome="updated")
+        if timings:
+            timings.count("rows_written", len(jobs))
+            timings.count("new_jobs", new_jobs_count)
+        
+        return new_jobs_count
+    
+    # ============================================
+    # Sharded Sync
+    # ============================================
+    
+    async def start_sharded_fetch(
+        self,
+        user_id: str,
+        title: Optional[str] = None,
+        location: Optional[str] = None,
+        locations: Optional[List[str]] = None,
+        company_names: Optional[List[str]] = None,
+        company_ids: Optional[List[str]] = None,
+        published_at: Optional[str] = None,
+        total_rows: int = 500,
+        shard_by: ShardStrategy = ShardStrategy.AUTO,
+        max_concurrency: Optional[int] = None,
+        portal: str = "linkedin",
+        background: bool = True,
+        on_finish: Optional[Callable[[], None]] = None,
+        profile: bool = False
+    ) -> dict:
+        """
+        Start a scrape too large for one actor run. The request is split into
+        shards (see plan_shards) that run as child fetch runs of one parent run,
+        at most max_concurrency at a time; results are merged and deduped.
+        """
+        settings = get_settings()
+        filters = {"location": location, "company_ids": company_ids, "published_at": published_at}
+        shards = self.plan_shards(filters, locations, total_rows, shard_by)
+        
+        input_params = {
+            "title": title,
+            "location": location,
+            "locations": locations,
+            "company_names": company_names,
+            "company_ids": company_ids,
+            "published_at": published_at,
+            "total_rows": total_rows,
+            "shard_by": shard_by.value,
+            "shards": len(shards),
+            "planned_rows": sum(shard["rows"] for shard in shards)
+        }
+        run_record = await db_service.create_fetch_run(
+            user_id=user_id,
+            portal=portal,
+            input_params=input_params
+        )
+        if not run_record:
+            raise Exception("Failed to create fetch run record")
+        
+        run_id = run_record["id"]
+        children = await asyncio.gather(*(
+            db_service.create_fetch_run(
+                user_id=user_id,
+                portal=portal,
+                input_params={"title": title, "company_names": company_names, **shard},
+                parent_run_id=run_id,
+                shard=shard
+            )
+            for shard in shards
+        ))
+        progress_service.publish(run_id, FetchRunEventType.RUN_STARTED, portal=portal, shards=len(shards))
+        
+        fetch = self._execute_sharded_fetch(
+            run_id=run_id,
+            user_id=user_id,
+            title=title,
+            company_names=company_names,
+            shards=[(child["id"], shard) for child, shard in zip(children, shards)],
+            max_concurrency=max_concurrency or settings.shard_max_concurrency,
+            portal=portal
+        )
+        if profile:
+            fetch = run_profiled(f"fetch-run-{run_id}", fetch)
+        
+        return await self._launch(fetch, run_record, background, on_finish)
+    
+    def plan_shards(
+        self,
+        filters: dict,
+        locations: Optional[List[str]],
+        total_rows: int,
+        shard_by: ShardStrategy
+    ) -> List[dict]:
+        """
+        Split a scrape into disjoint shards of at most SHARD_ROWS_PER_RUN
+        rows, each a copy of filters with location and/or companyId narrowed:
+        one per location, times groups of company ids. Shards never overlap,
+        so their rows add up; when there are too few locations and company
+        ids to cover total_rows, the plan covers less (sum the shards' rows).
+        The scraper's publishedAt windows are nested, not disjoint, so they
+        can't add coverage.
+        """
+        settings = get_settings()
+        per_run = settings.shard_rows_per_run
+        runs_wanted = min(math.ceil(total_rows / per_run), settings.shard_max_shards)
+        company_ids = filters.get("company_ids") or []
+        
+        bases = [dict(filters)]
+        if shard_by in (ShardStrategy.AUTO, ShardStrategy.LOCATION) and locations:
+            bases = [{**filters, "location": location} for location in locations[:settings.shard_max_shards]]
+        
+        shards = bases
+        if shard_by in (ShardStrategy.AUTO, ShardStrategy.COMPANY_ID) and len(company_ids) > 1:
+            groups = max(1, min(len(company_ids), math.ceil(runs_wanted / len(bases))))
+            shards = [
+                {**base, "company_ids": company_ids[index::groups]}
+                for base in bases
+                for index in range(groups)
+            ]
+        
+        shards = shards[:settings.shard_max_shards]
+        rows = min(per_run, math.ceil(total_rows / len(shards)))
+        return [{**shard, "rows": rows} for shard in shards]
+    
+    async def _execute_sharded_fetch(
+        self,
+        run_id: str,
+        user_id: str,
+        title: Optional[str],
+        company_names: Optional[List[str]],
+        shards: List[Tuple[str, dict]],
+        max_concurrency: int,
+        portal: str = "linkedin"
+    ):
+        """Run the shards with bounded concurrency, then record the parent run's totals."""
+        timings = StageTimings("sharded")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        stored_ids: Set[str] = set()
+        finished = 0
+        try:
+            known = await db_service.load_known_jobs_filter(user_id)
+        except Exception as e:
+            # The shard runs already exist; fail them too so they don't stay running
+            for shard_run_id, _ in shards:
+                await self._fail_fetch(shard_run_id, user_id, e, StageTimings("shard"))
+            await self._fail_fetch(run_id, user_id, e, timings)
+            raise
+        
+        async def run_shard(shard_run_id: str, shard: dict) -> Tuple[int, int]:
+            nonlocal finished
+            async with semaphore:
+                try:
+                    return await self._execute_shard(
+                        shard_run_id, user_id, title, company_names, shard, stored_ids, known, portal
+                    )
+                finally:
+                    finished += 1
+                    progress_service.publish(
+                        run_id,
+                        FetchRunEventType.SHARD_FINISHED,
+                        shard_run_id=shard_run_id,
+                        shards_finished=finished,
+                        shards=len(shards),
+                        unique_jobs=len(stored_ids)
+                    )
+        
+        try:
+            with timings.stage("shards"):
+                results = await asyncio.gather(
+                    *(run_shard(shard_run_id, shard) for shard_run_id, shard in shards),
+                    return_exceptions=True
                 )
-                if is_new:
-                    new_jobs_count += 1
+            if known.modified:
+                await db_service.save_known_jobs_filter(user_id, known)
+            
+            failures = [
+                {"run_id": shard_run_id, "error": str(result)}
+                for (shard_run_id, _), result in zip(shards, results)
+                if isinstance(result, BaseException)
+            ]
+            succeeded = [result for result in results if not isinstance(result, BaseException)]
+            scraped = sum(found for found, _ in succeeded)
+            new_jobs_count = sum(new for _, new in succeeded)
+            timings.count("shards", len(shards))
+            timings.count("shards_failed", len(failures))
+            timings.count("items_scraped", scraped)
+            timings.count("duplicates", scraped - len(stored_ids))
+            
+            if not succeeded:
+                raise Exception(f"All {len(shards)} shards failed: {failures[0]['error']}")
             
-            # Update fetch run as completed
             await db_service.update_fetch_run(
                 run_id=run_id,
+                user_id=user_id,
                 status=FetchRunStatus.COMPLETED,
-                jobs_found=len(jobs),
-                new_jobs_added=new_jobs_count
+                jobs_found=len(stored_ids),
+                new_jobs_added=new_jobs_count,
+                errors_json={"failed_shards": failures} if failures else None,
+                stage_timings=timings.to_dict()
+            )
+            timings.emit(FetchRunStatus.COMPLETED.value)
+            progress_service.publish(
+                run_id,
+                FetchRunEventType.COMPLETED,
+                jobs_found=len(stored_ids),
+                new_jobs_added=new_jobs_count,
+                failed_shards=len(failures)
             )
             
         except Exception as e:
-            # Update fetch run as failed
+            await self._fail_fetch(run_id, user_id, e, timings)
+            raise
+    
+    async def _execute_shard(
+        self,
+        run_id: str,
+        user_id: str,
+        title: Optional[str],
+        company_names: Optional[List[str]],
+        shard: dict,
+        stored_ids: Set[str],
+        known: BloomFilter,
+        portal: str = "linkedin"
+    ) -> Tuple[int, int]:
+        """
+        Scrape one shard and store the postings no earlier shard stored.
+        Returns (jobs scraped, new jobs added).
+        """
+        timings = StageTimings("shard")
+        try:
+            jobs = await apify_service.fetch_jobs_sync(
+                title=title,
+                location=shard.get("location"),
+                company_names=company_names,
+                company_ids=shard.get("company_ids"),
+                published_at=shard.get("published_at"),
+                rows=shard["rows"],
+                on_progress=partial(progress_service.publish, run_id),
+                timings=timings
+            )
+            
+            # Merge: claim external IDs before the first await so concurrent shards skip them
+            unique_jobs = []
+            for job in jobs:
+                external_job_id = db_service.get_external_job_id(job)
+                if external_job_id not in stored_ids:
+                    stored_ids.add(external_job_id)
+                    unique_jobs.append(job)
+            timings.count("duplicates", len(jobs) - len(unique_jobs))
+            
+            new_jobs_count = await self._store_jobs(
+                user_id=user_id,
+                run_id=run_id,
+                jobs=unique_jobs,
+                portal=portal,
+                timings=timings,
+                known=known
+            )
+            
             await db_service.update_fetch_run(
                 run_id=run_id,
-                status=FetchRunStatus.FAILED,
-                errors_json={"error": str(e)}
+                user_id=user_id,
+                status=FetchRunStatus.COMPLETED,
+                jobs_found=len(jobs),
+                new_jobs_added=new_jobs_count,
+                stage_timings=timings.to_dict()
             )
+            timings.emit(FetchRunStatus.COMPLETED.value)
+            progress_service.publish(
+                run_id,
+                FetchRunEventType.COMPLETED,
+                jobs_found=len(jobs),
+                new_jobs_added=new_jobs_count
+            )
+            return len(jobs), new_jobs_count
+            
+        except Exception as e:
+            await self._fail_fetch(run_id, user_id, e, timings)
             raise
     
+    # ============================================
+    # Batch Sync
+    # ============================================
+    
+    async def start_batch_fetch(
+        self,
+        user_id: str,
+        searches: List[dict],
+        portal: str = "linkedin",
+        full: bool = False,
+        background: bool = True,
+        on_finish: Optional[Callable[[], None]] = None,
+        profile: bool = False
+    ) -> Tuple[str, List[dict]]:
+        """
+        Sync many searches with as few actor runs as possible.
+        Each of searches is {"saved_search": row} or SyncJobsRequest-style
+        filters. Every search gets its own fetch run (created in one insert),
+        but compatible searches share an actor run (see plan_batch) and the
+        results are attributed back to each search. Saved searches sync
+        incrementally unless full is set, as in sync_saved_search.
+        Returns (batch ID, run records in the order of searches).
+        """
+        settings = get_settings()
+        specs = [self._batch_spec(search, portal, full) for search in searches]
+        groups = self.plan_batch(specs)
+        
+        batch_id = str(uuid4())
+        group_of = {index: number for number, members in enumerate(groups) for index in members}
+        runs = await db_service.create_fetch_runs(
+            user_id=user_id,
+            portal=portal,
+            runs=[
+                {
+                    "input_params": {
+                        **spec["filters"],
+                        **({"incremental": True} if spec["saved_search"] and spec["incremental"] else {}),
+                        "batch": {"id": batch_id, "group": group_of[index], "groups": len(groups)}
+                    },
+                    "saved_search_id": spec["saved_search"]["id"] if spec["saved_search"] else None
+                }
+                for index, spec in enumerate(specs)
+            ]
+        )
+        if len(runs) != len(specs):
+            raise Exception("Failed to create fetch run records")
+        
+        for spec, run in zip(specs, runs):
+            spec["run_id"] = run["id"]
+            progress_service.publish(run["id"], FetchRunEventType.RUN_STARTED, portal=portal, rows=spec["filters"]["rows"])
+        
+        fetch = self._execute_batch_fetch(
+            user_id=user_id,
+            groups=[[specs[index] for index in members] for members in groups],
+            max_concurrency=settings.batch_max_concurrency,
+            portal=portal
+        )
+        if profile:
+            fetch = run_profiled(f"fetch-batch-{batch_id}", fetch)
+        
+        await self._launch(fetch, runs, background, on_finish)
+        return batch_id, runs
+    
+    def _batch_spec(self, search: dict, portal: str, full: bool) -> dict:
+        """Normalize a batch search to {"filters", "saved_search", "incremental"}."""
+        saved_search = search.get("saved_search")
+        if not saved_search:
+            filters = {key: search.get(key) for key in BATCH_FILTER_KEYS}
+            filters["rows"] = search.get("rows") or 50
+            return {"filters": filters, "saved_search": None, "incremental": False}
+        
+        filters = {key: saved_search.get(key) for key in BATCH_FILTER_KEYS}
+        filters["rows"] = saved_search.get("rows") or 50
+        if not full:
+            filters["published_at"] = self._incremental_published_at(saved_search)
+        return {"filters": filters, "saved_search": saved_search, "incremental": not full}
+    
+    def plan_batch(self, specs: List[dict]) -> List[List[int]]:
+        """
+        Group batch searches (indexes into specs) that can share an actor run.
+        Searches must agree on title, location and publishedAt. Searches
+        limited to companies are merged by combining their companyName and
+        companyId lists, as long as their rows add up to at most
+        BATCH_MAX_ROWS_PER_RUN. Searches without a company filter only merge
+        with identical ones, since their results can't be told apart.
+        """
+        max_rows = get_settings().batch_max_rows_per_run
+        groups: List[List[int]] = []
+        open_groups = {}  # merge key -> (group index, rows used)
+        for index, spec in enumerate(specs):
+            filters = spec["filters"]
+            scoped = bool(filters.get("company_names") or filters.get("company_ids"))
+            key = (
+                _fold(filters.get("title")),
+                _fold(filters.get("location")),
+                filters.get("published_at"),
+                scoped
+            )
+            rows = filters["rows"]
+            if key in open_groups:
+                number, used = open_groups[key]
+                if not scoped:
+                    groups[number].append(index)
+                    continue
+                if used + rows <= max_rows:
+                    groups[number].append(index)
+                    open_groups[key] = (number, used + rows)
+                    continue
+            open_groups[key] = (len(groups), rows)
+            groups.append([index])
+        return groups
+    
+    def _merged_input(self, specs: List[dict]) -> dict:
+        """Actor input covering every search in a batch group."""
+        first = specs[0]["filters"]
+        company_names = list(dict.fromkeys(
+            name for spec in specs for name in spec["filters"].get("company_names") or []
+        ))
+        company_ids = list(dict.fromkeys(
+            company_id for spec in specs for company_id in spec["filters"].get("company_ids") or []
+        ))
+        scoped = bool(company_names or company_ids)
+        return {
+            "title": first.get("title"),
+            "location": first.get("location"),
+            "company_names": company_names or None,
+            "company_ids": company_ids or None,
+            "published_at": first.get("published_at"),
+            "rows": sum(spec["filters"]["rows"] for spec in specs) if scoped
+                    else max(spec["filters"]["rows"] for spec in specs)
+        }
+    
+    def _attributed_jobs(self, jobs: List[ApifyJobResult], spec: dict, group_size: int) -> List[ApifyJobResult]:
+        """The jobs of a merged actor run that belong to one search of its group."""
+        filters = spec["filters"]
+        if group_size == 1 or not (filters.get("company_names") or filters.get("company_ids")):
+            return jobs
+        company_names = {_fold(name) for name in filters.get("company_names") or []}
+        company_ids = set(filters.get("company_ids") or [])
+        return [
+            job for job in jobs
+            if job.companyId in company_ids or _fold(job.companyName) in company_names
+        ]
+    
+    async def _execute_batch_fetch(
+        self,
+        user_id: str,
+        groups: List[List[dict]],
+        max_concurrency: int,
+        portal: str = "linkedin"
+    ):
+        """Run the batch's merged actor runs with bounded concurrency and one known-jobs filter."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        try:
+            known = await db_service.load_known_jobs_filter(user_id)
+        except Exception as e:
+            for spec in (spec for specs in groups for spec in specs):
+                await self._fail_fetch(spec["run_id"], user_id, e, StageTimings("batch"))
+            raise
+        
+        async def run_group(specs: List[dict]):
+            async with semaphore:
+                await self._execute_batch_group(user_id, specs, known, portal)
+        
+        try:
+            await asyncio.gather(*(run_group(specs) for specs in groups), return_exceptions=True)
+        finally:
+            if known.modified:
+                await db_service.save_known_jobs_filter(user_id, known)
+    
+    async def _execute_batch_group(
+        self,
+        user_id: str,
+        specs: List[dict],
+        known: BloomFilter,
+        portal: str = "linkedin"
+    ):
+        """
+        Run one merged actor run and complete each search's fetch run with
+        its share of the results. If the actor run fails, every run in the
+        group fails; a failure storing one search's jobs fails only its run.
+        """
+        run_ids = [spec["run_id"] for spec in specs]
+        timings = StageTimings("batch")
+        try:
+            jobs = await apify_service.fetch_jobs_sync(
+                **self._merged_input(specs),
+                on_progress=partial(self._publish_all, run_ids),
+                timings=timings
+            )
+        except Exception as e:
+            for run_id in run_ids:
+                await self._fail_fetch(run_id, user_id, e, timings.copy())
+            raise
+        
+        attributed = set()
+        stored: Dict[frozenset, int] = {}  # Identical searches in the group write their jobs once
+        for spec in specs:
+            run_jobs = self._attributed_jobs(jobs, spec, len(specs))
+            attributed.update(id(job) for job in run_jobs)
+            run_timings = timings.copy()
+            run_timings.count("batch_searches", len(specs))
+            run_timings.count("items_attributed", len(run_jobs))
+            try:
+                await self._complete_fetch(
+                    spec["run_id"], user_id, run_jobs, spec["saved_search"], spec["incremental"], run_timings, known, stored
+                )
+            except Exception as e:
+                await self._fail_fetch(spec["run_id"], user_id, e, run_timings)
+        
+        if len(attributed) < len(jobs):
+            logger.info(
+                "Batch actor run for %d searches returned %d jobs matching none of them",
+                len(specs), len(jobs) - len(attributed)
+            )
+    
+    def _publish_all(self, run_ids: List[str], event_type: FetchRunEventType, **data):
+        """Publish one progress event to several runs."""
+        for run_id in run_ids:
+            progress_service.publish(run_id, event_type, **data)
+    
+    # ============================================
+    # Incremental Sync Helpers
+    # ============================================
+    
+    def _incremental_published_at(self, saved_search: dict) -> Optional[str]:
+        """
+        Pick the narrowest publishedAt window that still covers everything
+        posted since the saved search's high-water mark.
+        """
+        own_filter = saved_search.get("published_at")
+        high_water = saved_search.get("high_water_posted_at")
+        if not high_water:
+            return own_filter
+        
+        # +1 so postings from the high-water day itself are re-checked
+        age_days = (date.today() - date.fromisoformat(str(high_water)[:10])).days + 1
+        window = next(
+            (code for days, code in PUBLISHED_AT_WINDOWS if age_days <= days),
+            None
+        )
+        if window is None:
+            return own_filter
+        
+        if own_filter and self._window_seconds(own_filter) < self._window_seconds(window):
+            return own_filter
+        return window
+    
+    def _filter_incremental(
+        self,
+        jobs: List[ApifyJobResult],
+        saved_search: dict
+    ) -> List[ApifyJobResult]:
+        """
+        Return postings newer than the high-water mark, newest first,
+        skipping already-known external job IDs. Scraper order isn't strictly
+        by date, so a known ID doesn't mean the rest are old; the date
+        cut-off decides that.
+        """
+        known_ids = set(saved_search.get("high_water_job_ids") or [])
+        high_water = saved_search.get("high_water_posted_at")
+        high_water = str(high_water)[:10] if high_water else None
+        
+        fresh_jobs = []
+        for job in self._newest_first(jobs):
+            if db_service.get_external_job_id(job) in known_ids:
+                continue
+            if high_water and job.publishedAt and job.publishedAt[:10] < high_water:
+                continue
+            fresh_jobs.append(job)
+        
+        return fresh_jobs
+    
+    async def _advance_watermark(
+        self,
+        saved_search: dict,
+        run_id: str,
+        jobs: List[ApifyJobResult]
+    ):
+        """Move the saved search's high-water mark past the postings seen in this run."""
+        high_water = saved_search.get("high_water_posted_at")
+        high_water = str(high_water)[:10] if high_water else None
+        for job in jobs:
+            if job.publishedAt and (high_water is None or job.publishedAt[:10] > high_water):
+                high_water = job.publishedAt[:10]
+        
+        seen_ids = [db_service.get_external_job_id(job) for job in self._newest_first(jobs)]
+        known_ids = list(dict.fromkeys(
+            seen_ids + list(saved_search.get("high_water_job_ids") or [])
+        ))[:HIGH_WATER_ID_LIMIT]
+        
+        await db_service.update_saved_search_watermark(
+            search_id=saved_search["id"],
+            run_id=run_id,
+            high_water_posted_at=high_water,
+            high_water_job_ids=known_ids
+        )
+    
+    def _newest_first(self, jobs: List[ApifyJobResult]) -> List[ApifyJobResult]:
+        """Order jobs by publishedAt descending; undated jobs go last."""
+        return sorted(jobs, key=lambda job: job.publishedAt or "", reverse=True)
+    
+    def _window_seconds(self, published_at: str) -> float:
+        """Length of a LinkedIn publishedAt code such as r604800, in seconds."""
+        match = re.fullmatch(r"r(\d+)", published_at or "")
+        return float(match.group(1)) if match else float("inf")
+    
     async def fetch_from_existing_dataset(
         self,
         user_id: str,
         dataset_id: str,
-        portal: str = "linkedin"
+        portal: str = "linkedin",
+        run_id: Optional[str] = None
     ) -> dict:
         """
         Fetch jobs from an existing Apify dataset.
         Useful for testing without running a new scrape.
-        """
-        # Create fetch run record
-        input_params = {
-            "dataset_id": dataset_id,
-            "source": "existing_dataset"
-        }
         
-        run_record = await db_service.create_fetch_run(
-            user_id=user_id,
-            portal=portal,
-            input_params=input_params
-        )
+        The dataset is read and stored in chunks of DATASET_CHUNK_SIZE items,
+        with a checkpoint (dataset offset plus counts) saved on the run after
+        each one. Once DATASET_INGEST_BUDGET_SECONDS have passed the call returns
+        with status "running"; call again with run_id to continue from the
+        checkpoint. A failed run can be resumed the same way.
         
-        run_id = run_record["id"]
+        Each chunk is read and stored only under a lease on the run, taken
+        or renewed before the chunk, so two calls resuming the same run never
+        store the same chunk. A call that can't get the lease returns "running"
+        without touching the run.
+        """
+        settings = get_settings()
+        if run_id:
+            run_record = await db_service.get_fetch_run(user_id, run_id)
+            if not run_record or not run_record.get("checkpoint"):
+                raise ValueError(f"No resumable dataset run {run_id}")
+            checkpoint = run_record["checkpoint"]
+            if checkpoint.get("dataset_id") != dataset_id:
+                raise ValueError(f"Run {run_id} is importing dataset {checkpoint.get('dataset_id')}")
+            if run_record["status"] == FetchRunStatus.COMPLETED.value:
+                return self._dataset_run_result(run_id, checkpoint, FetchRunStatus.COMPLETED)
+        else:
+            checkpoint = {
+                "dataset_id": dataset_id,
+                "offset": 0,
+                "jobs_found": 0,
+                "new_jobs_added": 0,
+                "items_invalid": 0,
+                "invocations": 0
+            }
+            run_record = await db_service.create_fetch_run(
+                user_id=user_id,
+                portal=portal,
+                input_params={"dataset_id": dataset_id, "source": "existing_dataset"},
+                checkpoint=checkpoint
+            )
+            run_id = run_record["id"]
+            progress_service.publish(run_id, FetchRunEventType.RUN_STARTED, portal=portal, dataset_id=dataset_id)
         
+        lease_id = str(uuid4())
+        if not await self._renew_dataset_lease(run_id, user_id, lease_id, checkpoint):
+            logger.warning("Dataset run %s is being imported elsewhere", run_id)
+            return self._dataset_run_result(run_id, checkpoint, FetchRunStatus.RUNNING)
+        
+        checkpoint = {**checkpoint, "invocations": checkpoint.get("invocations", 0) + 1}
+        deadline = time.monotonic() + settings.dataset_ingest_budget_seconds
+        timings = StageTimings("dataset")
+        known = None
         try:
-            # Get jobs from existing dataset
-            jobs = await apify_service.get_dataset_results_direct(dataset_id)
-            
-            # Store jobs in database
-            new_jobs_count = 0
-            for job in jobs:
-                _, is_new = await db_service.upsert_job(
-                    user_id=user_id,
-                    fetch_run_id=run_id,
-                    job_data=job,
-                    portal=portal
+            known = await db_service.load_known_jobs_filter(user_id)
+            finished = False
+            while time.monotonic() < deadline:
+                if not await self._renew_dataset_lease(run_id, user_id, lease_id, checkpoint):
+                    # Our lease ran out and another invocation resumed the run
+                    logger.warning("Dataset run %s lost its lease; stopping at offset %d", run_id, checkpoint["offset"])
+                    return self._dataset_run_result(run_id, checkpoint, FetchRunStatus.RUNNING)
+                jobs, items_read, total = await apify_service.get_dataset_page(
+                    dataset_id, checkpoint["offset"], settings.dataset_chunk_size, timings=timings
                 )
-                if is_new:
-                    new_jobs_count += 1
+                if items_read:
+                    progress_service.publish(
+                        run_id, FetchRunEventType.ITEMS_DOWNLOADED,
+                        items=items_read, offset=checkpoint["offset"], total=total
+                    )
+                    new_jobs_count = await self._store_jobs(
+                        user_id=user_id,
+                        run_id=run_id,
+                        jobs=jobs,
+                        portal=portal,
+                        timings=timings,
+                        known=known
+                    )
+                    checkpoint = {
+                        **checkpoint,
+                        # Offsets are the dataset's own: a short page doesn't mean the end
+                        "offset": checkpoint["offset"] + settings.dataset_chunk_size,
+                        "jobs_found": checkpoint["jobs_found"] + len(jobs),
+                        "new_jobs_added": checkpoint["new_jobs_added"] + new_jobs_count,
+                        "items_invalid": checkpoint["items_invalid"] + items_read - len(jobs)
+                    }
+                    if total is not None:
+                        checkpoint["dataset_total"] = total
+                    with timings.stage("checkpoint"):
+                        saved = await db_service.save_fetch_run_checkpoint(run_id, user_id, checkpoint, lease_id)
+                    if not saved:
+                        # Our lease ran out mid-chunk and another invocation took the run
+                        logger.warning("Dataset run %s lost its lease; stopping at offset %d", run_id, checkpoint["offset"])
+                        return self._dataset_run_result(run_id, checkpoint, FetchRunStatus.RUNNING)
+                
+                if not items_read or (total is not None and checkpoint["offset"] >= total):
+                    finished = True
+                    break
+            
+            if not finished:
+                logger.info("Dataset run %s paused at offset %d", run_id, checkpoint["offset"])
+                return self._dataset_run_result(run_id, checkpoint, FetchRunStatus.RUNNING)
             
             # Update fetch run as completed
             await db_service.update_fetch_run(
                 run_id=run_id,
+                user_id=user_id,
                 status=FetchRunStatus.COMPLETED,
-                jobs_found=len(jobs),
-                new_jobs_added=new_jobs_count
+                jobs_found=checkpoint["jobs_found"],
+                new_jobs_added=checkpoint["new_jobs_added"],
+                stage_timings=timings.to_dict(),
+                checkpoint=checkpoint
+            )
+            timings.emit(FetchRunStatus.COMPLETED.value)
+            progress_service.publish(
+                run_id,
+                FetchRunEventType.COMPLETED,
+                jobs_found=checkpoint["jobs_found"],
+                new_jobs_added=checkpoint["new_jobs_added"]
             )
             
-            return {
-                "run_id": run_id,
-                "jobs_found": len(jobs),
-                "new_jobs_added": new_jobs_count,
-                "status": "completed"
-            }
+            return self._dataset_run_result(run_id, checkpoint, FetchRunStatus.COMPLETED)
             
         except Exception as e:
+            # The checkpoint is kept, so the run can be resumed with run_id
+            logger.exception("Dataset import run %s failed", run_id)
             await db_service.update_fetch_run(
                 run_id=run_id,
+                user_id=user_id,
                 status=FetchRunStatus.FAILED,
-                errors_json={"error": str(e)}
+                jobs_found=checkpoint["jobs_found"],
+                new_jobs_added=checkpoint["new_jobs_added"],
+                errors_json={"error": str(e), "offset": checkpoint["offset"]},
+                stage_timings=timings.to_dict()
             )
+            timings.emit(FetchRunStatus.FAILED.value)
+            progress_service.publish(run_id, FetchRunEventType.FAILED, error=str(e))
             raise
+        finally:
+            if known is not None and known.modified:
+                await db_service.save_known_jobs_filter(user_id, known)
+            await db_service.release_fetch_run_lease(run_id, user_id, lease_id)
+    
+    async def _renew_dataset_lease(self, run_id: str, user_id: str, lease_id: str, checkpoint: dict) -> bool:
+        """Take or extend the lease on a dataset run whose stored checkpoint is still checkpoint."""
+        return await db_service.acquire_fetch_run_lease(
+            run_id, user_id, lease_id, checkpoint["offset"], get_settings().dataset_run_lease_seconds
+        )
+    
+    def _dataset_run_result(self, run_id: str, checkpoint: dict, status: FetchRunStatus) -> dict:
+        """Response body for sync-from-dataset; status "running" means call again with run_id."""
+        return {
+            "run_id": run_id,
+            "jobs_found": checkpoint["jobs_found"],
+            "new_jobs_added": checkpoint["new_jobs_added"],
+            "status": status.value,
+            "checkpoint": checkpoint
+        }
 
 
 # Singleton instance
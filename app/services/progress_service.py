@@ -0,0 +1,121 @@
+"""
+Job Fetcher Stack - Fetch Run Progress Service
+In-process event bus for fetch run progress, consumed by the SSE endpoint.
+"""
+from typing import Dict, List, Optional, AsyncIterator
+from datetime import datetime
+from app.models import FetchRunEventType, FetchRunProgressEvent
+import asyncio
+import time
+
+
+TERMINAL_EVENTS = {FetchRunEventType.COMPLETED, FetchRunEventType.FAILED}
+
+
+class _RunChannel:
+    """Event history and live subscribers for a single fetch run."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.history: List[FetchRunProgressEvent] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.finished_at: Optional[float] = None
+        self.next_seq = 1
+
+
+class ProgressService:
+    """
+    Keeps a bounded history of progress events per fetch run and fans
+    them out to subscribers. Events live in memory only, so a subscriber
+    on a different instance than the running fetch will not see them.
+    """
+
+    def __init__(self, history_limit: int = 500, retention_seconds: int = 900):
+        self.history_limit = history_limit
+        self.retention_seconds = retention_seconds
+        self._channels: Dict[str, _RunChannel] = {}
+
+    def publish(self, run_id: str, event: FetchRunEventType, **data) -> FetchRunProgressEvent:
+        """Record an event for a run and push it to all live subscribers."""
+        run_id = str(run_id)
+        self._evict_expired()
+
+        channel = self._channels.get(run_id)
+        if channel is None:
+            channel = self._channels[run_id] = _RunChannel(run_id)
+
+        progress_event = FetchRunProgressEvent(
+            seq=channel.next_seq,
+            run_id=run_id,
+            event=event,
+            timestamp=datetime.utcnow(),
+            data=data
+        )
+        channel.next_seq += 1
+
+        channel.history.append(progress_event)
+        if len(channel.history) > self.history_limit:
+            # Keep the first event so late subscribers still see the start
+            del channel.history[1:len(channel.history) - self.history_limit + 1]
+
+        for queue in channel.subscribers:
+            queue.put_nowait(progress_event)
+
+        if event in TERMINAL_EVENTS:
+            channel.finished_at = time.monotonic()
+
+        return progress_event
+
+    def is_tracked(self, run_id: str) -> bool:
+        """Whether this instance has seen events for the run."""
+        return str(run_id) in self._channels
+
+    async def subscribe(
+        self,
+        run_id: str,
+        after_seq: int = 0
+    ) -> AsyncIterator[FetchRunProgressEvent]:
+        """
+        Yield past events newer than after_seq, then live events until
+        the run reaches a terminal event.
+        """
+        channel = self._channels.get(str(run_id))
+        if channel is None:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.append(queue)
+        try:
+            for progress_event in list(channel.history):
+                if progress_event.seq > after_seq:
+                    after_seq = progress_event.seq
+                    yield progress_event
+                    if progress_event.event in TERMINAL_EVENTS:
+                        return
+
+            while True:
+                progress_event = await queue.get()
+                if progress_event.seq <= after_seq:
+                    continue
+                after_seq = progress_event.seq
+                yield progress_event
+                if progress_event.event in TERMINAL_EVENTS:
+                    return
+        finally:
+            channel.subscribers.remove(queue)
+
+    def _evict_expired(self):
+        """Drop channels for runs that finished longer ago than the retention window."""
+        now = time.monotonic()
+        expired = [
+            run_id for run_id, channel in self._channels.items()
+            if channel.finished_at is not None
+            and not channel.subscribers
+            and now - channel.finished_at > self.retention_seconds
+        ]
+        for run_id in expired:
+            del self._channels[run_id]
+
+
+# Singleton instance
+progress_service = ProgressService()
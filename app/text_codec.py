@@ -0,0 +1,48 @@
+"""
+Job Fetcher Stack - Job Text Codec
+Content addressing and zstd compression for job descriptions
+stored in the job_descriptions table.
+"""
+from typing import Tuple
+from app.config import get_settings
+import base64
+import hashlib
+import zstandard
+
+
+IDENTITY = "identity"
+ZSTD = "zstd"
+
+# Below this size compression rarely pays for the base64 overhead
+MIN_COMPRESS_BYTES = 512
+
+
+def hash_text(text: str) -> str:
+    """Content address of a text: hex SHA-256 of its UTF-8 bytes."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_text(text: str) -> Tuple[str, str]:
+    """
+    Encode text for storage. Returns (encoding, body); zstd bodies are base64
+    so they travel through PostgREST as plain JSON strings.
+    """
+    raw = text.encode("utf-8")
+    settings = get_settings()
+    if not settings.description_compression or len(raw) < MIN_COMPRESS_BYTES:
+        return IDENTITY, text
+
+    compressed = zstandard.ZstdCompressor(level=settings.description_compression_level).compress(raw)
+    body = base64.b64encode(compressed).decode("ascii")
+    if len(body) >= len(raw):
+        return IDENTITY, text
+    return ZSTD, body
+
+
+def decode_text(encoding: str, body: str) -> str:
+    """Inverse of encode_text."""
+    if encoding == IDENTITY:
+        return body
+    if encoding == ZSTD:
+        return zstandard.ZstdDecompressor().decompress(base64.b64decode(body)).decode("utf-8")
+    raise ValueError(f"Unknown job text encoding: {encoding}")
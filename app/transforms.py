@@ -0,0 +1,140 @@
+"""
+Job Fetcher Stack - Ingest Transforms
+Pure, picklable batch transforms for the CPU-heavy parts of ingest
+(item validation, catalog row mapping, text hashing and compression).
+They import no services, so app.executor can run them in worker processes.
+"""
+from typing import Dict, List, Optional, Tuple
+from app.models import ApifyJobResult
+from app.text_codec import hash_text, encode_text
+import re
+
+
+def parse_items(raw_results: List[dict]) -> Tuple[List[ApifyJobResult], List[str]]:
+    """Validate dataset items into ApifyJobResult. Returns (jobs, errors for invalid items)."""
+    jobs = []
+    errors = []
+    for item in raw_results:
+        try:
+            jobs.append(ApifyJobResult(**item))
+        except Exception as e:
+            errors.append(str(e))
+    return jobs, errors
+
+
+def prepare_jobs(
+    jobs: List[ApifyJobResult],
+    portal: str,
+    scraped_at: str
+) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    """
+    Map scraped jobs to jobs catalog rows, one per external_job_id (last wins).
+    Returns (catalog rows by external_job_id, job_descriptions rows by hash).
+    """
+    records: Dict[str, dict] = {}
+    texts: Dict[str, dict] = {}
+    for job in jobs:
+        external_job_id = external_job_id_for(job)
+        records[external_job_id] = catalog_record(
+            external_job_id, job, portal, scraped_at,
+            description_hash=_text_row(job.description, texts),
+            benefits_hash=_text_row(job.benefits, texts)
+        )
+    return records, texts
+
+
+def catalog_record(
+    external_job_id: str,
+    job_data: ApifyJobResult,
+    portal: str,
+    scraped_at: str,
+    description_hash: Optional[str],
+    benefits_hash: Optional[str]
+) -> dict:
+    """Map a scraped job to a jobs catalog row."""
+    # Parse salary
+    lpa_min, lpa_max = parse_salary(job_data.salary)
+
+    return {
+        "portal": portal,
+        "external_job_id": external_job_id,
+        "title": job_data.title,
+        "company": job_data.companyName,
+        "company_id": job_data.companyId,
+        "company_url": job_data.companyUrl,
+        "location": job_data.location,
+        "lpa_min": lpa_min,
+        "lpa_max": lpa_max,
+        "salary_text": job_data.salary,
+        "job_url": job_data.jobUrl,
+        "apply_url": job_data.applyUrl,
+        "apply_type": job_data.applyType,
+        "description_hash": description_hash,
+        "contract_type": job_data.contractType,
+        "experience_level": job_data.experienceLevel,
+        "work_type": job_data.workType,
+        "sector": job_data.sector,
+        "benefits_hash": benefits_hash,
+        "applications_count": job_data.applicationsCount,
+        "posted_at": job_data.publishedAt or None,
+        "posted_time_text": job_data.postedTime,
+        "last_scraped_at": scraped_at,
+    }
+
+
+def external_job_id_for(job_data: ApifyJobResult) -> str:
+    """Get the portal's job ID for a scraped job (the dedupe key in the jobs catalog)."""
+    return extract_linkedin_job_id(job_data.jobUrl)
+
+
+def extract_linkedin_job_id(job_url: str) -> str:
+    """Extract job ID from LinkedIn URL."""
+    # URL format: https://www.linkedin.com/jobs/view/{job_id}?...
+    try:
+        if "/jobs/view/" in job_url:
+            # Get the part after /view/
+            parts = job_url.split("/jobs/view/")[1]
+            # Remove query params and trailing parts
+            job_id = parts.split("?")[0].split("-")[-1]
+            return job_id
+    except:
+        pass
+    return job_url  # Fallback to full URL
+
+
+def parse_salary(salary_text: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """Parse salary text into min/max values (in LPA for India, or yearly for US)."""
+    if not salary_text:
+        return None, None
+
+    try:
+        # Handle US format: $69,000.00/yr - $96,500.00/yr
+        if "$" in salary_text:
+            numbers = re.findall(r'\$([\d,]+(?:\.\d+)?)', salary_text)
+            if len(numbers) >= 2:
+                min_val = float(numbers[0].replace(",", "")) / 100000  # Convert to Lakhs
+                max_val = float(numbers[1].replace(",", "")) / 100000
+                return min_val, max_val
+            elif len(numbers) == 1:
+                val = float(numbers[0].replace(",", "")) / 100000
+                return val, val
+    except:
+        pass
+
+    return None, None
+
+
+def _text_row(text: Optional[str], texts: Dict[str, dict]) -> Optional[str]:
+    """Hash and encode text into texts (once per distinct content). Returns its hash."""
+    if not text:
+        return None
+    text_hash = hash_text(text)
+    if text_hash not in texts:
+        encoding, body = encode_text(text)
+        texts[text_hash] = {
+            "hash": text_hash,
+            "encoding": encoding,
+            "body": body,
+            "byte_length": len(text.encode("utf-8"))
+        }
+    return text_hash
@@ -0,0 +1,156 @@
+"""
+Job Fetcher Stack - Response Compression Tradeoffs
+Serializes synthetic `GET /v1/jobs` pages and compresses them with each
+gzip level and brotli quality (when `brotli` is installed). Reports as JSON,
+per page size and codec:
+- body size and ratio;
+- wire size (base64 once compressed, as Lambda returns it);
+- compress/decompress time;
+- how many rows would fit in the payload budget.
+Needs no database or network:
+
+    python -m benchmarks.compression --page-sizes 20,100 --with-descriptions
+
+List pages leave out description text. --with-descriptions adds it,
+which shows what a page of full jobs would cost.
+"""
+from typing import Dict, List
+from datetime import datetime, timezone
+import argparse
+import json
+import sys
+import time
+import uuid
+
+
+def _rows(count: int, with_descriptions: bool, seed: int) -> List[dict]:
+    """FetchedJobResponse-shaped rows, as the jobs list returns them."""
+    from benchmarks.datagen import JobGenerator
+
+    generator = JobGenerator(seed=seed)
+    now = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for index, item in enumerate(generator.items(count)):
+        row = {
+            "id": str(uuid.UUID(int=index + 1)),
+            "portal": "linkedin",
+            "external_job_id": item["jobUrl"].split("?")[0].rsplit("-", 1)[-1],
+            "title": item["title"],
+            "company": item["companyName"],
+            "company_url": item["companyUrl"],
+            "location": item["location"],
+            "salary_text": item["salary"],
+            "job_url": item["jobUrl"],
+            "apply_url": item["applyUrl"],
+            "apply_type": item["applyType"],
+            "description": item["description"] if with_descriptions else None,
+            "benefits": item["benefits"] if with_descriptions else None,
+            "contract_type": item["contractType"],
+            "experience_level": item["experienceLevel"],
+            "work_type": item["workType"],
+            "sector": item["sector"],
+            "applications_count": item["applicationsCount"],
+            "posted_at": item["publishedAt"],
+            "posted_time_text": item["postedTime"],
+            "fetched_at": now,
+            "match_score": index % 100,
+            "status": "new",
+            "created_at": now,
+            "updated_at": now
+        }
+        rows.append(row)
+    return rows
+
+
+def _codecs(gzip_levels: List[int], brotli_qualities: List[int]) -> Dict[str, tuple]:
+    """name -> (compress, decompress); identity included."""
+    import gzip
+    from app import compression
+
+    codecs = {"identity": (None, None)}
+    for level in gzip_levels:
+        codecs[f"gzip-{level}"] = (
+            lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0),
+            gzip.decompress
+        )
+    if compression.brotli is not None:
+        for quality in brotli_qualities:
+            codecs[f"br-{quality}"] = (
+                lambda body, quality=quality: compression.brotli.compress(body, quality=quality),
+                compression.brotli.decompress
+            )
+    return codecs
+
+
+def _median_ms(call, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return round(timings[len(timings) // 2] * 1000, 3)
+
+
+def measure(body: bytes, rows: int, codecs: Dict[str, tuple], budget: int, iterations: int) -> Dict[str, dict]:
+    from app.compression import wire_size
+
+    results = {}
+    for name, (compress, decompress) in codecs.items():
+        if compress is None:
+            encoded, compress_ms, decompress_ms = body, 0.0, 0.0
+        else:
+            encoded = compress(body)
+            compress_ms = _median_ms(lambda: compress(body), iterations)
+            decompress_ms = _median_ms(lambda: decompress(encoded), iterations)
+        wire = wire_size(len(encoded), binary=compress is not None)
+        results[name] = {
+            "body_bytes": len(encoded),
+            "wire_bytes": wire,
+            "ratio": round(len(body) / len(encoded), 2),
+            "compress_ms": compress_ms,
+            "decompress_ms": decompress_ms,
+            "compress_mb_per_s": round(len(body) / compress_ms / 1000, 1) if compress_ms else None,
+            # Same row mix, scaled to the budget
+            "rows_within_budget": int(rows * budget / wire)
+        }
+    return results
+
+
+def main(args) -> int:
+    from app.compression import LAMBDA_RESPONSE_LIMIT
+
+    codecs = _codecs(
+        [int(level) for level in args.gzip_levels.split(",")],
+        [int(quality) for quality in args.brotli_qualities.split(",")]
+    )
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "with_descriptions": args.with_descriptions,
+        "budget_bytes": args.budget,
+        "lambda_limit_bytes": LAMBDA_RESPONSE_LIMIT,
+        "codecs": list(codecs),
+        "pages": {}
+    }
+    for page_size in [int(size) for size in args.page_sizes.split(",")]:
+        rows = _rows(page_size, args.with_descriptions, args.seed)
+        body = json.dumps({"jobs": rows, "total": 10 * page_size, "page": 1, "page_size": page_size}).encode()
+        results["pages"][str(page_size)] = measure(body, page_size, codecs, args.budget, args.iterations)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Response compression size and CPU tradeoffs")
+    parser.add_argument("--page-sizes", default="20,100,1000")
+    parser.add_argument("--with-descriptions", action="store_true", help="Include description and benefits text in rows")
+    parser.add_argument("--gzip-levels", default="1,6,9")
+    parser.add_argument("--brotli-qualities", default="1,4,6,11")
+    parser.add_argument("--budget", type=int, default=5_500_000, help="Payload budget in bytes (RESPONSE_PAYLOAD_BUDGET_BYTES)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,111 @@
+"""
+Job Fetcher Stack - CPU Executor Scaling
+Measures the CPU-heavy ingest transforms (item validation, then catalog row
+mapping with text hashing and zstd) through app.executor at increasing
+worker counts. Reports throughput and the worst event-loop stall seen by a
+concurrent ticker as JSON. Needs no database or network, but importing
+app.executor loads the settings, so SUPABASE_URL, SUPABASE_KEY,
+SUPABASE_SERVICE_KEY, APIFY_API_TOKEN and JWT_SECRET must be set (any
+values will do). Run it on a multi-core host to see scaling. Items cross the process boundary pickled, so
+speedup depends on how heavy the transforms are relative to the data moved;
+with description compression on, zstd dominates and scales with cores:
+
+    python -m benchmarks.cpu_scaling --items 50000 --workers 1,2,4,8
+"""
+from typing import List
+from functools import partial
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+
+TICK_SECONDS = 0.005
+
+
+async def _ingest(executor, raw_items: List[dict], batch_size: int) -> int:
+    from app.transforms import parse_items, prepare_jobs
+
+    jobs = []
+    async for valid, _ in executor.map(parse_items, raw_items, batch_size):
+        jobs.extend(valid)
+    rows = 0
+    prepare = partial(prepare_jobs, portal="linkedin", scraped_at=datetime.utcnow().isoformat())
+    async for records, _ in executor.map(prepare, jobs, batch_size):
+        rows += len(records)
+    return rows
+
+
+async def _measure(executor, raw_items: List[dict], batch_size: int) -> dict:
+    """Run one ingest while a ticker records how late the event loop wakes it."""
+    worst_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal worst_lag
+        while not done.is_set():
+            expected = time.perf_counter() + TICK_SECONDS
+            await asyncio.sleep(TICK_SECONDS)
+            worst_lag = max(worst_lag, time.perf_counter() - expected)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)  # Let the ticker start its first sleep
+    started = time.perf_counter()
+    rows = await _ingest(executor, raw_items, batch_size)
+    duration = time.perf_counter() - started
+    done.set()
+    await ticker_task
+    return {
+        "rows": rows,
+        "duration_s": round(duration, 3),
+        "items_per_s": round(len(raw_items) / duration, 1),
+        "max_loop_lag_ms": round(worst_lag * 1000, 2)
+    }
+
+
+async def main(args) -> int:
+    from app.executor import CpuExecutor, INLINE
+    from benchmarks.datagen import JobGenerator
+
+    raw_items = list(JobGenerator(seed=args.seed).items(args.items))
+    results = {
+        "items": args.items,
+        "batch_size": args.batch_size,
+        "cpu_count": os.cpu_count(),
+        "mode": args.mode,
+        "runs": {}
+    }
+
+    inline = CpuExecutor(mode=INLINE)
+    results["runs"]["inline"] = await _measure(inline, raw_items, args.batch_size)
+
+    for workers in [int(count) for count in args.workers.split(",")]:
+        executor = CpuExecutor(mode=args.mode, workers=workers)
+        executor.min_items = 0
+        # Warm the pool so worker start-up isn't counted
+        await executor.run(len, raw_items[:workers * args.batch_size], args.batch_size)
+        results["runs"][f"{args.mode}-{workers}"] = await _measure(executor, raw_items, args.batch_size)
+        executor.shutdown()
+
+    baseline = results["runs"]["inline"]["items_per_s"]
+    for run in results["runs"].values():
+        run["speedup"] = round(run["items_per_s"] / baseline, 2)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CPU executor scaling for ingest transforms")
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--workers", default=",".join(str(2 ** i) for i in range(5) if 2 ** i <= (os.cpu_count() or 1)))
+    parser.add_argument("--mode", choices=["process", "thread"], default="process")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,426 @@
+"""
+Job Fetcher Stack - In-Memory Database Fake
+One in-memory copy of the tables the hot read paths touch (the fetched_jobs
+view, job_descriptions and the stats tables), seeded from benchmarks.datagen,
+behind the two interfaces the database backends talk to:
+- FakePostgrestClient: the supabase-py query builder (table/select/filters/
+  order/range/update, rpc), answering with JSON values as PostgREST does;
+- FakePool: asyncpg's pool.fetch, answering the fixed SQL of
+  app.database_pg with typed values (UUID, datetime, Decimal) as asyncpg does.
+
+Each side interprets its own query language, so benchmarks.db_parity --fake
+checks that both backends ask for the same rows and shape them the same way
+without a database. It says nothing about Postgres plans or network latency.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import json
+import random
+import re
+import uuid
+
+
+# Columns of a user_jobs row, as an update returns it
+USER_JOB_COLUMNS = (
+    "id", "user_id", "job_id", "portal", "fetch_run_id", "status", "match_score",
+    "fetched_at", "last_seen_at", "created_at", "updated_at"
+)
+
+
+def _ilike(value: Any, pattern: str) -> bool:
+    if value is None:
+        return False
+    regex = "".join(".*" if char == "%" else "." if char == "_" else re.escape(char) for char in pattern)
+    return re.fullmatch(regex, str(value), re.IGNORECASE | re.DOTALL) is not None
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _as_json(rows: List[dict]) -> List[dict]:
+    """Rows as PostgREST returns them: JSON strings and numbers."""
+    return json.loads(json.dumps(rows, default=_json_default))
+
+
+def _ordered(rows: List[dict], column: str, desc: bool) -> List[dict]:
+    """Postgres ordering: NULLs last ascending, first descending; ties keep their order."""
+    present = [row for row in rows if row.get(column) is not None]
+    missing = [row for row in rows if row.get(column) is None]
+    present.sort(key=lambda row: row[column], reverse=desc)
+    return missing + present if desc else present + missing
+
+
+class FakeDatabase:
+    """Tables as Postgres holds them, for one benchmark user plus a few others."""
+
+    def __init__(self, user_id: str, count: int = 2000, other_users: int = 3, seed: int = 42):
+        from benchmarks.datagen import JobGenerator, CATALOG_COLUMNS, LINK_COLUMNS, TEXT_COLUMNS, generate_rows
+
+        user_ids = [user_id] + [str(uuid.UUID(int=index + 1)) for index in range(other_users)]
+        catalog: Dict[str, dict] = {}
+        self.jobs: List[dict] = []
+        self.texts: Dict[str, dict] = {}
+        for index, (catalog_row, text_rows, link_row) in enumerate(
+            generate_rows(JobGenerator(seed=seed), count, user_ids)
+        ):
+            if catalog_row:
+                job = dict(zip(CATALOG_COLUMNS, catalog_row))
+                catalog[job["id"]] = job
+            for text_row in text_rows:
+                self.texts[text_row[0]] = dict(zip(TEXT_COLUMNS, text_row))
+            link = dict(zip(LINK_COLUMNS, link_row))
+            job = catalog[link["job_id"]]
+            self.jobs.append({
+                **job,
+                "id": uuid.UUID(int=(1 << 64) + index),
+                "user_id": uuid.UUID(link["user_id"]),
+                "job_id": uuid.UUID(job["id"]),
+                "fetch_run_id": None,
+                "lpa_min": Decimal(str(job["lpa_min"])) if job["lpa_min"] is not None else None,
+                "lpa_max": Decimal(str(job["lpa_max"])) if job["lpa_max"] is not None else None,
+                "posted_at": date.fromisoformat(job["posted_at"]) if job["posted_at"] else None,
+                "description": None,
+                "benefits": None,
+                "requirements_snippet": None,
+                "fetched_at": link["fetched_at"],
+                "match_score": link["match_score"],
+                "status": link["status"],
+                "created_at": link["fetched_at"],
+                "updated_at": link["fetched_at"],
+                "last_seen_at": link["fetched_at"]
+            })
+        # A few of the user's jobs were added today, for the stats counters
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        for job in rng.sample(self.jobs, min(20, len(self.jobs))):
+            job["created_at"] = now
+        # Per-user tables are partitioned by user_id; so is the fake
+        self.by_user: Dict[str, List[dict]] = defaultdict(list)
+        for job in self.jobs:
+            self.by_user[str(job["user_id"])].append(job)
+
+    # ============================================
+    # Tables
+    # ============================================
+
+    def jobs_for(self, user_id: Optional[str]) -> List[dict]:
+        return self.jobs if user_id is None else self.by_user.get(str(user_id), [])
+
+    def table(self, name: str, user_id: Optional[str] = None) -> List[dict]:
+        """A table's rows, only user_id's when given."""
+        if name in ("fetched_jobs", "user_jobs"):
+            return self.jobs_for(user_id)
+        if name == "job_descriptions":
+            return list(self.texts.values())
+        if name == "user_job_stats":
+            return self.job_stats(user_id)
+        if name == "user_job_daily_stats":
+            return self.daily_stats(user_id)
+        raise NotImplementedError(f"No fake table {name}")
+
+    def job_stats(self, user_id: Optional[str] = None) -> List[dict]:
+        counts: Dict[tuple, int] = defaultdict(int)
+        for job in self.jobs_for(user_id):
+            counts[(job["user_id"], job["portal"], job["status"])] += 1
+        return [
+            {"user_id": user_id, "portal": portal, "status": status, "job_count": count}
+            for (user_id, portal, status), count in counts.items()
+        ]
+
+    def daily_stats(self, user_id: Optional[str] = None) -> List[dict]:
+        counts: Dict[tuple, int] = defaultdict(int)
+        for job in self.jobs_for(user_id):
+            counts[(job["user_id"], job["created_at"].date())] += 1
+        return [
+            {"user_id": user_id, "day": day, "jobs_added": count}
+            for (user_id, day), count in counts.items()
+        ]
+
+    def update_user_jobs(self, rows: List[dict], values: dict) -> List[dict]:
+        """Apply an update (and the updated_at trigger); returns the user_jobs rows."""
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            row.update(values, updated_at=now)
+        return [{column: row[column] for column in USER_JOB_COLUMNS} for row in rows]
+
+    # ============================================
+    # Functions
+    # ============================================
+
+    def job_facets(
+        self,
+        p_user_id: str,
+        p_dimensions: List[str],
+        p_portal: Optional[List[str]] = None,
+        p_status: Optional[List[str]] = None,
+        p_work_type: Optional[List[str]] = None,
+        p_experience_level: Optional[List[str]] = None,
+        p_location: Optional[str] = None,
+        p_company: Optional[str] = None,
+        p_min_lpa: Any = None,
+        p_q: Optional[str] = None,
+        p_limit: int = 50
+    ) -> List[dict]:
+        """The job_facets SQL function (migration 012)."""
+        filters: Dict[str, Callable[[Any], bool]] = {
+            "portal": lambda value: p_portal is None or value in p_portal,
+            "status": lambda value: p_status is None or value in p_status,
+            "work_type": lambda value: p_work_type is None or value in p_work_type,
+            "experience_level": lambda value: p_experience_level is None or value in p_experience_level,
+            "location": lambda value: p_location is None or _ilike(value, f"%{p_location}%"),
+            "company": lambda value: p_company is None or _ilike(value, f"%{p_company}%")
+        }
+        counts: Dict[str, Dict[str, int]] = {dimension: defaultdict(int) for dimension in p_dimensions}
+        for job in self.jobs_for(p_user_id):
+            if p_min_lpa is not None and (job["lpa_min"] is None or job["lpa_min"] < Decimal(str(p_min_lpa))):
+                continue
+            if p_q is not None and not (_ilike(job["title"], f"%{p_q}%") or _ilike(job["company"], f"%{p_q}%")):
+                continue
+            failed = [name for name, check in filters.items() if not check(job[name])]
+            for dimension in p_dimensions:
+                if job[dimension] is not None and not [name for name in failed if name != dimension]:
+                    counts[dimension][job[dimension]] += 1
+
+        rows = []
+        for dimension in sorted(p_dimensions):
+            ranked = sorted(counts[dimension].items(), key=lambda item: (-item[1], item[0]))
+            rows.extend(
+                {"dimension": dimension, "value": value, "job_count": count}
+                for value, count in ranked[:p_limit]
+            )
+        return rows
+
+
+# ============================================
+# PostgREST side
+# ============================================
+
+class _Result:
+    def __init__(self, data: List[dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class _Query:
+    """The subset of the supabase-py query builder DatabaseService's read paths use."""
+
+    def __init__(self, db: FakeDatabase, table: str):
+        self.db = db
+        self.table_name = table
+        self.columns: Optional[List[str]] = None
+        self.count_mode: Optional[str] = None
+        self.values: Optional[dict] = None
+        self.filters: List[Callable[[dict], bool]] = []
+        self.user_id: Optional[str] = None
+        self.order_by: Optional[tuple] = None
+        self.bounds: Optional[tuple] = None
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "_Query":
+        self.columns = None if columns.strip() == "*" else [column.strip() for column in columns.split(",")]
+        self.count_mode = count
+        return self
+
+    def update(self, values: dict) -> "_Query":
+        self.values = values
+        return self
+
+    def eq(self, column: str, value: Any) -> "_Query":
+        if column == "user_id":
+            self.user_id = value
+        self.filters.append(lambda row: row.get(column) is not None and str(row[column]) == str(value))
+        return self
+
+    def in_(self, column: str, values: List[Any]) -> "_Query":
+        wanted = {str(value) for value in values}
+        self.filters.append(lambda row: row.get(column) is not None and str(row[column]) in wanted)
+        return self
+
+    def ilike(self, column: str, pattern: str) -> "_Query":
+        self.filters.append(lambda row: _ilike(row.get(column), pattern))
+        return self
+
+    def gte(self, column: str, value: Any) -> "_Query":
+        self.filters.append(lambda row: row.get(column) is not None and row[column] >= Decimal(str(value)))
+        return self
+
+    def or_(self, conditions: str) -> "_Query":
+        checks = []
+        for condition in conditions.split(","):
+            column, operator, value = condition.split(".", 2)
+            if operator != "ilike":
+                raise NotImplementedError(f"No fake or_ operator {operator}")
+            checks.append(lambda row, column=column, value=value: _ilike(row.get(column), value))
+        self.filters.append(lambda row: any(check(row) for check in checks))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "_Query":
+        self.order_by = (column, desc)
+        return self
+
+    def range(self, start: int, end: int) -> "_Query":
+        self.bounds = (start, end)
+        return self
+
+    def execute(self) -> _Result:
+        rows = [
+            row for row in self.db.table(self.table_name, self.user_id)
+            if all(check(row) for check in self.filters)
+        ]
+        if self.values is not None:
+            return _Result(_as_json(self.db.update_user_jobs(rows, self.values)))
+        count = len(rows) if self.count_mode == "exact" else None
+        if self.order_by:
+            rows = _ordered(rows, *self.order_by)
+        if self.bounds:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        if self.columns:
+            rows = [{column: row.get(column) for column in self.columns} for row in rows]
+        return _Result(_as_json(rows), count)
+
+
+class _Rpc:
+    def __init__(self, db: FakeDatabase, name: str, params: dict):
+        if name != "job_facets":
+            raise NotImplementedError(f"No fake function {name}")
+        self.db = db
+        self.params = params
+
+    def execute(self) -> _Result:
+        return _Result(_as_json(self.db.job_facets(**self.params)))
+
+
+class FakePostgrestClient:
+    """Stands in for DatabaseService.client."""
+
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+
+    def table(self, name: str) -> _Query:
+        return _Query(self.db, name)
+
+    def rpc(self, name: str, params: dict) -> _Rpc:
+        return _Rpc(self.db, name, params)
+
+
+# ============================================
+# asyncpg side
+# ============================================
+
+# WHERE conditions app.database_pg.get_jobs writes
+_CONDITIONS = [
+    (re.compile(r"(\w+) = \$(\d+)$"), lambda column, value: lambda row: str(row[column]) == str(value)),
+    (
+        re.compile(r"(\w+) = ANY\(\$(\d+)::text\[\]\)$"),
+        lambda column, value: lambda row: row[column] is not None and row[column] in value
+    ),
+    (re.compile(r"(\w+) ILIKE \$(\d+)$"), lambda column, value: lambda row: _ilike(row[column], value)),
+    (
+        re.compile(r"(\w+) >= \$(\d+)$"),
+        lambda column, value: lambda row: row[column] is not None and row[column] >= value
+    ),
+]
+_SEARCH = re.compile(r"\((\w+) ILIKE \$(\d+) OR (\w+) ILIKE \$(\d+)\)$")
+_LIST = re.compile(
+    r"SELECT (.+), count\(\*\) OVER \(\) AS total_count FROM public\.fetched_jobs WHERE (.+) "
+    r"ORDER BY (\w+) (ASC|DESC) LIMIT \$(\d+) OFFSET \$(\d+)$"
+)
+_COUNT = re.compile(r"SELECT count\(\*\) AS total_count FROM public\.fetched_jobs WHERE (.+)$")
+_FACET_PARAMS = (
+    "p_user_id", "p_dimensions", "p_portal", "p_status", "p_work_type", "p_experience_level",
+    "p_location", "p_company", "p_min_lpa", "p_q", "p_limit"
+)
+
+
+class FakePool:
+    """Stands in for the asyncpg pool of AsyncpgDatabaseService; answers only its fixed SQL."""
+
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+
+    def _where(self, sql: str, args: tuple) -> List[dict]:
+        checks = []
+        conditions = sql.split(" AND ")
+        # get_jobs always leads with user_id = $1; scan only that user's rows
+        rows = self.db.jobs_for(args[0] if conditions[0] == "user_id = $1" else None)
+        for condition in conditions:
+            match = _SEARCH.match(condition)
+            if match:
+                first, first_arg, second, second_arg = match.groups()
+                checks.append(
+                    lambda row, first=first, second=second, a=args[int(first_arg) - 1], b=args[int(second_arg) - 1]:
+                    _ilike(row[first], a) or _ilike(row[second], b)
+                )
+                continue
+            for pattern, build in _CONDITIONS:
+                match = pattern.match(condition)
+                if match:
+                    checks.append(build(match.group(1), args[int(match.group(2)) - 1]))
+                    break
+            else:
+                raise NotImplementedError(f"No fake condition {condition}")
+        return [row for row in rows if all(check(row) for check in checks)]
+
+    async def fetch(self, sql: str, *args) -> List[dict]:
+        match = _LIST.match(sql)
+        if match:
+            columns, where, sort, direction, limit_arg, offset_arg = match.groups()
+            rows = _ordered(self._where(where, args), sort, direction == "DESC")
+            offset = args[int(offset_arg) - 1]
+            page = rows[offset:offset + args[int(limit_arg) - 1]]
+            names = [column.strip() for column in columns.split(",")]
+            return [{**{name: row.get(name) for name in names}, "total_count": len(rows)} for row in page]
+
+        match = _COUNT.match(sql)
+        if match:
+            return [{"total_count": len(self._where(match.group(1), args))}]
+
+        if "FROM public.job_facets(" in sql:
+            return self.db.job_facets(**dict(zip(_FACET_PARAMS, args)))
+
+        if sql.startswith("SELECT f.*"):
+            job_id, user_id = args
+            rows = []
+            for job in self.db.jobs_for(user_id):
+                if str(job["id"]) == str(job_id):
+                    description = self.db.texts.get(job["description_hash"]) or {}
+                    benefits = self.db.texts.get(job["benefits_hash"]) or {}
+                    rows.append({
+                        **job,
+                        "description_encoding": description.get("encoding"),
+                        "description_body": description.get("body"),
+                        "benefits_encoding": benefits.get("encoding"),
+                        "benefits_body": benefits.get("body")
+                    })
+            return rows
+
+        if sql.startswith("UPDATE public.user_jobs SET status = $1"):
+            status, job_id, user_id = args
+            rows = [job for job in self.db.jobs_for(user_id) if str(job["id"]) == str(job_id)]
+            return self.db.update_user_jobs(rows, {"status": status})
+
+        if sql.startswith("SELECT 'status' AS kind"):
+            user_id, day = args
+            rows = [
+                {"kind": "status", "portal": row["portal"], "status": row["status"],
+                 "job_count": row["job_count"], "jobs_added": None}
+                for row in self.db.job_stats(user_id)
+            ]
+            rows += [
+                {"kind": "today", "portal": None, "status": None, "job_count": None, "jobs_added": row["jobs_added"]}
+                for row in self.db.daily_stats(user_id) if row["day"] == day
+            ]
+            return rows
+
+        raise NotImplementedError(f"No fake statement for: {sql[:80]}")
+
+    async def close(self):
+        pass
@@ -0,0 +1,68 @@
+"""
+Job Fetcher Stack - Mock Apify API
+Stand-in for the Apify endpoints used by ApifyService, serving synthetic
+LinkedIn job items from benchmarks.datagen. Point APIFY_BASE_URL at it:
+
+    uvicorn benchmarks.mock_apify:app --port 8090
+    APIFY_BASE_URL=http://127.0.0.1:8090/v2
+
+MOCK_APIFY_LATENCY_MS adds a fixed delay to every response.
+MOCK_APIFY_ARCHIVE_DIR serves datasets recorded by app.archive (real
+scraped items) under their own IDs; other IDs stay synthetic.
+"""
+from typing import Optional
+from fastapi import FastAPI, Request, Response
+from app.archive import DatasetArchive
+from benchmarks.datagen import JobGenerator
+import asyncio
+import itertools
+import os
+import uuid
+
+
+LATENCY = float(os.environ.get("MOCK_APIFY_LATENCY_MS", "0")) / 1000
+ARCHIVE_DIR = os.environ.get("MOCK_APIFY_ARCHIVE_DIR")
+archive = DatasetArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
+
+app = FastAPI(title="Mock Apify")
+
+# actor run id -> requested row count
+runs = {}
+
+
+async def _delay():
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+
+
+@app.post("/v2/acts/{actor_id}/runs")
+async def start_run(actor_id: str, request: Request):
+    await _delay()
+    payload = await request.json()
+    run_id = uuid.uuid4().hex[:16]
+    runs[run_id] = int(payload.get("rows", 50))
+    return {"data": {"id": run_id, "status": "RUNNING", "defaultDatasetId": run_id}}
+
+
+@app.get("/v2/actor-runs/{run_id}")
+async def run_status(run_id: str):
+    await _delay()
+    return {"data": {"id": run_id, "status": "SUCCEEDED", "defaultDatasetId": run_id}}
+
+
+@app.get("/v2/datasets/{dataset_id}/items")
+async def dataset_items(dataset_id: str, response: Response, offset: int = 0, limit: Optional[int] = None):
+    await _delay()
+    if archive and dataset_id not in runs:
+        try:
+            items, total = archive.read(dataset_id, offset, limit)
+            response.headers["X-Apify-Pagination-Total"] = str(total)
+            return items
+        except ValueError:
+            pass
+    rows = runs.get(dataset_id, 50)
+    # A bounded job ID pool so repeated syncs exercise both inserts and updates
+    generator = JobGenerator(seed=int(dataset_id, 16), companies=200, id_pool=5000)
+    end = rows if limit is None else min(rows, offset + limit)
+    response.headers["X-Apify-Pagination-Total"] = str(rows)
+    return list(itertools.islice(generator.items(rows), offset, end))
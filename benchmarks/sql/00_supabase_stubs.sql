@@ -0,0 +1,30 @@
+-- ============================================
+-- Benchmarks: minimal Supabase surface for plain Postgres + PostgREST
+-- Roles, auth.users and auth.uid() that database.sql and the migrations expect
+-- ============================================
+
+CREATE ROLE anon NOLOGIN;
+CREATE ROLE authenticated NOLOGIN;
+CREATE ROLE service_role NOLOGIN BYPASSRLS;
+CREATE ROLE authenticator LOGIN NOINHERIT PASSWORD 'postgres';
+GRANT anon, authenticated, service_role TO authenticator;
+
+CREATE SCHEMA auth;
+
+CREATE TABLE auth.users (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    email text
+);
+
+CREATE FUNCTION auth.uid() RETURNS uuid
+    LANGUAGE sql STABLE
+    AS $$ SELECT nullif(current_setting('request.jwt.claim.sub', true), '')::uuid $$;
+
+GRANT USAGE ON SCHEMA public, auth TO anon, authenticated, service_role;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT ALL ON TABLES TO service_role;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT ALL ON SEQUENCES TO service_role;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT EXECUTE ON FUNCTIONS TO service_role;
+
+-- The DEV_MODE user (dev-token) and a pool of other benchmark users
+INSERT INTO auth.users (id, email)
+VALUES ('7ee1c8ec-27c1-4ea6-90ac-9e028572ecf4', 'dev@example.com');
@@ -0,0 +1,11 @@
+#!/bin/sh
+# Apply database.sql and every migration in order (repo root is mounted at /schema)
+set -e
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" -f /schema/database.sql
+for migration in /schema/migrations/*.sql; do
+    psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" -f "$migration"
+done
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" \
+    -c "GRANT ALL ON ALL TABLES IN SCHEMA public TO service_role" \
+    -c "GRANT ALL ON ALL SEQUENCES IN SCHEMA public TO service_role" \
+    -c "GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA public TO service_role"
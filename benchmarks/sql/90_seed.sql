@@ -0,0 +1,48 @@
+-- ============================================
+-- Benchmarks: synthetic jobs for the DEV_MODE user
+-- Row count comes from the bench.seed_jobs setting (docker-compose sets it)
+-- ============================================
+
+INSERT INTO public.job_fetch_runs (id, user_id, portal, status, jobs_found, new_jobs_added, finished_at)
+VALUES ('00000000-0000-0000-0000-000000000001', '7ee1c8ec-27c1-4ea6-90ac-9e028572ecf4', 'linkedin', 'completed', 0, 0, now());
+
+INSERT INTO public.job_descriptions (hash, encoding, body, byte_length)
+SELECT DISTINCT ON (hash) hash, 'identity', body, octet_length(body)
+FROM (
+    SELECT body, encode(sha256(convert_to(body, 'UTF8')), 'hex') AS hash
+    FROM (SELECT repeat('Lorem ipsum dolor sit amet. ', 20 + n) AS body FROM generate_series(0, 99) AS n) bodies
+) texts;
+
+INSERT INTO public.jobs (
+    portal, external_job_id, title, company, company_id, location, lpa_min, lpa_max,
+    job_url, description_hash, posted_at
+)
+SELECT
+    'linkedin',
+    'seed-' || n,
+    (ARRAY['Software Engineer', 'Data Engineer', 'Backend Developer', 'Product Manager', 'SRE', 'ML Engineer'])[1 + n % 6],
+    (ARRAY['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises'])[1 + n % 7],
+    (10000 + n % 7)::text,
+    (ARRAY['Bengaluru, India', 'Pune, India', 'Remote', 'London, UK', 'New York, NY', 'Berlin, Germany'])[1 + n % 6],
+    (n % 40)::numeric,
+    (n % 40 + 10)::numeric,
+    'https://www.linkedin.com/jobs/view/seed-' || n,
+    encode(sha256(convert_to(repeat('Lorem ipsum dolor sit amet. ', 20 + n % 100), 'UTF8')), 'hex'),
+    current_date - (n % 90)
+FROM generate_series(1, coalesce(nullif(current_setting('bench.seed_jobs', true), ''), '20000')::int) AS n;
+
+INSERT INTO public.user_jobs (user_id, job_id, portal, fetch_run_id, fetched_at, match_score, status)
+SELECT
+    '7ee1c8ec-27c1-4ea6-90ac-9e028572ecf4',
+    j.id,
+    'linkedin',
+    '00000000-0000-0000-0000-000000000001',
+    now() - make_interval(mins => n),
+    n % 101,
+    (ARRAY['new', 'reviewed', 'queued', 'applied', 'skipped'])[1 + n % 5]
+FROM public.jobs j
+CROSS JOIN LATERAL (SELECT substr(j.external_job_id, 6)::int AS n) seed
+WHERE j.external_job_id LIKE 'seed-%';
+
+ANALYZE public.jobs;
+ANALYZE public.user_jobs;
@@ -0,0 +1,58 @@
+-- ============================================
+-- Migration 001: Saved searches with incremental sync high-water mark
+-- Run after database.sql in Supabase SQL Editor
+-- ============================================
+
+-- Table: saved_searches
+-- A user's recurring search; high_water_* columns track what has already been ingested
+CREATE TABLE public.saved_searches (
+    id uuid NOT NULL DEFAULT gen_random_uuid(),
+    user_id uuid NOT NULL,
+    name text,
+    portal text NOT NULL DEFAULT 'linkedin',
+    title text,
+    location text,
+    company_names text[],
+    company_ids text[],
+    published_at text,
+    rows integer NOT NULL DEFAULT 50 CHECK (rows BETWEEN 1 AND 100),
+    is_active boolean NOT NULL DEFAULT true,
+    high_water_posted_at date,
+    high_water_job_ids text[] NOT NULL DEFAULT '{}',
+    last_synced_at timestamp with time zone,
+    last_run_id uuid,
+    created_at timestamp with time zone DEFAULT now(),
+    updated_at timestamp with time zone DEFAULT now(),
+    CONSTRAINT saved_searches_pkey PRIMARY KEY (id),
+    CONSTRAINT saved_searches_user_id_fkey FOREIGN KEY (user_id) REFERENCES auth.users(id) ON DELETE CASCADE,
+    CONSTRAINT saved_searches_last_run_id_fkey FOREIGN KEY (last_run_id) REFERENCES public.job_fetch_runs(id) ON DELETE SET NULL
+);
+
+ALTER TABLE public.job_fetch_runs
+    ADD COLUMN saved_search_id uuid REFERENCES public.saved_searches(id) ON DELETE SET NULL;
+
+CREATE INDEX idx_saved_searches_user_id ON public.saved_searches(user_id);
+CREATE INDEX idx_job_fetch_runs_saved_search_id ON public.job_fetch_runs(saved_search_id);
+
+ALTER TABLE public.saved_searches ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own saved searches"
+    ON public.saved_searches FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert their own saved searches"
+    ON public.saved_searches FOR INSERT
+    WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can update their own saved searches"
+    ON public.saved_searches FOR UPDATE
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can delete their own saved searches"
+    ON public.saved_searches FOR DELETE
+    USING (auth.uid() = user_id);
+
+CREATE TRIGGER update_saved_searches_updated_at
+    BEFORE UPDATE ON public.saved_searches
+    FOR EACH ROW
+    EXECUTE FUNCTION public.update_updated_at_column();
@@ -0,0 +1,13 @@
+-- ============================================
+-- Migration 002: Scheduled recurring syncs
+-- ============================================
+
+-- Cadence per saved search; next_sync_at carries the scheduler's jitter
+ALTER TABLE public.saved_searches
+    ADD COLUMN sync_interval_minutes integer NOT NULL DEFAULT 360 CHECK (sync_interval_minutes >= 15),
+    ADD COLUMN next_sync_at timestamp with time zone;
+
+-- Scheduler scans active searches by due time
+CREATE INDEX idx_saved_searches_due
+    ON public.saved_searches(next_sync_at NULLS FIRST)
+    WHERE is_active;
@@ -0,0 +1,7 @@
+-- ============================================
+-- Migration 003: Per-stage timing breakdown on fetch runs
+-- ============================================
+
+-- { "total_ms": ..., "stages_ms": { "actor_wait": ..., "db_write": ... }, "counts": { ... } }
+ALTER TABLE public.job_fetch_runs
+    ADD COLUMN stage_timings jsonb;
@@ -0,0 +1,96 @@
+-- ============================================
+-- Migration 004: Materialized per-user job counters
+-- Kept current by triggers on fetched_jobs so dashboard counts are O(1)
+-- ============================================
+
+-- Job count per (user, portal, status)
+CREATE TABLE public.user_job_stats (
+    user_id uuid NOT NULL,
+    portal text NOT NULL,
+    status text NOT NULL,
+    job_count bigint NOT NULL DEFAULT 0,
+    updated_at timestamp with time zone DEFAULT now(),
+    CONSTRAINT user_job_stats_pkey PRIMARY KEY (user_id, portal, status),
+    CONSTRAINT user_job_stats_user_id_fkey FOREIGN KEY (user_id) REFERENCES auth.users(id) ON DELETE CASCADE
+);
+
+-- Jobs added per user per UTC day (for "new today")
+CREATE TABLE public.user_job_daily_stats (
+    user_id uuid NOT NULL,
+    day date NOT NULL,
+    jobs_added bigint NOT NULL DEFAULT 0,
+    CONSTRAINT user_job_daily_stats_pkey PRIMARY KEY (user_id, day),
+    CONSTRAINT user_job_daily_stats_user_id_fkey FOREIGN KEY (user_id) REFERENCES auth.users(id) ON DELETE CASCADE
+);
+
+ALTER TABLE public.user_job_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.user_job_daily_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own job stats"
+    ON public.user_job_stats FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can view their own daily job stats"
+    ON public.user_job_daily_stats FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE OR REPLACE FUNCTION public.bump_user_job_stats(
+    p_user_id uuid, p_portal text, p_status text, p_delta bigint
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO public.user_job_stats (user_id, portal, status, job_count)
+    VALUES (p_user_id, p_portal, p_status, p_delta)
+    ON CONFLICT (user_id, portal, status) DO UPDATE
+        SET job_count = public.user_job_stats.job_count + EXCLUDED.job_count,
+            updated_at = now();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply the delta for each inserted, updated or deleted fetched_jobs row
+CREATE OR REPLACE FUNCTION public.maintain_user_job_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF TG_OP = 'DELETE'
+            OR OLD.status IS DISTINCT FROM NEW.status
+            OR OLD.portal IS DISTINCT FROM NEW.portal
+            OR OLD.user_id IS DISTINCT FROM NEW.user_id THEN
+            PERFORM public.bump_user_job_stats(OLD.user_id, OLD.portal, OLD.status, -1);
+        ELSE
+            RETURN NEW;
+        END IF;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+
+    PERFORM public.bump_user_job_stats(NEW.user_id, NEW.portal, NEW.status, 1);
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO public.user_job_daily_stats (user_id, day, jobs_added)
+        VALUES (NEW.user_id, (coalesce(NEW.fetched_at, now()) AT TIME ZONE 'UTC')::date, 1)
+        ON CONFLICT (user_id, day) DO UPDATE
+            SET jobs_added = public.user_job_daily_stats.jobs_added + 1;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER maintain_fetched_jobs_user_stats
+    AFTER INSERT OR UPDATE OF status, portal, user_id OR DELETE ON public.fetched_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION public.maintain_user_job_stats();
+
+-- Backfill from existing rows
+INSERT INTO public.user_job_stats (user_id, portal, status, job_count)
+SELECT user_id, portal, status, count(*)
+FROM public.fetched_jobs
+GROUP BY user_id, portal, status;
+
+INSERT INTO public.user_job_daily_stats (user_id, day, jobs_added)
+SELECT user_id, (fetched_at AT TIME ZONE 'UTC')::date, count(*)
+FROM public.fetched_jobs
+WHERE fetched_at IS NOT NULL
+GROUP BY user_id, (fetched_at AT TIME ZONE 'UTC')::date;
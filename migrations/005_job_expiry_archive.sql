@@ -0,0 +1,106 @@
+-- ============================================
+-- Migration 005: Job expiry and archival
+-- Stale jobs are marked expired; old expired/skipped jobs move to an archive
+-- table in batches so fetched_jobs only carries live rows
+-- ============================================
+
+-- When a job last appeared in a scrape (set on every upsert)
+ALTER TABLE public.fetched_jobs
+    ADD COLUMN last_seen_at timestamp with time zone DEFAULT now();
+
+UPDATE public.fetched_jobs SET last_seen_at = coalesce(fetched_at, now());
+
+CREATE INDEX idx_fetched_jobs_expiry
+    ON public.fetched_jobs(last_seen_at)
+    WHERE status IN ('new', 'reviewed', 'queued');
+
+CREATE INDEX idx_fetched_jobs_archivable
+    ON public.fetched_jobs(updated_at)
+    WHERE status IN ('expired', 'skipped');
+
+-- Same columns as fetched_jobs, without its constraints and indexes
+CREATE TABLE public.fetched_jobs_archive (
+    LIKE public.fetched_jobs INCLUDING DEFAULTS,
+    archived_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+CREATE INDEX idx_fetched_jobs_archive_user_id ON public.fetched_jobs_archive(user_id, archived_at DESC);
+
+ALTER TABLE public.fetched_jobs_archive ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own archived jobs"
+    ON public.fetched_jobs_archive FOR SELECT
+    USING (auth.uid() = user_id);
+
+-- Mark up to p_batch_size open jobs expired when they were posted more than
+-- p_max_age_days ago, or have been missing from the user's scrapes for
+-- p_missing_days (only counted while the user keeps completing full,
+-- non-incremental fetch runs). Returns the number of jobs expired.
+CREATE OR REPLACE FUNCTION public.expire_stale_jobs(
+    p_max_age_days integer,
+    p_missing_days integer,
+    p_batch_size integer
+) RETURNS integer AS $$
+DECLARE
+    expired integer;
+BEGIN
+    WITH stale AS (
+        SELECT j.id
+        FROM public.fetched_jobs j
+        WHERE j.status IN ('new', 'reviewed', 'queued')
+          AND (
+              j.posted_at < current_date - p_max_age_days
+              OR (
+                  j.last_seen_at < now() - make_interval(days => p_missing_days)
+                  AND EXISTS (
+                      SELECT 1 FROM public.job_fetch_runs r
+                      WHERE r.user_id = j.user_id
+                        AND r.status = 'completed'
+                        AND coalesce((r.input_params->>'incremental')::boolean, false) = false
+                        AND r.started_at > j.last_seen_at + make_interval(days => p_missing_days)
+                  )
+              )
+          )
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE public.fetched_jobs j
+    SET status = 'expired'
+    FROM stale
+    WHERE j.id = stale.id;
+
+    GET DIAGNOSTICS expired = ROW_COUNT;
+    RETURN expired;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Move up to p_batch_size expired or skipped jobs untouched for
+-- p_older_than_days into fetched_jobs_archive. Returns the number moved.
+CREATE OR REPLACE FUNCTION public.archive_jobs(
+    p_older_than_days integer,
+    p_batch_size integer
+) RETURNS integer AS $$
+DECLARE
+    moved_count integer;
+BEGIN
+    WITH batch AS (
+        SELECT id
+        FROM public.fetched_jobs
+        WHERE status IN ('expired', 'skipped')
+          AND updated_at < now() - make_interval(days => p_older_than_days)
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM public.fetched_jobs j
+        USING batch
+        WHERE j.id = batch.id
+        RETURNING j.*
+    )
+    INSERT INTO public.fetched_jobs_archive
+    SELECT moved.*, now() FROM moved;
+
+    GET DIAGNOSTICS moved_count = ROW_COUNT;
+    RETURN moved_count;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,126 @@
+-- ============================================
+-- Migration 006: Hash-partition fetched_jobs and job_fetch_runs by user_id
+-- Every user-facing query filters on user_id, so each one touches a single
+-- partition; indexes, vacuum and trigger work stay proportional to a
+-- partition rather than the whole platform. Requires Postgres 15+.
+--
+-- The old tables are kept as *_unpartitioned for rollback; drop them once
+-- the new tables are verified:
+--   DROP TABLE public.fetched_jobs_unpartitioned, public.job_fetch_runs_unpartitioned;
+-- ============================================
+
+BEGIN;
+
+LOCK TABLE public.fetched_jobs, public.job_fetch_runs IN ACCESS EXCLUSIVE MODE;
+
+-- Move the old tables aside, freeing their constraint and index names
+ALTER TABLE public.saved_searches DROP CONSTRAINT saved_searches_last_run_id_fkey;
+ALTER TABLE public.fetched_jobs DROP CONSTRAINT fetched_jobs_fetch_run_id_fkey;
+DROP TRIGGER update_fetched_jobs_updated_at ON public.fetched_jobs;
+DROP TRIGGER maintain_fetched_jobs_user_stats ON public.fetched_jobs;
+
+ALTER TABLE public.job_fetch_runs RENAME TO job_fetch_runs_unpartitioned;
+ALTER TABLE public.job_fetch_runs_unpartitioned RENAME CONSTRAINT job_fetch_runs_pkey TO job_fetch_runs_unpartitioned_pkey;
+DROP INDEX public.idx_job_fetch_runs_user_id, public.idx_job_fetch_runs_status, public.idx_job_fetch_runs_saved_search_id;
+
+ALTER TABLE public.fetched_jobs RENAME TO fetched_jobs_unpartitioned;
+ALTER TABLE public.fetched_jobs_unpartitioned RENAME CONSTRAINT fetched_jobs_pkey TO fetched_jobs_unpartitioned_pkey;
+ALTER TABLE public.fetched_jobs_unpartitioned RENAME CONSTRAINT fetched_jobs_unique_job TO fetched_jobs_unpartitioned_unique_job;
+DROP INDEX public.idx_fetched_jobs_user_id, public.idx_fetched_jobs_status, public.idx_fetched_jobs_portal,
+    public.idx_fetched_jobs_fetched_at, public.idx_fetched_jobs_match_score,
+    public.idx_fetched_jobs_expiry, public.idx_fetched_jobs_archivable;
+
+-- Partitioned tables; the partition key must be part of every unique constraint
+CREATE TABLE public.job_fetch_runs (
+    LIKE public.job_fetch_runs_unpartitioned INCLUDING DEFAULTS,
+    CONSTRAINT job_fetch_runs_pkey PRIMARY KEY (id, user_id),
+    CONSTRAINT job_fetch_runs_user_id_fkey FOREIGN KEY (user_id) REFERENCES auth.users(id) ON DELETE CASCADE,
+    CONSTRAINT job_fetch_runs_saved_search_id_fkey FOREIGN KEY (saved_search_id) REFERENCES public.saved_searches(id) ON DELETE SET NULL
+) PARTITION BY HASH (user_id);
+
+CREATE TABLE public.fetched_jobs (
+    LIKE public.fetched_jobs_unpartitioned INCLUDING DEFAULTS,
+    CONSTRAINT fetched_jobs_pkey PRIMARY KEY (id, user_id),
+    CONSTRAINT fetched_jobs_user_id_fkey FOREIGN KEY (user_id) REFERENCES auth.users(id) ON DELETE CASCADE,
+    CONSTRAINT fetched_jobs_fetch_run_id_fkey FOREIGN KEY (fetch_run_id, user_id)
+        REFERENCES public.job_fetch_runs(id, user_id) ON DELETE SET NULL (fetch_run_id),
+    CONSTRAINT fetched_jobs_unique_job UNIQUE (user_id, portal, external_job_id)
+) PARTITION BY HASH (user_id);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format(
+            'CREATE TABLE public.job_fetch_runs_p%s PARTITION OF public.job_fetch_runs FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+            lpad(i::text, 2, '0'), i
+        );
+        EXECUTE format(
+            'CREATE TABLE public.fetched_jobs_p%s PARTITION OF public.fetched_jobs FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+            lpad(i::text, 2, '0'), i
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO public.job_fetch_runs SELECT * FROM public.job_fetch_runs_unpartitioned;
+INSERT INTO public.fetched_jobs SELECT * FROM public.fetched_jobs_unpartitioned;
+
+-- User-leading composites replace the old single-column indexes
+CREATE INDEX idx_job_fetch_runs_user_started ON public.job_fetch_runs(user_id, started_at DESC);
+CREATE INDEX idx_job_fetch_runs_running ON public.job_fetch_runs(started_at) WHERE status = 'running';
+CREATE INDEX idx_job_fetch_runs_saved_search_id ON public.job_fetch_runs(saved_search_id);
+CREATE INDEX idx_fetched_jobs_user_fetched_at ON public.fetched_jobs(user_id, fetched_at DESC);
+CREATE INDEX idx_fetched_jobs_user_status ON public.fetched_jobs(user_id, status);
+CREATE INDEX idx_fetched_jobs_user_match_score ON public.fetched_jobs(user_id, match_score DESC);
+CREATE INDEX idx_fetched_jobs_expiry
+    ON public.fetched_jobs(last_seen_at)
+    WHERE status IN ('new', 'reviewed', 'queued');
+CREATE INDEX idx_fetched_jobs_archivable
+    ON public.fetched_jobs(updated_at)
+    WHERE status IN ('expired', 'skipped');
+
+ALTER TABLE public.saved_searches
+    ADD CONSTRAINT saved_searches_last_run_id_fkey FOREIGN KEY (last_run_id, user_id)
+        REFERENCES public.job_fetch_runs(id, user_id) ON DELETE SET NULL (last_run_id);
+
+-- Triggers are created after the copy so the stats counters are not doubled
+CREATE TRIGGER update_fetched_jobs_updated_at
+    BEFORE UPDATE ON public.fetched_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION public.update_updated_at_column();
+
+CREATE TRIGGER maintain_fetched_jobs_user_stats
+    AFTER INSERT OR UPDATE OF status, portal, user_id OR DELETE ON public.fetched_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION public.maintain_user_job_stats();
+
+ALTER TABLE public.job_fetch_runs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.fetched_jobs ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own fetch runs"
+    ON public.job_fetch_runs FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert their own fetch runs"
+    ON public.job_fetch_runs FOR INSERT
+    WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can update their own fetch runs"
+    ON public.job_fetch_runs FOR UPDATE
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can view their own fetched jobs"
+    ON public.fetched_jobs FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert their own fetched jobs"
+    ON public.fetched_jobs FOR INSERT
+    WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can update their own fetched jobs"
+    ON public.fetched_jobs FOR UPDATE
+    USING (auth.uid() = user_id);
+
+COMMIT;
+
+ANALYZE public.job_fetch_runs;
+ANALYZE public.fetched_jobs;
@@ -0,0 +1,86 @@
+-- ============================================
+-- Migration 007: Content-addressed job text
+-- description and benefits move to job_descriptions, keyed by the SHA-256 of
+-- the text, so a posting fetched by many users (or many times) is stored once
+-- ============================================
+
+CREATE TABLE public.job_descriptions (
+    hash text NOT NULL,
+    encoding text NOT NULL DEFAULT 'identity' CHECK (encoding IN ('identity', 'zstd')),
+    body text NOT NULL,
+    byte_length integer NOT NULL,
+    created_at timestamp with time zone DEFAULT now(),
+    CONSTRAINT job_descriptions_pkey PRIMARY KEY (hash)
+);
+
+-- Shared across users; only the service role reads it (via the API)
+ALTER TABLE public.job_descriptions ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE public.fetched_jobs
+    ADD COLUMN description_hash text,
+    ADD COLUMN benefits_hash text;
+
+ALTER TABLE public.fetched_jobs_archive
+    ADD COLUMN description_hash text,
+    ADD COLUMN benefits_hash text;
+
+-- Backfill: hashes match app.text_codec.hash_text (hex SHA-256 of UTF-8)
+INSERT INTO public.job_descriptions (hash, encoding, body, byte_length)
+SELECT DISTINCT ON (hash) hash, 'identity', body, octet_length(body)
+FROM (
+    SELECT encode(sha256(convert_to(description, 'UTF8')), 'hex') AS hash, description AS body
+    FROM public.fetched_jobs WHERE description IS NOT NULL
+    UNION ALL
+    SELECT encode(sha256(convert_to(benefits, 'UTF8')), 'hex'), benefits
+    FROM public.fetched_jobs WHERE benefits IS NOT NULL
+) texts
+ON CONFLICT (hash) DO NOTHING;
+
+-- Moving text out is not a user-visible change: keep updated_at, which
+-- archive_jobs keys on, by skipping the updated_at trigger for the backfill
+BEGIN;
+ALTER TABLE public.fetched_jobs DISABLE TRIGGER update_fetched_jobs_updated_at;
+
+UPDATE public.fetched_jobs
+SET description_hash = CASE WHEN description IS NOT NULL THEN encode(sha256(convert_to(description, 'UTF8')), 'hex') END,
+    benefits_hash = CASE WHEN benefits IS NOT NULL THEN encode(sha256(convert_to(benefits, 'UTF8')), 'hex') END,
+    description = NULL,
+    benefits = NULL
+WHERE description IS NOT NULL OR benefits IS NOT NULL;
+
+ALTER TABLE public.fetched_jobs ENABLE TRIGGER update_fetched_jobs_updated_at;
+COMMIT;
+
+-- The archive now has columns after archived_at, so copy rows by name
+CREATE OR REPLACE FUNCTION public.archive_jobs(
+    p_older_than_days integer,
+    p_batch_size integer
+) RETURNS integer AS $$
+DECLARE
+    moved_count integer;
+BEGIN
+    WITH batch AS (
+        SELECT id, user_id
+        FROM public.fetched_jobs
+        WHERE status IN ('expired', 'skipped')
+          AND updated_at < now() - make_interval(days => p_older_than_days)
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM public.fetched_jobs j
+        USING batch
+        WHERE j.id = batch.id AND j.user_id = batch.user_id
+        RETURNING j.*
+    )
+    INSERT INTO public.fetched_jobs_archive
+    SELECT (jsonb_populate_record(
+        NULL::public.fetched_jobs_archive,
+        to_jsonb(moved) || jsonb_build_object('archived_at', now())
+    )).*
+    FROM moved;
+
+    GET DIAGNOSTICS moved_count = ROW_COUNT;
+    RETURN moved_count;
+END;
+$$ LANGUAGE plpgsql;
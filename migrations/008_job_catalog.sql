@@ -0,0 +1,308 @@
+-- ============================================
+-- Migration 008: Shared job catalog with per-user overlays
+-- A posting is stored once in `jobs`, keyed by (portal, external_job_id);
+-- `user_jobs` holds each user's link to it (status, match score, fetch run).
+-- `fetched_jobs` becomes a view joining the two, with the old columns and
+-- ids, so reads are unchanged. Writes go to jobs / user_jobs.
+--
+-- The old table is kept as fetched_jobs_legacy for rollback; drop it once
+-- the new tables are verified:
+--   DROP TABLE public.fetched_jobs_legacy;
+-- ============================================
+
+BEGIN;
+
+LOCK TABLE public.fetched_jobs IN ACCESS EXCLUSIVE MODE;
+
+-- Global catalog: scraped fields only
+CREATE TABLE public.jobs (
+    id uuid NOT NULL DEFAULT gen_random_uuid(),
+    portal text NOT NULL DEFAULT 'linkedin',
+    external_job_id text NOT NULL,
+    title text NOT NULL,
+    company text NOT NULL,
+    company_id text,
+    company_url text,
+    location text,
+    lpa_min numeric,
+    lpa_max numeric,
+    salary_text text,
+    job_url text NOT NULL,
+    apply_url text,
+    apply_type text,
+    description_hash text,
+    benefits_hash text,
+    requirements_snippet text,
+    contract_type text,
+    experience_level text,
+    work_type text,
+    sector text,
+    applications_count text,
+    posted_at date,
+    posted_time_text text,
+    first_seen_at timestamp with time zone DEFAULT now(),
+    last_scraped_at timestamp with time zone DEFAULT now(),
+    updated_at timestamp with time zone DEFAULT now(),
+    CONSTRAINT jobs_pkey PRIMARY KEY (id),
+    CONSTRAINT jobs_portal_external_job_id_key UNIQUE (portal, external_job_id)
+);
+
+-- Per-user overlay, partitioned like the other per-user tables (migration 006)
+CREATE TABLE public.user_jobs (
+    id uuid NOT NULL DEFAULT gen_random_uuid(),
+    user_id uuid NOT NULL,
+    job_id uuid NOT NULL,
+    portal text NOT NULL DEFAULT 'linkedin',  -- Copied from jobs for the stats trigger
+    fetch_run_id uuid,
+    status text NOT NULL DEFAULT 'new' CHECK (status IN ('new', 'reviewed', 'queued', 'applied', 'skipped', 'expired')),
+    match_score integer DEFAULT 0,
+    fetched_at timestamp with time zone DEFAULT now(),
+    last_seen_at timestamp with time zone DEFAULT now(),
+    created_at timestamp with time zone DEFAULT now(),
+    updated_at timestamp with time zone DEFAULT now(),
+    CONSTRAINT user_jobs_pkey PRIMARY KEY (id, user_id),
+    CONSTRAINT user_jobs_user_job_key UNIQUE (user_id, job_id),
+    CONSTRAINT user_jobs_user_id_fkey FOREIGN KEY (user_id) REFERENCES auth.users(id) ON DELETE CASCADE,
+    CONSTRAINT user_jobs_job_id_fkey FOREIGN KEY (job_id) REFERENCES public.jobs(id) ON DELETE CASCADE,
+    CONSTRAINT user_jobs_fetch_run_id_fkey FOREIGN KEY (fetch_run_id, user_id)
+        REFERENCES public.job_fetch_runs(id, user_id) ON DELETE SET NULL (fetch_run_id)
+) PARTITION BY HASH (user_id);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format(
+            'CREATE TABLE public.user_jobs_p%s PARTITION OF public.user_jobs FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+            lpad(i::text, 2, '0'), i
+        );
+    END LOOP;
+END $$;
+
+-- Backfill: one catalog row per posting (the most recently fetched copy wins)
+INSERT INTO public.jobs (
+    portal, external_job_id, title, company, company_id, company_url, location,
+    lpa_min, lpa_max, salary_text, job_url, apply_url, apply_type, description_hash,
+    benefits_hash, requirements_snippet, contract_type, experience_level, work_type,
+    sector, applications_count, posted_at, posted_time_text, first_seen_at, last_scraped_at
+)
+SELECT DISTINCT ON (portal, coalesce(external_job_id, job_url))
+    portal, coalesce(external_job_id, job_url), title, company, company_id, company_url, location,
+    lpa_min, lpa_max, salary_text, job_url, apply_url, apply_type, description_hash,
+    benefits_hash, requirements_snippet, contract_type, experience_level, work_type,
+    sector, applications_count, posted_at, posted_time_text, created_at, last_seen_at
+FROM public.fetched_jobs
+ORDER BY portal, coalesce(external_job_id, job_url), fetched_at DESC;
+
+-- Links keep the old row ids, so job URLs and ids held by clients stay valid
+INSERT INTO public.user_jobs (
+    id, user_id, job_id, portal, fetch_run_id, status, match_score,
+    fetched_at, last_seen_at, created_at, updated_at
+)
+SELECT f.id, f.user_id, j.id, f.portal, f.fetch_run_id, f.status, f.match_score,
+       f.fetched_at, f.last_seen_at, f.created_at, f.updated_at
+FROM public.fetched_jobs f
+JOIN public.jobs j
+  ON j.portal = f.portal AND j.external_job_id = coalesce(f.external_job_id, f.job_url);
+
+CREATE INDEX idx_user_jobs_user_fetched_at ON public.user_jobs(user_id, fetched_at DESC);
+CREATE INDEX idx_user_jobs_user_status ON public.user_jobs(user_id, status);
+CREATE INDEX idx_user_jobs_user_match_score ON public.user_jobs(user_id, match_score DESC);
+CREATE INDEX idx_user_jobs_job_id ON public.user_jobs(job_id);
+CREATE INDEX idx_user_jobs_expiry
+    ON public.user_jobs(last_seen_at)
+    WHERE status IN ('new', 'reviewed', 'queued');
+CREATE INDEX idx_user_jobs_archivable
+    ON public.user_jobs(updated_at)
+    WHERE status IN ('expired', 'skipped');
+CREATE INDEX idx_jobs_last_scraped_at ON public.jobs(last_scraped_at);
+
+-- Retire the old table
+DROP TRIGGER update_fetched_jobs_updated_at ON public.fetched_jobs;
+DROP TRIGGER maintain_fetched_jobs_user_stats ON public.fetched_jobs;
+ALTER TABLE public.fetched_jobs RENAME TO fetched_jobs_legacy;
+ALTER TABLE public.fetched_jobs_legacy RENAME CONSTRAINT fetched_jobs_pkey TO fetched_jobs_legacy_pkey;
+ALTER TABLE public.fetched_jobs_legacy RENAME CONSTRAINT fetched_jobs_unique_job TO fetched_jobs_legacy_unique_job;
+DROP INDEX public.idx_fetched_jobs_user_fetched_at, public.idx_fetched_jobs_user_status,
+    public.idx_fetched_jobs_user_match_score, public.idx_fetched_jobs_expiry, public.idx_fetched_jobs_archivable;
+
+-- Read model with the old fetched_jobs shape; security_invoker applies the base tables' RLS
+CREATE VIEW public.fetched_jobs WITH (security_invoker = true) AS
+SELECT
+    uj.id,
+    uj.user_id,
+    uj.fetch_run_id,
+    j.portal,
+    j.external_job_id,
+    j.title,
+    j.company,
+    j.company_id,
+    j.company_url,
+    j.location,
+    j.lpa_min,
+    j.lpa_max,
+    j.salary_text,
+    j.job_url,
+    j.apply_url,
+    j.apply_type,
+    NULL::text AS description,
+    j.requirements_snippet,
+    j.contract_type,
+    j.experience_level,
+    j.work_type,
+    j.sector,
+    NULL::text AS benefits,
+    j.applications_count,
+    j.posted_at,
+    j.posted_time_text,
+    uj.fetched_at,
+    uj.match_score,
+    uj.status,
+    uj.created_at,
+    uj.updated_at,
+    uj.last_seen_at,
+    j.description_hash,
+    j.benefits_hash,
+    j.id AS job_id
+FROM public.user_jobs uj
+JOIN public.jobs j ON j.id = uj.job_id;
+
+-- Triggers after the copy so the stats counters are not doubled
+CREATE TRIGGER update_user_jobs_updated_at
+    BEFORE UPDATE ON public.user_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION public.update_updated_at_column();
+
+CREATE TRIGGER update_jobs_updated_at
+    BEFORE UPDATE ON public.jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION public.update_updated_at_column();
+
+CREATE TRIGGER maintain_user_jobs_user_stats
+    AFTER INSERT OR UPDATE OF status, portal, user_id OR DELETE ON public.user_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION public.maintain_user_job_stats();
+
+ALTER TABLE public.jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.user_jobs ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Authenticated users can view the job catalog"
+    ON public.jobs FOR SELECT
+    TO authenticated
+    USING (true);
+
+CREATE POLICY "Users can view their own job links"
+    ON public.user_jobs FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert their own job links"
+    ON public.user_jobs FOR INSERT
+    WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can update their own job links"
+    ON public.user_jobs FOR UPDATE
+    USING (auth.uid() = user_id);
+
+-- Expiry and archival now work on user_jobs (posting dates come from the catalog)
+CREATE OR REPLACE FUNCTION public.expire_stale_jobs(
+    p_max_age_days integer,
+    p_missing_days integer,
+    p_batch_size integer
+) RETURNS integer AS $$
+DECLARE
+    expired integer;
+BEGIN
+    WITH stale AS (
+        SELECT uj.id, uj.user_id
+        FROM public.user_jobs uj
+        JOIN public.jobs j ON j.id = uj.job_id
+        WHERE uj.status IN ('new', 'reviewed', 'queued')
+          AND (
+              j.posted_at < current_date - p_max_age_days
+              OR (
+                  uj.last_seen_at < now() - make_interval(days => p_missing_days)
+                  AND EXISTS (
+                      SELECT 1 FROM public.job_fetch_runs r
+                      WHERE r.user_id = uj.user_id
+                        AND r.status = 'completed'
+                        AND coalesce((r.input_params->>'incremental')::boolean, false) = false
+                        AND r.started_at > uj.last_seen_at + make_interval(days => p_missing_days)
+                  )
+              )
+          )
+        LIMIT p_batch_size
+        FOR UPDATE OF uj SKIP LOCKED
+    )
+    UPDATE public.user_jobs uj
+    SET status = 'expired'
+    FROM stale
+    WHERE uj.id = stale.id AND uj.user_id = stale.user_id;
+
+    GET DIAGNOSTICS expired = ROW_COUNT;
+    RETURN expired;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.archive_jobs(
+    p_older_than_days integer,
+    p_batch_size integer
+) RETURNS integer AS $$
+DECLARE
+    moved_count integer;
+BEGIN
+    -- The outer SELECT reads the pre-delete snapshot, so the view still has the rows
+    WITH batch AS (
+        SELECT id, user_id
+        FROM public.user_jobs
+        WHERE status IN ('expired', 'skipped')
+          AND updated_at < now() - make_interval(days => p_older_than_days)
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM public.user_jobs uj
+        USING batch
+        WHERE uj.id = batch.id AND uj.user_id = batch.user_id
+        RETURNING uj.id, uj.user_id
+    )
+    INSERT INTO public.fetched_jobs_archive
+    SELECT (jsonb_populate_record(
+        NULL::public.fetched_jobs_archive,
+        to_jsonb(f) || jsonb_build_object('archived_at', now())
+    )).*
+    FROM moved
+    JOIN public.fetched_jobs f ON f.id = moved.id AND f.user_id = moved.user_id;
+
+    GET DIAGNOSTICS moved_count = ROW_COUNT;
+    RETURN moved_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Catalog rows no user links to any more and not scraped recently
+CREATE OR REPLACE FUNCTION public.prune_job_catalog(
+    p_older_than_days integer,
+    p_batch_size integer
+) RETURNS integer AS $$
+DECLARE
+    pruned integer;
+BEGIN
+    WITH orphaned AS (
+        SELECT j.id
+        FROM public.jobs j
+        WHERE j.last_scraped_at < now() - make_interval(days => p_older_than_days)
+          AND NOT EXISTS (SELECT 1 FROM public.user_jobs uj WHERE uj.job_id = j.id)
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    DELETE FROM public.jobs j
+    USING orphaned
+    WHERE j.id = orphaned.id;
+
+    GET DIAGNOSTICS pruned = ROW_COUNT;
+    RETURN pruned;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
+
+ANALYZE public.jobs;
+ANALYZE public.user_jobs;
@@ -0,0 +1,9 @@
+-- ============================================
+-- Migration 009: Resumable dataset ingest
+-- Progress of a chunked sync-from-dataset run, saved after every chunk:
+-- { "dataset_id": ..., "offset": <items consumed>, "jobs_found": ..., "new_jobs_added": ...,
+--   "items_invalid": ..., "invocations": ... }
+-- ============================================
+
+ALTER TABLE public.job_fetch_runs
+    ADD COLUMN checkpoint jsonb;
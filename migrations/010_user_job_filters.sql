@@ -0,0 +1,21 @@
+-- ============================================
+-- Migration 010: Per-user known-jobs filter
+-- A serialized Bloom filter (app/bloom.py) of the (portal, external_job_id)
+-- keys each user has links for. Ingest loads it once per run to skip existence
+-- checks for postings that are definitely new. It can be dropped at any time;
+-- the app rebuilds it from user_jobs.
+-- ============================================
+
+CREATE TABLE public.user_job_filters (
+    user_id uuid NOT NULL,
+    capacity integer NOT NULL,
+    error_rate double precision NOT NULL,
+    item_count integer NOT NULL DEFAULT 0,
+    bits text NOT NULL,  -- base64 bit array
+    updated_at timestamp with time zone DEFAULT now(),
+    CONSTRAINT user_job_filters_pkey PRIMARY KEY (user_id),
+    CONSTRAINT user_job_filters_user_id_fkey FOREIGN KEY (user_id) REFERENCES auth.users(id) ON DELETE CASCADE
+);
+
+-- Internal to ingest; only the service role reads it
+ALTER TABLE public.user_job_filters ENABLE ROW LEVEL SECURITY;
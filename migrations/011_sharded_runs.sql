@@ -0,0 +1,15 @@
+-- ============================================
+-- Migration 011: Sharded syncs
+-- A sharded sync records one parent run plus a child run per shard
+-- (a location, companyId group and/or publishedAt window).
+-- ============================================
+
+ALTER TABLE public.job_fetch_runs
+    ADD COLUMN parent_run_id uuid,
+    ADD COLUMN shard jsonb,  -- The shard's scraper filters, e.g. { "location": "Pune", "published_at": "r604800", "rows": 100 }
+    ADD CONSTRAINT job_fetch_runs_parent_run_id_fkey FOREIGN KEY (parent_run_id, user_id)
+        REFERENCES public.job_fetch_runs(id, user_id) ON DELETE CASCADE;
+
+CREATE INDEX idx_job_fetch_runs_parent_run_id
+    ON public.job_fetch_runs(user_id, parent_run_id)
+    WHERE parent_run_id IS NOT NULL;
@@ -0,0 +1,97 @@
+-- ============================================
+-- Migration 012: Job list facets
+-- Counts per filter value for the jobs page in one aggregate, so the
+-- frontend doesn't need a count query per value.
+-- ============================================
+
+-- Grouped counts over a user's jobs under the jobs-list filters, for the
+-- requested p_dimensions (portal, status, work_type, experience_level,
+-- location, company). Each dimension is counted with every filter except
+-- its own, so other values of a selected filter keep their counts. Returns
+-- up to p_limit values per dimension, most common first; NULL values are
+-- left out.
+CREATE OR REPLACE FUNCTION public.job_facets(
+    p_user_id uuid,
+    p_dimensions text[],
+    p_portal text[] DEFAULT NULL,
+    p_status text[] DEFAULT NULL,
+    p_work_type text[] DEFAULT NULL,
+    p_experience_level text[] DEFAULT NULL,
+    p_location text DEFAULT NULL,
+    p_company text DEFAULT NULL,
+    p_min_lpa numeric DEFAULT NULL,
+    p_q text DEFAULT NULL,
+    p_limit integer DEFAULT 50
+) RETURNS TABLE (dimension text, value text, job_count bigint) AS $$
+    WITH matched AS (
+        SELECT
+            j.portal, j.status, j.work_type, j.experience_level, j.location, j.company,
+            (p_portal IS NULL OR j.portal = ANY(p_portal)) AS ok_portal,
+            (p_status IS NULL OR j.status = ANY(p_status)) AS ok_status,
+            (p_work_type IS NULL OR j.work_type = ANY(p_work_type)) AS ok_work_type,
+            (p_experience_level IS NULL OR j.experience_level = ANY(p_experience_level)) AS ok_experience_level,
+            (p_location IS NULL OR j.location ILIKE '%' || p_location || '%') AS ok_location,
+            (p_company IS NULL OR j.company ILIKE '%' || p_company || '%') AS ok_company
+        FROM public.fetched_jobs j
+        WHERE j.user_id = p_user_id
+          AND (p_min_lpa IS NULL OR j.lpa_min >= p_min_lpa)
+          AND (p_q IS NULL OR j.title ILIKE '%' || p_q || '%' OR j.company ILIKE '%' || p_q || '%')
+    ),
+    candidates AS (
+        -- A row counts toward a dimension when every other filter matches,
+        -- so rows failing two or more filters count nowhere
+        SELECT * FROM matched
+        WHERE (NOT ok_portal)::int + (NOT ok_status)::int + (NOT ok_work_type)::int
+            + (NOT ok_experience_level)::int + (NOT ok_location)::int + (NOT ok_company)::int <= 1
+    ),
+    grouped AS (
+        -- Dimensions that weren't requested collapse to a single NULL group
+        SELECT
+            CASE
+                WHEN GROUPING(g.portal) = 0 THEN 'portal'
+                WHEN GROUPING(g.status) = 0 THEN 'status'
+                WHEN GROUPING(g.work_type) = 0 THEN 'work_type'
+                WHEN GROUPING(g.experience_level) = 0 THEN 'experience_level'
+                WHEN GROUPING(g.location) = 0 THEN 'location'
+                ELSE 'company'
+            END AS dimension,
+            coalesce(g.portal, g.status, g.work_type, g.experience_level, g.location, g.company) AS value,
+            CASE
+                WHEN GROUPING(g.portal) = 0 THEN
+                    count(*) FILTER (WHERE ok_status AND ok_work_type AND ok_experience_level AND ok_location AND ok_company)
+                WHEN GROUPING(g.status) = 0 THEN
+                    count(*) FILTER (WHERE ok_portal AND ok_work_type AND ok_experience_level AND ok_location AND ok_company)
+                WHEN GROUPING(g.work_type) = 0 THEN
+                    count(*) FILTER (WHERE ok_portal AND ok_status AND ok_experience_level AND ok_location AND ok_company)
+                WHEN GROUPING(g.experience_level) = 0 THEN
+                    count(*) FILTER (WHERE ok_portal AND ok_status AND ok_work_type AND ok_location AND ok_company)
+                WHEN GROUPING(g.location) = 0 THEN
+                    count(*) FILTER (WHERE ok_portal AND ok_status AND ok_work_type AND ok_experience_level AND ok_company)
+                ELSE
+                    count(*) FILTER (WHERE ok_portal AND ok_status AND ok_work_type AND ok_experience_level AND ok_location)
+            END AS job_count
+        FROM (
+            SELECT
+                CASE WHEN 'portal' = ANY(p_dimensions) THEN c.portal END AS portal,
+                CASE WHEN 'status' = ANY(p_dimensions) THEN c.status END AS status,
+                CASE WHEN 'work_type' = ANY(p_dimensions) THEN c.work_type END AS work_type,
+                CASE WHEN 'experience_level' = ANY(p_dimensions) THEN c.experience_level END AS experience_level,
+                CASE WHEN 'location' = ANY(p_dimensions) THEN c.location END AS location,
+                CASE WHEN 'company' = ANY(p_dimensions) THEN c.company END AS company,
+                c.ok_portal, c.ok_status, c.ok_work_type, c.ok_experience_level, c.ok_location, c.ok_company
+            FROM candidates c
+        ) g
+        GROUP BY GROUPING SETS ((g.portal), (g.status), (g.work_type), (g.experience_level), (g.location), (g.company))
+    ),
+    ranked AS (
+        SELECT
+            dimension, value, job_count,
+            row_number() OVER (PARTITION BY dimension ORDER BY job_count DESC, value) AS rank
+        FROM grouped
+        WHERE value IS NOT NULL AND job_count > 0 AND dimension = ANY(p_dimensions)
+    )
+    SELECT dimension, value, job_count
+    FROM ranked
+    WHERE rank <= p_limit
+    ORDER BY dimension, rank;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,65 @@
+-- ============================================
+-- Migration 013: Apply queue
+-- Queued jobs are leased to auto-apply workers. A claim locks the next
+-- jobs with SKIP LOCKED and leases them until apply_lease_expires_at, so
+-- parallel workers never get the same job. A worker acks a lease (the job
+-- becomes applied) or nacks it (back to queued). Leases that time out make
+-- the job claimable again.
+-- ============================================
+
+ALTER TABLE public.user_jobs
+    ADD COLUMN apply_lease_id uuid,                          -- Current lease; ack/nack must present it
+    ADD COLUMN apply_claimed_by text,                        -- Worker holding the lease
+    ADD COLUMN apply_lease_expires_at timestamp with time zone,  -- Also the retry-after time of a nacked job
+    ADD COLUMN apply_attempts integer NOT NULL DEFAULT 0,
+    ADD COLUMN apply_last_error text;
+
+CREATE INDEX idx_user_jobs_apply_queue
+    ON public.user_jobs(match_score DESC NULLS LAST, fetched_at)
+    WHERE status = 'queued';
+
+-- Lease up to p_limit claimable queued jobs (no live lease), best match
+-- first, to p_worker_id for p_lease_seconds, returning what a worker needs
+-- to apply. Jobs locked by a concurrent claim are skipped rather than
+-- waited on. p_user_id limits the claim to one user's queue.
+CREATE OR REPLACE FUNCTION public.claim_apply_jobs(
+    p_worker_id text,
+    p_limit integer,
+    p_lease_seconds integer,
+    p_user_id uuid DEFAULT NULL
+) RETURNS TABLE (
+    id uuid,
+    user_id uuid,
+    job_id uuid,
+    portal text,
+    title text,
+    company text,
+    job_url text,
+    apply_url text,
+    apply_type text,
+    match_score integer,
+    lease_id uuid,
+    lease_expires_at timestamp with time zone,
+    attempts integer
+) AS $$
+    WITH next AS (
+        SELECT uj.id, uj.user_id
+        FROM public.user_jobs uj
+        WHERE uj.status = 'queued'
+          AND (p_user_id IS NULL OR uj.user_id = p_user_id)
+          AND (uj.apply_lease_expires_at IS NULL OR uj.apply_lease_expires_at <= now())
+        ORDER BY uj.match_score DESC NULLS LAST, uj.fetched_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE public.user_jobs uj
+    SET apply_lease_id = gen_random_uuid(),
+        apply_claimed_by = p_worker_id,
+        apply_lease_expires_at = now() + make_interval(secs => p_lease_seconds),
+        apply_attempts = uj.apply_attempts + 1
+    FROM next, public.jobs j
+    WHERE uj.id = next.id AND uj.user_id = next.user_id AND j.id = uj.job_id
+    RETURNING
+        uj.id, uj.user_id, uj.job_id, j.portal, j.title, j.company, j.job_url, j.apply_url,
+        j.apply_type, uj.match_score, uj.apply_lease_id, uj.apply_lease_expires_at, uj.apply_attempts;
+$$ LANGUAGE sql VOLATILE;
@@ -0,0 +1,69 @@
+-- ============================================
+-- Migration 014: Search-scoped expiry evidence
+-- A job counts as missing from scrapes only when a later full run of the
+-- search that last found it completed without it. Runs of unrelated
+-- searches and sync-from-dataset imports no longer expire it.
+-- ============================================
+
+-- The scraper query a fetch run's input_params describe, for comparing runs
+-- of the same ad-hoc search. NULL for runs without one (dataset imports).
+CREATE OR REPLACE FUNCTION public.fetch_run_query(p_input_params jsonb)
+RETURNS jsonb AS $$
+    SELECT CASE WHEN p_input_params ? 'source' THEN NULL ELSE jsonb_build_object(
+        'title', p_input_params->'title',
+        'location', p_input_params->'location',
+        'company_names', p_input_params->'company_names',
+        'company_ids', p_input_params->'company_ids',
+        'published_at', p_input_params->'published_at'
+    ) END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- As in 008, but the evidence run must repeat the search of the job's
+-- fetch run: the same saved search, or for ad-hoc syncs the same query.
+CREATE OR REPLACE FUNCTION public.expire_stale_jobs(
+    p_max_age_days integer,
+    p_missing_days integer,
+    p_batch_size integer
+) RETURNS integer AS $$
+DECLARE
+    expired integer;
+BEGIN
+    WITH stale AS (
+        SELECT uj.id, uj.user_id
+        FROM public.user_jobs uj
+        JOIN public.jobs j ON j.id = uj.job_id
+        LEFT JOIN public.job_fetch_runs fr ON fr.id = uj.fetch_run_id AND fr.user_id = uj.user_id
+        WHERE uj.status IN ('new', 'reviewed', 'queued')
+          AND (
+              j.posted_at < current_date - p_max_age_days
+              OR (
+                  uj.last_seen_at < now() - make_interval(days => p_missing_days)
+                  AND EXISTS (
+                      SELECT 1 FROM public.job_fetch_runs r
+                      WHERE r.user_id = uj.user_id
+                        AND r.status = 'completed'
+                        AND coalesce((r.input_params->>'incremental')::boolean, false) = false
+                        AND r.started_at > uj.last_seen_at + make_interval(days => p_missing_days)
+                        AND (
+                            (fr.saved_search_id IS NOT NULL AND r.saved_search_id = fr.saved_search_id)
+                            OR (
+                                fr.saved_search_id IS NULL
+                                AND r.saved_search_id IS NULL
+                                AND public.fetch_run_query(r.input_params) = public.fetch_run_query(fr.input_params)
+                            )
+                        )
+                  )
+              )
+          )
+        LIMIT p_batch_size
+        FOR UPDATE OF uj SKIP LOCKED
+    )
+    UPDATE public.user_jobs uj
+    SET status = 'expired'
+    FROM stale
+    WHERE uj.id = stale.id AND uj.user_id = stale.user_id;
+
+    GET DIAGNOSTICS expired = ROW_COUNT;
+    RETURN expired;
+END;
+$$ LANGUAGE plpgsql;
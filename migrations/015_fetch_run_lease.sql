@@ -0,0 +1,12 @@
+-- ============================================
+-- Migration 015: Dataset run leases
+-- An invocation of a chunked sync-from-dataset run holds a lease on it while
+-- it reads and stores chunks. The lease is taken (or renewed) with a
+-- conditional update before each chunk, so two invocations resuming the same
+-- run never store the same chunk. A crashed invocation's lease runs out
+-- after DATASET_RUN_LEASE_SECONDS.
+-- ============================================
+
+ALTER TABLE public.job_fetch_runs
+    ADD COLUMN lease_id uuid,                                 -- Invocation holding the run
+    ADD COLUMN lease_expires_at timestamp with time zone;